@@ -4,18 +4,36 @@ import sys
 import os
 import logging
 import json
+import time
+import heapq
+import shutil
+import signal
+import hashlib
+import tempfile
 import subprocess
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
 from ladybug.epw import EPW
 from ladybug.stat import STAT
-from ladybug.futil import preparedir
+from ladybug.futil import preparedir, nukedir
 from ladybug.commandutil import process_content_to_output
 from honeybee.config import folders
 from honeybee_energy.simulation.parameter import SimulationParameter
+from honeybee_energy.config import folders as energy_folders
 from honeybee_energy.cli.simulate import simulate_model as simulate_model_hb
+from honeybee_energy.run import output_energyplus_files
 from dragonfly.model import Model
-from dragonfly_energy.run import run_urbanopt, _recommended_processor_count
+from dragonfly_energy.run import run_urbanopt, _recommended_processor_count, \
+    _load_checkpoint_manifest, _completed_models, _write_checkpoint_record, \
+    _write_telemetry_event, _phase_durations, _peak_memory, _summarize_telemetry, \
+    _file_hash
+from dragonfly_energy.writer import _BuildingHoneybeeModels, _hb_model_dict_hash
 
 
 _logger = logging.getLogger(__name__)
@@ -122,10 +140,63 @@ def simulate():
     default=None, show_default=True,
     type=click.Path(file_okay=False, dir_okay=True, resolve_path=True)
 )
+@click.option(
+    '--in-process/--subprocess', ' /-sub', help='Flag to note whether each '
+    'model should be simulated within the persistent worker processes, which '
+    'import honeybee-energy only once and then simulate many models, or whether '
+    'a new Python subprocess should be launched to simulate each model. The '
+    'latter is slower but it can be used as a fallback if the worker processes '
+    'are unstable.', default=True, show_default=True)
+@click.option(
+    '--restart/--resume', ' /-rs', help='Flag to note whether all models should '
+    'be simulated or whether a previous run of this command in the same folder '
+    'should be resumed. When resuming, the simulation_manifest.jsonl that is '
+    'written into the folder as each model finishes is used to skip the models '
+    'that were successfully simulated and only the failed or missing models '
+    'will be simulated.', default=True, show_default=True)
+@click.option(
+    '--cache-folder', '-cf', help='Optional folder on this computer in which '
+    'the results of each simulated model will be cached such that unchanged '
+    'models are not simulated again. Models are matched to the cache using a '
+    'hash of the HBJSON, EPW, simulation parameters, measures and additional '
+    'IDF. If unspecified, no results will be cached.',
+    default=None, show_default=True,
+    type=click.Path(file_okay=False, dir_okay=True, resolve_path=True)
+)
+@click.option(
+    '--cache-size', '-cs', help='Maximum size of the cache folder in megabytes. '
+    'When the cache exceeds this size, the least recently used results are '
+    'deleted from it.', type=float, default=5000, show_default=True)
+@click.option(
+    '--timeout', '-t', help='Optional number for the maximum time in seconds '
+    'that the simulation of each model can take. Models that are still running '
+    'after this time are stopped and reported as timed out. When a timeout is '
+    'specified, each model is simulated in its own subprocess such that it can '
+    'be stopped. If unspecified, there is no limit.',
+    type=float, default=None, show_default=True)
+@click.option(
+    '--memory-budget', '-mb', help='Optional number for the memory in megabytes '
+    'that can be used by all of the simulations running at once. The peak memory '
+    'of each model is estimated from its number of rooms and surfaces and '
+    'models are only started when they fit within the budget. This can be '
+    'used to avoid running out of memory when simulating several large models '
+    'at once. If unspecified, the number of simultaneous simulations is only '
+    'limited by the cpu-count.', type=float, default=None, show_default=True)
+@click.option(
+    '--telemetry', '-tl', help='Optional path to a JSONL file into which the '
+    'timing of each simulated model will be written. This includes the time '
+    'spent in each phase of the simulation (translate, idf, energyplus, report), '
+    'the time spent waiting in the queue, the worker process ID, the peak memory '
+    'and the status of each model. The file can be summarized with the '
+    'summarize-telemetry command. If unspecified, no telemetry is written.',
+    default=None, show_default=True,
+    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True)
+)
 def model_cli(
     model_file, epw_file, sim_par_json, obj_per_model, shade_dist,
     multiplier, plenum, ceil_adjacency, merge_method, measures, additional_idf,
-    report_units, viz_variable, cpu_count, folder
+    report_units, viz_variable, cpu_count, folder, in_process, restart,
+    cache_folder, cache_size, timeout, memory_budget, telemetry
 ):
     """Simulate a Dragonfly Model JSON file in EnergyPlus.
 
@@ -142,7 +213,10 @@ def model_cli(
         model(
             model_file, epw_file, sim_par_json, obj_per_model, shade_dist,
             full_geometry, no_plenum, no_ceil_adjacency, merge_method,
-            measures, additional_idf, report_units, viz_variable, cpu_count, folder
+            measures, additional_idf, report_units, viz_variable, cpu_count, folder,
+            in_process=in_process, resume=not restart,
+            cache_folder=cache_folder, cache_size=cache_size,
+            timeout=timeout, memory_budget=memory_budget, telemetry=telemetry
         )
     except Exception as e:
         _logger.exception('Model simulation failed.\n{}'.format(e))
@@ -155,7 +229,9 @@ def model(
     model_file, epw_file, sim_par_json=None, obj_per_model='Building', shade_dist=None,
     full_geometry=False, no_plenum=False, no_ceil_adjacency=False, merge_method='None',
     measures=None, additional_idf=None, report_units=None, viz_variable=None,
-    cpu_count=None, folder=None, multiplier=True, plenum=True, ceil_adjacency=True
+    cpu_count=None, folder=None, multiplier=True, plenum=True, ceil_adjacency=True,
+    in_process=True, resume=False, cache_folder=None, cache_size=5000,
+    timeout=None, memory_budget=None, telemetry=None
 ):
     """Simulate a Dragonfly Model JSON file in EnergyPlus.
 
@@ -243,12 +319,42 @@ def model(
             be written. If unspecified, the files will be output to the honeybee
             default simulation folder and placed in a project folder with the
             same name as the input model.
+        in_process: Boolean to note whether each model should be simulated
+            within the persistent worker processes, which import honeybee-energy
+            only once and then simulate many models, or whether a new Python
+            subprocess should be launched to simulate each model. (Default: True).
+        resume: Boolean to note whether a previous run of this command in the
+            same folder should be resumed. A simulation_manifest.jsonl is written
+            into the folder with the status, duration and output files of each
+            model as it finishes. When resuming, the models that were successfully
+            simulated are skipped and only the failed or missing models will be
+            simulated. (Default: False).
+        cache_folder: Optional folder on this computer in which the results of
+            each simulated model will be cached such that unchanged models are
+            not simulated again. Models are matched to the cache using a hash of
+            the HBJSON, EPW, simulation parameters, measures and additional IDF.
+            If None, no results will be cached. (Default: None).
+        cache_size: Maximum size of the cache folder in megabytes. When the
+            cache exceeds this size, the least recently used results are
+            deleted from it. (Default: 5000).
+        timeout: Optional number for the maximum time in seconds that the
+            simulation of each model can take. Models that are still running
+            after this time are stopped and reported as timed out. When a
+            timeout is specified, each model is simulated in its own subprocess
+            such that it can be stopped. If None, there is no limit. (Default: None).
+        memory_budget: Optional number for the memory in megabytes that can be
+            used by all of the simulations running at once. The peak memory of
+            each model is estimated from its number of rooms and surfaces and
+            models are only started when they fit within the budget. If None,
+            the number of simultaneous simulations is only limited by the
+            cpu_count. (Default: None).
+        telemetry: Optional path to a JSONL file into which the timing of each
+            simulated model will be written. This includes the time spent in
+            each phase of the simulation, the time spent waiting in the queue,
+            the worker process ID, the peak memory and the status of each model.
+            Any existing file at this path is overwritten. If None, no
+            telemetry is written. (Default: None).
     """
-    # get a ddy variable that might get used later
-    epw_folder, epw_file_name = os.path.split(epw_file)
-    ddy_file = os.path.join(epw_folder, epw_file_name.replace('.epw', '.ddy'))
-    stat_file = os.path.join(epw_folder, epw_file_name.replace('.epw', '.stat'))
-
     # set the default folder to the default if it's not specified
     if folder is None:
         proj_name = os.path.basename(model_file).replace('.json', '')
@@ -258,7 +364,252 @@ def model(
             folders.default_simulation_folder, proj_name, 'OpenStudio')
     preparedir(folder, remove_content=False)
 
-    # process the simulation parameters and write new ones if necessary
+    # process the simulation parameters and write the resolved ones for all models
+    sim_par = _resolve_simulation_parameter(sim_par_json, epw_file)
+    sim_par_json = os.path.join(folder, 'simulation_parameter.json')
+    with open(sim_par_json, 'w') as fp:
+        json.dump(sim_par.to_dict(), fp)
+
+    # re-serialize the Dragonfly Model from a DFJSON or GeoJSON
+    with open(model_file) as json_file:
+        data = json.load(json_file)
+    if 'type' in data and data['type'] == 'Model':
+        df_model = Model.from_dict(data)
+        df_model.convert_to_units('Meters')
+    else:  # assume that it is a GeoJSON
+        df_model, _ = Model.from_geojson(model_file)
+        df_model.separate_top_bottom_floors()
+
+    # convert Dragonfly Model to Honeybee
+    no_plenum = not plenum
+    ceil_adjacency = not no_ceil_adjacency
+    if obj_per_model.title() == 'Building' and shade_dist is not None \
+            and shade_dist > 0 and len(df_model.buildings) > 0:
+        # use a spatial index to find the context shade of each building
+        bldg_models = _BuildingHoneybeeModels(
+            df_model, shade_dist, multiplier, no_plenum, ceil_adjacency,
+            merge_method, df_model.tolerance)
+        hb_models = (bldg_models[i] for i in range(len(bldg_models)))
+    else:
+        hb_models = df_model.to_honeybee(
+            obj_per_model, shade_dist, use_multiplier=multiplier,
+            exclude_plenums=no_plenum, solve_ceiling_adjacencies=ceil_adjacency,
+            merge_method=merge_method
+        )
+
+    # write Honeybee models to JSONs in their own sub-folders
+    hbjson_files, model_costs, model_memory = [], [], []
+    for hb_model in hb_models:
+        directory = os.path.join(folder, hb_model.identifier)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        hbjson_files.append(hb_model.to_hbjson(folder=directory))
+        model_costs.append(_simulation_cost(hb_model, sim_par.timestep))
+        model_memory.append(_simulation_memory(hb_model))
+
+    # skip any models that were completed by a previous run of the same batch
+    manifest_file = os.path.join(folder, 'simulation_manifest.jsonl')
+    if resume:
+        completed = _completed_models(_load_checkpoint_manifest(manifest_file))
+        remaining = [i for i, path in enumerate(hbjson_files) if path not in completed]
+        print('Resuming with {} of {} models left to simulate.'.format(
+            len(remaining), len(hbjson_files)))
+        hbjson_files = [hbjson_files[i] for i in remaining]
+        model_costs = [model_costs[i] for i in remaining]
+        model_memory = [model_memory[i] for i in remaining]
+        if len(hbjson_files) == 0:
+            return
+    elif os.path.isfile(manifest_file):
+        os.remove(manifest_file)
+
+    # hash the inputs shared by all models if results are to be cached
+    inputs_hash = None
+    if cache_folder is not None:
+        preparedir(cache_folder, remove_content=False)
+        inputs_hash = _simulation_inputs_hash(
+            epw_file, sim_par_json, measures, additional_idf,
+            report_units, viz_variable)
+
+    # start the telemetry of the simulations
+    run_start = time.time()
+    cpu_count = cpu_count if cpu_count is not None else _recommended_processor_count()
+    _write_telemetry_event(telemetry, 'start', {
+        'command': 'simulate model', 'models': len(hbjson_files),
+        'cpu_count': cpu_count if len(hbjson_files) != 1 else 1}, 'w')
+
+    # if there is only one file, run the simulation so we can see the progress
+    if len(hbjson_files) == 1 and timeout is None:
+        sim_folder = os.path.dirname(hbjson_files[0])
+        run_folder = os.path.join(sim_folder, 'run')
+        start_time = time.time()
+        with open(manifest_file, 'a') as manifest:
+            cached = False
+            if cache_folder is not None:
+                cache_key = _simulation_cache_key(hbjson_files[0], inputs_hash)
+                cached = _restore_cached_results(cache_folder, cache_key, run_folder)
+            if cached:
+                print('Restored the results of the unchanged model from the cache.')
+            else:
+                try:
+                    simulate_model_hb(
+                        hbjson_files[0], epw_file, sim_par_json,
+                        measures=measures, additional_idf=additional_idf,
+                        report_units=report_units, viz_variable=viz_variable,
+                        folder=sim_folder
+                    )
+                except Exception as e:
+                    _write_checkpoint_record(
+                        manifest, hbjson_files[0], False, time.time() - start_time,
+                        [], str(e))
+                    _write_model_telemetry(
+                        telemetry, hbjson_files[0], 'failed', start_time,
+                        time.time(), start_time)
+                    raise
+            _write_checkpoint_record(
+                manifest, hbjson_files[0], True, time.time() - start_time,
+                _simulation_outputs(hbjson_files[0]))
+            _write_model_telemetry(
+                telemetry, hbjson_files[0], 'cached' if cached else 'simulated',
+                start_time, time.time(), start_time)
+        if cache_folder is not None:
+            if not cached:
+                _cache_results(cache_folder, cache_key, run_folder)
+            _evict_cached_results(cache_folder, cache_size)
+        _write_telemetry_event(
+            telemetry, 'end', {'duration': round(time.time() - run_start, 3)})
+        return
+
+    # execute simulations in parallel
+    # group tiny Story models into batches and schedule the most expensive ones first
+    if obj_per_model.title() == 'Story':
+        batches = _batch_jobs(model_costs, cpu_count)
+    else:
+        batches = [[i] for i in sorted(
+            range(len(model_costs)), key=lambda i: model_costs[i], reverse=True)]
+    print('Simulating {} models in {} batches with {} processors.'.format(
+        len(hbjson_files), len(batches), cpu_count))
+    total_cost = sum(model_costs)
+    if total_cost > 0:
+        batch_costs = [sum(model_costs[i] for i in batch) for batch in batches]
+        makespan = _projected_makespan(batch_costs, cpu_count)
+        print('Projected run time is {:.0%} of a serial run ({:.1f}x speedup) '
+              'with the largest models simulated first.'.format(
+                  makespan / total_cost, total_cost / makespan))
+    batch_memory = [max(model_memory[i] for i in batch) for batch in batches]
+    if memory_budget is not None:
+        print('Limiting the simulations to {:.0f} MB of memory with an estimated '
+              'peak of {:.0f} MB for the largest model.'.format(
+                  memory_budget, max(batch_memory)))
+    else:
+        memory_budget = float('inf')
+    timed_out, unreported = [], {}  # unreported maps HBJSONs to their submit time
+
+    def report(result):
+        """Report the result of a model if it has not already been reported."""
+        if result[1] in unreported:
+            submit_time = unreported.pop(result[1])
+            status = _report_simulation(manifest, telemetry, result, submit_time, timeout)
+            if status == 'timeout':
+                timed_out.append(os.path.basename(result[1]))
+
+    def report_queued(result_queue):
+        """Report the results of all models that the workers have put in the queue."""
+        while True:
+            try:
+                report(result_queue.get_nowait())
+            except queue.Empty:
+                break
+
+    result_queue = multiprocessing.Queue()
+    executor = _simulation_executor(cpu_count, in_process, result_queue)
+    try:
+        with open(manifest_file, 'a') as manifest:
+            pending, running, submit_times = list(range(len(batches))), {}, {}
+            while len(pending) != 0 or len(running) != 0:
+                # submit the batches that fit within the idle processors and memory
+                while len(pending) != 0 and len(running) < cpu_count:
+                    used_memory = sum(batch_memory[b] for b in running.values())
+                    b_i = _next_batch(pending, batch_memory, used_memory, memory_budget)
+                    if b_i is None:
+                        if len(running) != 0:
+                            break  # wait for a running batch to free up memory
+                        b_i = pending[0]  # run the batch alone even if over budget
+                    pending.remove(b_i)
+                    batch_files = [hbjson_files[i] for i in batches[b_i]]
+                    future = executor.submit(
+                        _simulate_hbjson_batch,
+                        batch_files,
+                        epw_file,
+                        sim_par_json,
+                        measures,
+                        additional_idf,
+                        report_units,
+                        viz_variable,
+                        cache_folder,
+                        inputs_hash,
+                        in_process,
+                        timeout
+                    )
+                    running[future] = b_i
+                    submit_times[future] = time.time()
+                    for hbjson_file in batch_files:
+                        unreported[hbjson_file] = submit_times[future]
+                # report the results of each model as soon as it completes
+                done, _ = wait(running, timeout=1, return_when=FIRST_COMPLETED)
+                report_queued(result_queue)
+                broken = any(isinstance(f.exception(), BrokenProcessPool) for f in done)
+                if broken:  # all running batches are lost with the worker process
+                    done, _ = wait(running)
+                    report_queued(result_queue)
+                for future in done:
+                    b_i = running.pop(future)
+                    submit_time = submit_times.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:  # the worker crashed or was killed
+                        batch_files = [hbjson_files[i] for i in batches[b_i]]
+                        results = _failed_batch_results(
+                            [f for f in batch_files if f in unreported], e,
+                            submit_time)
+                    for result in results:
+                        report(result)
+                # replace a broken pool with one that simulates in subprocesses
+                if broken:
+                    print('A worker process stopped unexpectedly. The remaining '
+                          'models will be simulated in subprocesses.')
+                    executor.shutdown()
+                    in_process, result_queue = False, multiprocessing.Queue()
+                    executor = _simulation_executor(cpu_count, in_process, result_queue)
+    finally:
+        executor.shutdown()
+    if len(timed_out) != 0:
+        print('{} models timed out after {} seconds: {}'.format(
+            len(timed_out), timeout, ', '.join(timed_out)))
+    _write_telemetry_event(
+        telemetry, 'end', {'duration': round(time.time() - run_start, 3)})
+
+    # remove the least recently used results if the cache is too large
+    if cache_folder is not None:
+        _evict_cached_results(cache_folder, cache_size)
+
+
+def _resolve_simulation_parameter(sim_par_json, epw_file):
+    """Get simulation parameters with all of the inputs derived from the weather.
+
+    The design days are taken from the DDY next to the EPW (or approximated
+    from the EPW if there is no DDY) and the climate zone is taken from the
+    STAT next to the EPW such that the weather files only need to be parsed
+    once for all of the models that are simulated with the parameters.
+
+    Args:
+        sim_par_json: Full path to a honeybee energy SimulationParameter JSON.
+            If None, default parameters for a fast simulation will be generated.
+        epw_file: Full path to an .epw file.
+    """
+    epw_folder, epw_file_name = os.path.split(epw_file)
+    ddy_file = os.path.join(epw_folder, epw_file_name.replace('.epw', '.ddy'))
+    stat_file = os.path.join(epw_folder, epw_file_name.replace('.epw', '.stat'))
+
     def ddy_from_epw(epw_file, sim_par):
         """Produce a DDY from an EPW file."""
         epw_obj = EPW(epw_file)
@@ -289,80 +640,324 @@ def model(
             os.path.isfile(stat_file):
         stat_obj = STAT(stat_file)
         sim_par.sizing_parameter.climate_zone = stat_obj.ashrae_climate_zone
+    return sim_par
 
-    # re-serialize the Dragonfly Model from a DFJSON or GeoJSON
-    with open(model_file) as json_file:
-        data = json.load(json_file)
-    if 'type' in data and data['type'] == 'Model':
-        df_model = Model.from_dict(data)
-        df_model.convert_to_units('Meters')
-    else:  # assume that it is a GeoJSON
-        df_model, _ = Model.from_geojson(model_file)
-        df_model.separate_top_bottom_floors()
 
-    # convert Dragonfly Model to Honeybee
-    no_plenum = not plenum
-    ceil_adjacency = not no_ceil_adjacency
-    hb_models = df_model.to_honeybee(
-        obj_per_model, shade_dist, use_multiplier=multiplier, exclude_plenums=no_plenum,
-        solve_ceiling_adjacencies=ceil_adjacency, merge_method=merge_method
-    )
+def _simulation_cost(hb_model, timestep=1):
+    """Estimate the relative cost of simulating a honeybee Model in EnergyPlus.
 
-    # write Honeybee models to JSONs in their own sub-folders
-    hbjson_files = []
-    for hb_model in hb_models:
-        directory = os.path.join(folder, hb_model.identifier)
-        if not os.path.isdir(directory):
-            os.makedirs(directory)
-        hbjson_files.append(hb_model.to_hbjson(folder=directory))
+    The heat balance is solved for every zone and surface at each timestep
+    and so the cost is estimated from these counts and the number of timesteps
+    per hour. Shades only add to the periodic shadow calculation and so they
+    are given a lower weight.
 
-    # if there is only one file, run the simulation so we can see the progress
-    if len(hbjson_files) == 1:
-        sim_folder = os.path.dirname(hbjson_files[0])
-        simulate_model_hb(
-            hbjson_files[0], epw_file, sim_par_json,
-            measures=measures, additional_idf=additional_idf,
-            report_units=report_units, viz_variable=viz_variable, folder=sim_folder
-        )
-        return
+    Args:
+        hb_model: A honeybee Model to be simulated.
+        timestep: An integer for the number of timesteps per hour. (Default: 1).
+    """
+    surface_count = len(hb_model.faces) + len(hb_model.apertures) + \
+        len(hb_model.doors)
+    zone_cost = 10 * len(hb_model.rooms) + surface_count
+    shade_cost = 0.1 * (len(hb_model.shades) + len(hb_model.shade_meshes))
+    return timestep * zone_cost + shade_cost
 
-    # execute simulations in parallel
-    cpu_count = cpu_count if cpu_count is not None else _recommended_processor_count()
-    print('Simulating {} models with {} processors.'.format(len(hbjson_files), cpu_count))
-    with ProcessPoolExecutor(max_workers=cpu_count) as executor:
-        # submit all tasks to the executor
-        futures = {
-            executor.submit(
-                    _simulate_hbjson,
-                    path,
-                    epw_file,
-                    sim_par_json,
-                    measures,
-                    additional_idf,
-                    report_units,
-                    viz_variable
-                ): path
-            for path in hbjson_files
-        }
-        # yield results as soon as each process completes
-        for future in as_completed(futures):
-            success, original_path, msg = future.result()
-            filename = os.path.basename(original_path)
-            if success:
-                suc_str = 'SUCCESS: Simulated {}'
-                print(suc_str.format(filename))
-            else:
-                print('FAILED: Could not simulate {}'.format(filename))
-                print('   Error details: {}'.format(msg.strip()))
+
+def _simulation_memory(hb_model):
+    """Estimate the peak memory in megabytes used to simulate a honeybee Model.
+
+    The estimate is a deliberately conservative one made from the memory of
+    an empty simulation along with the memory used by the zone and surface
+    arrays of EnergyPlus and the shadow calculation of each shade.
+
+    Args:
+        hb_model: A honeybee Model to be simulated.
+    """
+    surface_count = len(hb_model.faces) + len(hb_model.apertures) + \
+        len(hb_model.doors)
+    shade_count = len(hb_model.shades) + len(hb_model.shade_meshes)
+    return 250 + 1.5 * len(hb_model.rooms) + 0.1 * surface_count + 0.02 * shade_count
+
+
+def _next_batch(pending, batch_memory, used_memory, memory_budget):
+    """Get the first pending batch that fits within the remaining memory budget.
+
+    Args:
+        pending: A list of integers for the indices of the batches to be run,
+            which are in the order that they should be started.
+        batch_memory: A list of numbers for the estimated peak memory of each batch.
+        used_memory: A number for the memory used by the batches that are running.
+        memory_budget: A number for the memory that can be used by all batches.
+
+    Returns:
+        The index of the batch to be started next or None if no pending batch
+        fits within the remaining memory.
+    """
+    for b_i in pending:
+        if used_memory + batch_memory[b_i] <= memory_budget:
+            return b_i
+    return None
+
+
+def _projected_makespan(costs, cpu_count):
+    """Get the cost of the longest-running processor when the largest jobs run first.
+
+    Args:
+        costs: A list of numbers for the estimated cost of each job.
+        cpu_count: An integer for the number of processors running the jobs.
+    """
+    loads = [0] * max(min(cpu_count, len(costs)), 1)
+    for cost in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + cost)  # give the job to the idlest
+    return max(loads)
+
+
+def _batch_jobs(costs, cpu_count, batches_per_cpu=8):
+    """Group the indices of cheap jobs into batches with a similar estimated cost.
+
+    The target cost of a batch is set such that each processor receives several
+    batches, which keeps the processors balanced while amortizing the overhead
+    of each task across many cheap jobs. Jobs that cost more than the target
+    are kept in their own batch.
+
+    Args:
+        costs: A list of numbers for the estimated cost of each job.
+        cpu_count: An integer for the number of processors running the jobs.
+        batches_per_cpu: An integer for the number of batches that each
+            processor should receive. (Default: 8).
+
+    Returns:
+        A list of lists with the job indices in each batch, sorted from the
+        most expensive batch to the least expensive one.
+    """
+    target = sum(costs) / (max(cpu_count, 1) * batches_per_cpu)
+    batches, batch, batch_cost = [], [], 0
+    for i in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True):
+        if costs[i] >= target:
+            batches.append([i])
+            continue
+        batch.append(i)
+        batch_cost += costs[i]
+        if batch_cost >= target:
+            batches.append(batch)
+            batch, batch_cost = [], 0
+    if len(batch) != 0:
+        batches.append(batch)
+    batches.sort(key=lambda b: sum(costs[i] for i in b), reverse=True)
+    return batches
+
+
+_RESULT_QUEUE = None  # queue into which each worker puts the models it finishes
+
+
+def _simulation_executor(cpu_count, in_process, result_queue=None):
+    """Get a pool of worker processes to simulate batches of models.
+
+    Args:
+        cpu_count: An integer for the number of worker processes.
+        in_process: Boolean to note whether the workers simulate the models
+            in-process, in which case their standard output is discarded.
+        result_queue: Optional multiprocessing Queue into which the workers
+            put the result of each model as soon as it is simulated.
+    """
+    return ProcessPoolExecutor(
+        max_workers=cpu_count, initializer=_init_simulation_worker,
+        initargs=(result_queue, in_process))
+
+
+def _init_simulation_worker(result_queue, in_process):
+    """Initialize a persistent worker process that simulates models.
+
+    Args:
+        result_queue: Optional multiprocessing Queue into which the worker
+            puts the result of each model of a batch as soon as it is simulated.
+        in_process: Boolean to note whether the worker simulates the models
+            in-process, in which case the standard output of the worker and
+            the EnergyPlus processes that it launches is discarded in the same
+            way that it is for the subprocesses.
+    """
+    global _RESULT_QUEUE
+    _RESULT_QUEUE = result_queue
+    if in_process:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.close(devnull)
+
+
+def _simulate_hbjson_batch(hbjson_paths, *args):
+    """Simulate a batch of HBJSON files one after the other in the same process.
+
+    The result of each HBJSON is also put into the result queue of the worker
+    as soon as it is simulated such that it can be reported before the rest
+    of the batch has finished.
+
+    Returns:
+        A list with the result of _simulate_hbjson for each HBJSON with the
+        duration of the simulation in seconds and a dictionary of telemetry
+        from _simulation_telemetry added to the end.
+    """
+    results, batch_start = [], time.time()
+    for hbjson_path in hbjson_paths:
+        start_time = time.time()
+        result = _simulate_hbjson(hbjson_path, *args)
+        end_time = time.time()
+        info = _simulation_telemetry(hbjson_path, result[3], start_time, end_time)
+        info['batch_start'] = batch_start
+        result = result + (end_time - start_time, info)
+        if _RESULT_QUEUE is not None:
+            _RESULT_QUEUE.put(result)
+        results.append(result)
+    return results
+
+
+def _failed_batch_results(hbjson_paths, error, submit_time):
+    """Get the results of a batch of HBJSONs that was lost with its worker process.
+
+    This is used when the worker process simulating the batch crashed or was
+    killed (eg. when it ran out of memory) such that each model of the batch
+    can be reported as failed rather than stopping all of the simulations.
+
+    Args:
+        hbjson_paths: A list of paths to the HBJSONs of the batch.
+        error: The exception that was raised when getting the batch results.
+        submit_time: Number for the time at which the batch was submitted.
+
+    Returns:
+        A list with a failed result for each HBJSON in the same format as
+        those of _simulate_hbjson_batch.
+    """
+    duration = time.time() - submit_time
+    msg = 'The worker process simulating the model stopped unexpectedly. ' \
+        '{}: {}'.format(error.__class__.__name__, error)
+    return [
+        (False, path, msg, 'failed', duration,
+         {'start': submit_time, 'worker_pid': None, 'phases': {}, 'peak_rss_mb': None})
+        for path in hbjson_paths
+    ]
+
+
+def _report_simulation(manifest, telemetry, result, submit_time, timeout=None):
+    """Write the result of a simulated HBJSON to the manifest, telemetry and stdout.
+
+    Args:
+        manifest: A file object for the JSONL checkpoint manifest.
+        telemetry: Optional path to a JSONL telemetry file.
+        result: A tuple for the result of the HBJSON from _simulate_hbjson_batch.
+        submit_time: Number for the time at which the batch of the HBJSON
+            was submitted to the worker processes.
+        timeout: Optional number for the timeout of each simulation in seconds.
+
+    Returns:
+        Text for the status of the simulation (simulated, cached, failed, timeout).
+    """
+    success, original_path, msg, status, duration, info = result
+    outputs = _simulation_outputs(original_path) if success else []
+    _write_checkpoint_record(
+        manifest, original_path, success, duration, outputs, msg,
+        timed_out=status == 'timeout')
+    start_time = info.pop('start')
+    batch_start = info.pop('batch_start', start_time)
+    info['queue_wait'] = round(batch_start - submit_time, 3)
+    info['batch_wait'] = round(start_time - batch_start, 3)
+    info.update(command='simulate model', model=original_path,
+                status=status, duration=round(duration, 3))
+    _write_telemetry_event(telemetry, 'model', info)
+    filename = os.path.basename(original_path)
+    if success:
+        suc_str = 'SUCCESS: Restored {} from the cache' \
+            if status == 'cached' else 'SUCCESS: Simulated {}'
+        print(suc_str.format(filename))
+    elif status == 'timeout':
+        print('TIMEOUT: Stopped {} after {} seconds'.format(filename, timeout))
+    else:
+        print('FAILED: Could not simulate {}'.format(filename))
+        print('   Error details: {}'.format(msg.strip()))
+    return status
+
+
+def _simulation_telemetry(hbjson_path, status, start_time, end_time):
+    """Get a dictionary with the telemetry of a HBJSON that was simulated.
+
+    The duration of each phase of the simulation is taken from the files that
+    are written at the end of the phase. The translate phase includes the
+    loading of the HBJSON and its translation to OSM, the idf phase is the
+    translation of the OSM to IDF, the energyplus phase ends when EnergyPlus
+    finishes and the report phase includes any reporting measures.
+
+    Args:
+        hbjson_path: Path to the HBJSON that was simulated.
+        status: Text for the status of the simulation.
+        start_time: Number for the time at which the simulation started.
+        end_time: Number for the time at which the simulation ended.
+    """
+    if status == 'cached':
+        phases = {'cache': round(end_time - start_time, 3)}
+    else:
+        sim_folder = os.path.dirname(hbjson_path)
+        run_folder = os.path.join(sim_folder, 'run')
+        markers = [
+            ('translate', os.path.join(sim_folder, 'in.osm')),
+            ('idf', os.path.join(run_folder, 'in.idf')),
+            ('energyplus', os.path.join(run_folder, 'eplusout.end'))
+        ]
+        phases = _phase_durations(start_time, end_time, markers, 'report')
+    return {
+        'start': start_time,
+        'worker_pid': os.getpid(),
+        'phases': phases,
+        'peak_rss_mb': _peak_memory()
+    }
+
+
+def _write_model_telemetry(
+        telemetry_file, hbjson_path, status, start_time, end_time, submit_time):
+    """Write the telemetry event of a simulated HBJSON into a JSONL file."""
+    info = _simulation_telemetry(hbjson_path, status, start_time, end_time)
+    info['queue_wait'] = round(info.pop('start') - submit_time, 3)
+    info.update(command='simulate model', model=hbjson_path, status=status,
+                duration=round(end_time - start_time, 3))
+    _write_telemetry_event(telemetry_file, 'model', info)
+
+
+def _simulation_outputs(hbjson_path):
+    """Get a list of the EnergyPlus output files of a simulated HBJSON."""
+    run_folder = os.path.join(os.path.dirname(hbjson_path), 'run')
+    return [f for f in output_energyplus_files(run_folder) if f is not None]
 
 
 def _simulate_hbjson(
     hbjson_path, epw_file, sim_par_json, measures, additional_idf,
-    report_units, viz_variable
+    report_units, viz_variable, cache_folder=None, inputs_hash=None,
+    in_process=False, timeout=None
 ):
-    """Translate a HBJSON file in EnergyPlus."""
-    # honeybee-energy CLI command for translation
+    """Translate a HBJSON file in EnergyPlus.
+
+    Returns:
+        A tuple with a boolean for whether the simulation succeeded, the path
+        to the HBJSON, any message of the simulation and text for the status
+        of the simulation (simulated, cached, failed, timeout).
+    """
+    # restore the results from the cache if the model has not changed
     sim_folder = os.path.dirname(hbjson_path)
+    run_folder = os.path.join(sim_folder, 'run')
+    if cache_folder is not None:
+        cache_key = _simulation_cache_key(hbjson_path, inputs_hash)
+        if _restore_cached_results(cache_folder, cache_key, run_folder):
+            return True, hbjson_path, '', 'cached'
+    # simulate with the honeybee-energy that is already imported in this process
+    if in_process and timeout is None:
+        try:
+            msg = simulate_model_hb(
+                hbjson_path, epw_file, sim_par_json,
+                measures=measures, additional_idf=additional_idf,
+                report_units=report_units, viz_variable=viz_variable,
+                folder=sim_folder
+            )
+        except Exception as e:
+            return False, hbjson_path, str(e), 'failed'
+        if cache_folder is not None:
+            _cache_results(cache_folder, cache_key, run_folder)
+        return True, hbjson_path, msg, 'simulated'
+    # honeybee-energy CLI command for translation
     cmd = [
         folders.python_exe_path, '-m',
         'honeybee_energy', 'simulate', 'model',
@@ -384,14 +979,224 @@ def _simulate_hbjson(
         for var in viz_variable:
             cmd.append('--viz-variable')
             cmd.append(var)
+    # execute the CLI command
     try:
-        # execute the CLI command
-        process = subprocess.run(
-            cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
-        return True, hbjson_path, process.stdout
-    except subprocess.CalledProcessError as e:
-        return False, hbjson_path, e.stderr
+        returncode, stdout, stderr = _run_with_timeout(cmd, timeout)
+    except subprocess.TimeoutExpired:
+        msg = 'Simulation timed out after {} seconds.'.format(timeout)
+        return False, hbjson_path, msg, 'timeout'
+    if returncode != 0:
+        return False, hbjson_path, stderr, 'failed'
+    if cache_folder is not None:
+        _cache_results(cache_folder, cache_key, run_folder)
+    return True, hbjson_path, stdout, 'simulated'
+
+
+def _run_with_timeout(cmd, timeout=None):
+    """Run a command and stop it along with all of its child processes on a timeout.
+
+    The command is started in its own process group such that the EnergyPlus
+    and OpenStudio processes that it launches are also stopped.
+
+    Args:
+        cmd: A list of text for the command to be run.
+        timeout: Optional number for the maximum time in seconds that the
+            command can run. If None, there is no limit. (Default: None).
+
+    Returns:
+        A tuple with the return code, stdout and stderr of the command.
+        A subprocess.TimeoutExpired is raised if the command timed out.
+    """
+    if os.name == 'nt':
+        group_kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_kwargs = {'start_new_session': True}
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, **group_kwargs
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            if os.name == 'nt':
+                subprocess.call(
+                    ['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:  # the process finished just as it timed out
+            pass
+        process.communicate()
+        raise
+    return process.returncode, stdout, stderr
+
+
+# EnergyPlus output files that are cached for each simulated model
+CACHED_RESULT_FILES = (
+    'eplusout.sql', 'epluszsz.csv', 'eplusout.rdd', 'eplustbl.htm', 'eplusout.err'
+)
+# folder next to the run folder with the reports of OpenStudio reporting measures
+CACHED_REPORT_FOLDER = 'reports'
+
+
+def _simulation_inputs_hash(
+    epw_file, sim_par_json, measures, additional_idf, report_units, viz_variable
+):
+    """Get a hash of the simulation inputs that are shared by all models of a batch."""
+    inputs_hash = hashlib.sha256()
+    for file_path in (epw_file, sim_par_json, additional_idf):
+        inputs_hash.update(_file_hash(file_path).encode('utf-8'))
+    if measures is not None and os.path.isdir(measures):
+        for root, dirs, files in os.walk(measures):
+            dirs.sort()  # walk the sub-folders in a consistent order
+            for f_name in sorted(files):
+                m_file = os.path.join(root, f_name)
+                rel_path = os.path.relpath(m_file, measures).replace('\\', '/')
+                inputs_hash.update(rel_path.encode('utf-8'))
+                inputs_hash.update(_file_hash(m_file).encode('utf-8'))
+    settings = [
+        str(report_units).lower(), sorted(viz_variable or []),
+        str(energy_folders.energyplus_version), str(energy_folders.openstudio_version)
+    ]
+    inputs_hash.update(json.dumps(settings).encode('utf-8'))
+    return inputs_hash.hexdigest()
+
+
+def _simulation_cache_key(hbjson_path, inputs_hash):
+    """Get the key of a model's results in the cache from its HBJSON and the inputs."""
+    with open(hbjson_path, encoding='utf-8') as json_file:
+        model_hash = _hb_model_dict_hash(json.load(json_file))
+    key_str = '{}{}'.format(model_hash, inputs_hash)
+    return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+
+def _restore_cached_results(cache_folder, cache_key, run_folder):
+    """Copy the cached results of a model into its run folder.
+
+    Any cached reports of the OpenStudio reporting measures (eg. the OpenStudio
+    Results and view_data HTML reports) are copied into the reports folder
+    next to the run folder in the same way that the simulation writes them.
+
+    Returns:
+        True if the results were restored from the cache. False if the model
+        has no results in the cache.
+    """
+    cache_dir = os.path.join(cache_folder, cache_key)
+    if not os.path.isdir(cache_dir):
+        return False
+    report_folder = os.path.join(os.path.dirname(run_folder), CACHED_REPORT_FOLDER)
+    try:
+        preparedir(run_folder)
+        if os.path.isdir(report_folder):
+            nukedir(report_folder, True)  # remove the reports of any previous run
+        for f_name in os.listdir(cache_dir):
+            cache_file = os.path.join(cache_dir, f_name)
+            if f_name == CACHED_REPORT_FOLDER:
+                shutil.copytree(cache_file, report_folder)
+            else:
+                shutil.copy2(cache_file, run_folder)
+        os.utime(cache_dir, None)  # mark the results as recently used
+    except (OSError, IOError):  # results were evicted by another process
+        return False
+    return True
+
+
+def _cache_results(cache_folder, cache_key, run_folder):
+    """Copy the results of a successful simulation from a run folder to the cache.
+
+    This includes the EnergyPlus output files in CACHED_RESULT_FILES and any
+    reports of OpenStudio reporting measures in the reports folder next to
+    the run folder.
+    """
+    cache_dir = os.path.join(cache_folder, cache_key)
+    sql_file = os.path.join(run_folder, CACHED_RESULT_FILES[0])
+    if os.path.isdir(cache_dir) or not os.path.isfile(sql_file):
+        return
+    # copy the files to a temporary folder so other processes never see partial results
+    temp_dir = tempfile.mkdtemp(prefix='.{}'.format(cache_key), dir=cache_folder)
+    for f_name in CACHED_RESULT_FILES:
+        res_file = os.path.join(run_folder, f_name)
+        if os.path.isfile(res_file):
+            shutil.copy2(res_file, temp_dir)
+    report_folder = os.path.join(os.path.dirname(run_folder), CACHED_REPORT_FOLDER)
+    if os.path.isdir(report_folder):
+        shutil.copytree(report_folder, os.path.join(temp_dir, CACHED_REPORT_FOLDER))
+    try:
+        os.rename(temp_dir, cache_dir)
+    except OSError:  # another process cached the same results first
+        nukedir(temp_dir, True)
+
+
+def _evict_cached_results(cache_folder, cache_size):
+    """Delete the least recently used results until the cache is within cache_size.
+
+    Args:
+        cache_folder: The folder of cached simulation results.
+        cache_size: Maximum size of the cache folder in megabytes.
+    """
+    entries, total_size = [], 0
+    for f_name in os.listdir(cache_folder):
+        cache_dir = os.path.join(cache_folder, f_name)
+        if f_name.startswith('.') or not os.path.isdir(cache_dir):
+            continue  # results that are still being written to the cache
+        size = sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(cache_dir) for f in files)
+        entries.append((os.path.getmtime(cache_dir), size, cache_dir))
+        total_size += size
+    max_size = cache_size * 1000000
+    for _, size, cache_dir in sorted(entries):
+        if total_size <= max_size:
+            break
+        nukedir(cache_dir, True)
+        total_size -= size
+
+
+@simulate.command('summarize-telemetry')
+@click.argument(
+    'telemetry-file',
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True)
+)
+@click.option(
+    '--slowest', '-s', help='Integer for the number of the slowest models to '
+    'be listed in the summary.', type=int, default=10, show_default=True)
+@click.option(
+    '--output-file', '-f', help='Optional file to output the summary. '
+    'By default this will be printed out to stdout',
+    type=click.File('w'), default='-', show_default=True)
+def summarize_telemetry_cli(telemetry_file, slowest, output_file):
+    """Summarize the JSONL telemetry written by a batch of simulations or translations.
+
+    The summary includes the number of models of each status, the percentiles
+    of the duration, queue wait and phases of the models and the slowest models.
+
+    \b
+    Args:
+        telemetry_file: Full path to a JSONL telemetry file written by the
+            simulate model or translate hb-models-to-osm commands.
+    """
+    try:
+        summarize_telemetry(telemetry_file, slowest, output_file)
+    except Exception as e:
+        _logger.exception('Summarizing telemetry failed.\n{}'.format(e))
+        sys.exit(1)
+    else:
+        sys.exit(0)
+
+
+def summarize_telemetry(telemetry_file, slowest=10, output_file=None):
+    """Summarize the JSONL telemetry written by a batch of simulations or translations.
+
+    Args:
+        telemetry_file: Full path to a JSONL telemetry file written by the
+            simulate model or translate hb-models-to-osm commands.
+        slowest: Integer for the number of the slowest models to be listed
+            in the summary. (Default: 10).
+        output_file: Optional file to output the summary. By default this
+            string will be returned from this method.
+    """
+    summary = _summarize_telemetry(telemetry_file, slowest)
+    return process_content_to_output(summary, output_file)
 
 
 @simulate.command('urbanopt')
@@ -4,10 +4,14 @@ import sys
 import os
 import logging
 import json
+import time
+import gzip
 import tempfile
 import glob
+import hashlib
 import subprocess
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 from ladybug.commandutil import process_content_to_output
 from ladybug.epw import EPW
@@ -17,11 +21,16 @@ from honeybee_energy.simulation.parameter import SimulationParameter
 from honeybee_energy.run import HB_OS_MSG
 from honeybee_energy.writer import energyplus_idf_version
 from honeybee_energy.config import folders
+from honeybee_energy.cli.translate import model_to_osm as model_to_osm_hb
 from dragonfly.model import Model
 
 from dragonfly_energy.properties.model import ModelEnergyProperties
 from dragonfly_energy.gbxml.parameters import GBXMLParameters
-from dragonfly_energy.run import set_building_district_loads
+from dragonfly_energy.run import set_building_district_loads, \
+    _recommended_processor_count, _load_checkpoint_manifest, _completed_models, \
+    _write_checkpoint_record, _write_telemetry_event, _peak_memory, _file_hash
+from dragonfly_energy.writer import RESOURCE_LIBRARY, _merge_model_resources, \
+    _resource_id
 
 
 _logger = logging.getLogger(__name__)
@@ -1275,7 +1284,40 @@ def model_to_sdd(
               'the same as the folder containing HBJSONs.',
               default=None, show_default=True,
               type=click.Path(file_okay=False, dir_okay=True, resolve_path=True))
-def hb_models_to_osm_cli(model_folder, sim_par_json, epw_file, cpu_count, output_folder):
+@click.option('--in-process/--subprocess', ' /-sub', help='Flag to note whether '
+              'each HBJSON should be translated within the persistent worker '
+              'processes, which import honeybee-energy and OpenStudio only once and '
+              'then translate many models, or whether a new Python subprocess '
+              'should be launched to translate each HBJSON. The latter is slower '
+              'but it can be used as a fallback if the worker processes are '
+              'unstable.', default=True, show_default=True)
+@click.option('--restart/--resume', ' /-rs', help='Flag to note whether all '
+              'HBJSONs should be translated or whether a previous run of this '
+              'command should be resumed. When resuming, the osm_manifest.jsonl that '
+              'is written into the output folder as each HBJSON is translated is '
+              'used to skip the HBJSONs that were successfully translated and only '
+              'the failed or missing ones will be translated.',
+              default=True, show_default=True)
+@click.option('--telemetry', '-tl', help='Optional path to a JSONL file into '
+              'which the timing of each translated HBJSON will be written. This '
+              'includes the time spent in each phase (prepare, translate), the '
+              'time spent waiting in the queue, the worker process ID, the peak '
+              'memory and the status of each HBJSON. The file can be summarized '
+              'with the simulate summarize-telemetry command. If unspecified, no '
+              'telemetry is written.', default=None, show_default=True,
+              type=click.Path(file_okay=True, dir_okay=False, resolve_path=True))
+@click.option('--skip-unchanged/--translate-all', ' /-a', help='Flag to note '
+              'whether HBJSONs with an up-to-date OSM should be skipped or whether '
+              'all HBJSONs should be translated. An OSM is up-to-date when the '
+              'hash of the HBJSON and the other inputs of the translation matches '
+              'the one recorded in the osm_manifest.jsonl when the OSM was '
+              'translated or, if no hash was recorded, when the OSM is newer than '
+              'these inputs.',
+              default=True, show_default=True)
+def hb_models_to_osm_cli(
+    model_folder, sim_par_json, epw_file, cpu_count, output_folder, in_process,
+    restart, telemetry, skip_unchanged
+):
     """Translate a folder of HBJSONs to OSMs in the same folder.
 
     \b
@@ -1283,7 +1325,9 @@ def hb_models_to_osm_cli(model_folder, sim_par_json, epw_file, cpu_count, output
         model_folder: Path to a folder containing HBJSONs to be translated to OSM.
     """
     try:
-        hb_models_to_osm(model_folder, sim_par_json, epw_file, cpu_count, output_folder)
+        hb_models_to_osm(
+            model_folder, sim_par_json, epw_file, cpu_count, output_folder,
+            in_process, not restart, telemetry, skip_unchanged)
     except Exception as e:
         _logger.exception('Model translation failed.\n{}'.format(e))
         sys.exit(1)
@@ -1292,12 +1336,17 @@ def hb_models_to_osm_cli(model_folder, sim_par_json, epw_file, cpu_count, output
 
 
 def hb_models_to_osm(
-    model_folder, sim_par_json=None, epw_file=None, cpu_count=1, output_folder=None
+    model_folder, sim_par_json=None, epw_file=None, cpu_count=1, output_folder=None,
+    in_process=True, resume=False, telemetry=None, skip_unchanged=True
 ):
     """Translate a folder of HBJSONs to OSMs in the same folder.
 
     Args:
         model_folder: Path to a folder containing HBJSONs to be translated to OSM.
+            This can include HBJSONs that have been compressed with gzip
+            (.hbjson.gz). If the folder contains a resource_library.json, the
+            energy resources of this library will be added to each HBJSON
+            before translation.
         sim_par_json: Full path to a honeybee energy SimulationParameter JSON that
             describes all of the settings for the simulation. If None, default
             parameters will be generated.
@@ -1311,46 +1360,324 @@ def hb_models_to_osm(
         output_folder: Optional path to an output folder where the OSM files will
             be written. If unspecified, this will be the same as the folder
             containing HBJSONs.
+        in_process: Boolean to note whether each HBJSON should be translated
+            within the persistent worker processes, which import honeybee-energy
+            and OpenStudio only once and then translate many models, or whether
+            a new Python subprocess should be launched to translate each
+            HBJSON. (Default: True).
+        resume: Boolean to note whether a previous run of this command should
+            be resumed. An osm_manifest.jsonl is written into the output folder
+            with the status, duration and OSM of each HBJSON as it is translated.
+            When resuming, the HBJSONs that were successfully translated are
+            skipped and only the failed or missing ones will be translated.
+            (Default: False).
+        telemetry: Optional path to a JSONL file into which the timing of each
+            translated HBJSON will be written. This includes the time spent in
+            each phase of the translation, the time spent waiting in the queue,
+            the worker process ID, the peak memory and the status of each HBJSON.
+            Any existing file at this path is overwritten. If None, no
+            telemetry is written. (Default: None).
+        skip_unchanged: Boolean to note whether HBJSONs with an up-to-date OSM
+            should be skipped. An OSM is up-to-date when the hash of the HBJSON,
+            sim_par_json, epw_file and resource library matches the one recorded
+            in the osm_manifest.jsonl when the OSM was translated. If no hash was
+            recorded, the OSM is up-to-date when it is newer than these inputs.
+            (Default: True).
     """
     # find all .hbjson files in the target directory
     hbjson_files, out_f = [], output_folder
-    hbjson_files.extend(glob.glob(os.path.join(model_folder, '*.hbjson')))
-    hbjson_files.extend(glob.glob(os.path.join(model_folder, '*.json')))
+    for pattern in ('*.hbjson', '*.hbjson.gz', '*.json'):
+        hbjson_files.extend(sorted(glob.glob(os.path.join(model_folder, pattern))))
+    library_file = os.path.join(model_folder, RESOURCE_LIBRARY)
+    hbjson_files = [f for f in hbjson_files if f != library_file]
+    hbjson_files = _unique_model_files(hbjson_files, output_folder)
     if not hbjson_files:
         print('No HBJSON files found in: {}'.format(model_folder))
         return
+    if not os.path.isfile(library_file):
+        library_file = None
+
+    # skip any HBJSONs that were translated by a previous run
+    manifest_dir = output_folder if output_folder is not None else model_folder
+    if not os.path.isdir(manifest_dir):
+        os.makedirs(manifest_dir)
+    manifest_file = os.path.join(manifest_dir, 'osm_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    if resume:
+        completed = _completed_models(records)
+        hbjson_files = [f for f in hbjson_files if f not in completed]
+        if not hbjson_files:
+            print('All HBJSON files have already been translated to OSM.')
+            return
+    elif os.path.isfile(manifest_file):
+        os.remove(manifest_file)
+
+    # skip any HBJSONs with an OSM that is newer than the inputs or has the same hash
+    shared_files = [f for f in (sim_par_json, epw_file, library_file) if f is not None]
+    shared_hash = hashlib.sha256()
+    for file_path in shared_files:
+        shared_hash.update(_file_hash(file_path).encode('utf-8'))
+    shared_hash = shared_hash.hexdigest()
+    input_hashes, up_to_date = {}, []
+    for hbjson_path in hbjson_files:
+        osm_path = _osm_path(hbjson_path, output_folder)
+        record = records.get(hbjson_path)
+        if not skip_unchanged or not os.path.isfile(osm_path) or \
+                (record is not None and record['status'] != 'success'):
+            continue
+        if record is not None and 'input_hash' in record:  # use the recorded inputs
+            input_hashes[hbjson_path] = _translation_inputs_hash(hbjson_path, shared_hash)
+            if input_hashes[hbjson_path] == record['input_hash']:
+                up_to_date.append(hbjson_path)
+            continue
+        input_time = max(os.path.getmtime(f) for f in [hbjson_path] + shared_files)
+        if os.path.getmtime(osm_path) > input_time:  # record the hash for later runs
+            up_to_date.append(hbjson_path)
+            input_hashes[hbjson_path] = _translation_inputs_hash(hbjson_path, shared_hash)
+    if up_to_date:
+        print('Skipping {} HBJSON files with an up-to-date OSM.'.format(len(up_to_date)))
+        with open(manifest_file, 'a') as manifest:
+            for hbjson_path in up_to_date:
+                _write_checkpoint_record(
+                    manifest, hbjson_path, True, 0, [_osm_path(hbjson_path, out_f)],
+                    input_hash=input_hashes[hbjson_path])
+        up_to_date = set(up_to_date)
+        hbjson_files = [f for f in hbjson_files if f not in up_to_date]
+        if not hbjson_files:
+            return
+    for hbjson_path in hbjson_files:
+        if hbjson_path not in input_hashes:
+            input_hashes[hbjson_path] = _translation_inputs_hash(hbjson_path, shared_hash)
 
     # execute translations in parallel
     print('Translating {} HBJSON files to OSM.'.format(len(hbjson_files)))
-    with ProcessPoolExecutor(max_workers=cpu_count) as executor:
-        # submit all tasks to the executor
-        futures = {
-            executor.submit(_hbjson_to_osm, path, sim_par_json, epw_file, out_f): path
-            for path in hbjson_files
-        }
-        # yield results as soon as each process completes
-        for future in as_completed(futures):
-            success, original_path, output_path, msg = future.result()
-            filename = os.path.basename(original_path)
-            if success:
-                suc_str = 'SUCCESS: Translated {} -> {}'
-                print(suc_str.format(filename, os.path.basename(output_path)))
-            else:
-                print('FAILED: Could not translate {}'.format(filename))
-                print('   Error details: {}'.format(msg.strip()))
-
-
-def _hbjson_to_osm(hbjson_path, sim_par_json, epw_file, output_folder):
-    """Translate an HBJSON file to OSM using the Honeybee Energy CLI."""
-    # Define the output OSM file path
-    osm_path = hbjson_path.replace('.hbjson', '.osm').replace('.json', '.osm')
+    run_start = time.time()
+    _write_telemetry_event(telemetry, 'start', {
+        'command': 'hb-models-to-osm', 'models': len(hbjson_files),
+        'cpu_count': cpu_count}, 'w')
+    with open(manifest_file, 'a') as manifest:
+        while len(hbjson_files) != 0:
+            lost = []  # HBJSONs that were lost with a crashed worker process
+            with ProcessPoolExecutor(
+                    max_workers=cpu_count, initializer=_init_osm_worker,
+                    initargs=(library_file, in_process)) as executor:
+                # submit all tasks to the executor
+                futures = {
+                    executor.submit(
+                        _timed_hbjson_to_osm, path, sim_par_json, epw_file, out_f,
+                        in_process
+                    ): (path, time.time())
+                    for path in hbjson_files
+                }
+                # yield results as soon as each process completes
+                for future in as_completed(futures):
+                    path, submit_time = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        if in_process:  # translate it again in a subprocess
+                            lost.append(path)
+                            continue
+                        result = _failed_osm_result(path, e, submit_time)
+                    except Exception as e:
+                        result = _failed_osm_result(path, e, submit_time)
+                    _report_osm_translation(
+                        manifest, telemetry, result, submit_time,
+                        input_hashes[path])
+            # fall back to subprocesses for any HBJSONs lost with a worker process
+            hbjson_files, in_process = lost, False
+            if len(lost) != 0:
+                print('A worker process stopped unexpectedly. The {} remaining HBJSON '
+                      'files will be translated in subprocesses.'.format(len(lost)))
+    _write_telemetry_event(
+        telemetry, 'end', {'duration': round(time.time() - run_start, 3)})
+
+
+_RESOURCE_LIBRARY = None  # shared resources loaded once by each worker process
+
+
+def _failed_osm_result(hbjson_path, error, submit_time):
+    """Get the result of an HBJSON that was lost with its worker process.
+
+    Args:
+        hbjson_path: Path to the HBJSON that was being translated.
+        error: The exception that was raised when getting the result.
+        submit_time: Number for the time at which the HBJSON was submitted.
+
+    Returns:
+        A failed result in the same format as that of _timed_hbjson_to_osm.
+    """
+    msg = 'The worker process translating the HBJSON stopped unexpectedly. ' \
+        '{}: {}'.format(error.__class__.__name__, error)
+    info = {'start': submit_time, 'worker_pid': None, 'phases': {}, 'peak_rss_mb': None}
+    return False, hbjson_path, None, msg, time.time() - submit_time, info
+
+
+def _report_osm_translation(manifest, telemetry, result, submit_time, input_hash):
+    """Write the result of a translated HBJSON to the manifest, telemetry and stdout.
+
+    Args:
+        manifest: A file object for the JSONL checkpoint manifest.
+        telemetry: Optional path to a JSONL telemetry file.
+        result: A tuple for the result of the HBJSON from _timed_hbjson_to_osm.
+        submit_time: Number for the time at which the HBJSON was submitted
+            to the worker processes.
+        input_hash: Text for the hash of the inputs of the translation.
+    """
+    success, original_path, output_path, msg, duration, info = result
+    outputs = [output_path] if success else []
+    _write_checkpoint_record(
+        manifest, original_path, success, duration, outputs, msg or '',
+        input_hash=input_hash)
+    info['queue_wait'] = round(info.pop('start') - submit_time, 3)
+    info.update(command='hb-models-to-osm', model=original_path,
+                status='translated' if success else 'failed',
+                duration=round(duration, 3))
+    _write_telemetry_event(telemetry, 'model', info)
+    filename = os.path.basename(original_path)
+    if success:
+        suc_str = 'SUCCESS: Translated {} -> {}'
+        print(suc_str.format(filename, os.path.basename(output_path)))
+    else:
+        print('FAILED: Could not translate {}'.format(filename))
+        print('   Error details: {}'.format(msg.strip()))
+
+
+def _osm_path(hbjson_path, output_folder=None):
+    """Get the path to the OSM that is translated from an HBJSON file."""
+    osm_path = hbjson_path[:-3] if hbjson_path.endswith('.gz') else hbjson_path
+    osm_path = osm_path.replace('.hbjson', '.osm').replace('.json', '.osm')
     if output_folder is not None:
         osm_path = os.path.join(output_folder, os.path.basename(osm_path))
+    return osm_path
+
+
+def _unique_model_files(hbjson_files, output_folder=None):
+    """Remove duplicate HBJSON files and those that would overwrite the same OSM.
+
+    Files are compared using their real path such that the same file is never
+    translated twice and, when several files would be translated to the same
+    OSM, only the first one is kept.
+
+    Args:
+        hbjson_files: A list of paths to HBJSON files in order of priority.
+        output_folder: Optional path to the folder where the OSMs are written.
+    """
+    unique_files, seen_inputs, seen_osms = [], set(), {}
+    for hbjson_path in hbjson_files:
+        real_path = os.path.normcase(os.path.realpath(hbjson_path))
+        if real_path in seen_inputs:
+            continue
+        seen_inputs.add(real_path)
+        osm_path = os.path.normcase(_osm_path(hbjson_path, output_folder))
+        if osm_path in seen_osms:
+            print('Skipping {}, which would overwrite the OSM of {}.'.format(
+                os.path.basename(hbjson_path), os.path.basename(seen_osms[osm_path])))
+            continue
+        seen_osms[osm_path] = hbjson_path
+        unique_files.append(hbjson_path)
+    return unique_files
+
+
+def _translation_inputs_hash(hbjson_path, shared_hash):
+    """Get a hash of an HBJSON file and the inputs shared by all translations."""
+    inputs_hash = hashlib.sha256(_file_hash(hbjson_path).encode('utf-8'))
+    inputs_hash.update(shared_hash.encode('utf-8'))
+    return inputs_hash.hexdigest()
+
+
+def _init_osm_worker(library_file, in_process):
+    """Initialize a worker process that translates HBJSONs to OSM.
+
+    Args:
+        library_file: Optional path to a resource_library.json to be loaded once.
+        in_process: Boolean to note whether the worker translates the HBJSONs
+            in-process, in which case its standard output is discarded in the
+            same way that it is for the subprocesses.
+    """
+    _load_resource_library(library_file)
+    if in_process:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.close(devnull)
+
+
+def _load_resource_library(library_file):
+    """Load a resource library JSON of shared energy resources into a worker process."""
+    global _RESOURCE_LIBRARY
+    if library_file is None:
+        _RESOURCE_LIBRARY = None
+        return
+    with open(library_file, encoding='utf-8') as json_file:
+        data = json.load(json_file)
+    _RESOURCE_LIBRARY = {
+        key: {_resource_id(res): res for res in res_dicts}
+        for key, res_dicts in data.items()
+    }
+
+
+def _timed_hbjson_to_osm(*args):
+    """Translate an HBJSON file to OSM and add the duration in seconds to the result.
+
+    A dictionary with the start time, worker process ID, phase durations and
+    peak memory of the translation is also added to the end of the result.
+    """
+    start_time, phases = time.time(), {}
+    result = _hbjson_to_osm(*args, phases=phases)
+    end_time = time.time()
+    phases['translate'] = round(end_time - start_time - phases['prepare'], 3)
+    info = {
+        'start': start_time,
+        'worker_pid': os.getpid(),
+        'phases': phases,
+        'peak_rss_mb': _peak_memory()
+    }
+    return result + (end_time - start_time, info)
+
+
+def _hbjson_to_osm(
+    hbjson_path, sim_par_json, epw_file, output_folder, in_process=False, phases=None
+):
+    """Translate an HBJSON file to OSM using the Honeybee Energy CLI.
+
+    If a phases dictionary is input, the time in seconds spent decompressing
+    the HBJSON and adding the shared resources will be set under its
+    prepare key.
+    """
+    prepare_start = time.time()
+    # Define the output OSM file path
+    compressed = hbjson_path.endswith('.gz')
+    osm_path = _osm_path(hbjson_path, output_folder)
+    # decompress the HBJSON and add any shared resources from the library
+    model_path, temp_path = hbjson_path, None
+    if compressed or _RESOURCE_LIBRARY is not None:
+        open_func = gzip.open if compressed else open
+        with open_func(hbjson_path, 'rt', encoding='utf-8') as json_file:
+            model_dict = json.load(json_file)
+        if _RESOURCE_LIBRARY is not None:
+            _merge_model_resources(model_dict, _RESOURCE_LIBRARY)
+        t_file, temp_path = tempfile.mkstemp(suffix='.hbjson')
+        with os.fdopen(t_file, 'w', encoding='utf-8') as fp:
+            json.dump(model_dict, fp, ensure_ascii=False)
+        model_path = temp_path
+    if phases is not None:
+        phases['prepare'] = round(time.time() - prepare_start, 3)
+    # translate with the honeybee-energy that is already imported in this process
+    if in_process:
+        try:
+            msg = model_to_osm_hb(
+                model_path, sim_par_json, epw_file, osm_file=osm_path)
+            return True, hbjson_path, osm_path, msg
+        except Exception as e:
+            return False, hbjson_path, None, str(e)
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
     # honeybee-energy CLI command for translation
     cmd = [
         hb_folders.python_exe_path, '-m',
         'honeybee_energy', 'translate', 'model-to-osm',
-        hbjson_path, '--osm-file', osm_path
+        model_path, '--osm-file', osm_path
     ]
     if sim_par_json is not None:
         cmd.append('--sim-par-json')
@@ -1366,6 +1693,9 @@ def _hbjson_to_osm(hbjson_path, sim_par_json, epw_file, output_folder):
         return True, hbjson_path, osm_path, process.stdout
     except subprocess.CalledProcessError as e:
         return False, hbjson_path, None, e.stderr
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
 
 
 @translate.command('building-district-loads')
@@ -1384,7 +1714,21 @@ def _hbjson_to_osm(hbjson_path, sim_par_json, epw_file, output_folder):
     'generated simulation files if they were successfully created. '
     'By default this will be printed out to stdout',
     type=click.File('w'), default='-', show_default=True)
-def building_district_loads_cli(scenario_file, loads_to_folder, log_file):
+@click.option(
+    '--cpu-count', '-c', help='Optional integer to specify the number of '
+    'processors to be used in extracting the loads of the buildings. If '
+    'unspecified, this will be one less than the total number of processors '
+    'available on the machine.', type=int, default=None, show_default=True)
+@click.option(
+    '--parse-loads/--cache-loads', ' /-cl', help='Flag to note whether the '
+    'building_loads.csv and eplusout.sql files of each building should be parsed '
+    'every time or whether they should be stored in a binary cache file next to '
+    'the scenario run folder. With the cache, the files are only parsed again when '
+    'their size or modification time has changed, which makes repeated load '
+    'extractions from the same simulations fast.', default=True, show_default=True)
+def building_district_loads_cli(
+    scenario_file, loads_to_folder, log_file, cpu_count, parse_loads
+):
     """Set the building loads to be used for DES simulation to district chilled/hot water.
 
     \b
@@ -1393,7 +1737,11 @@ def building_district_loads_cli(scenario_file, loads_to_folder, log_file):
     """
     try:
         loads_to_log = not loads_to_folder
-        building_district_loads(scenario_file, loads_to_log, log_file)
+        cpu_count = cpu_count if cpu_count is not None \
+            else _recommended_processor_count()
+        building_district_loads(
+            scenario_file, loads_to_log, log_file, cpu_count=cpu_count,
+            use_cache=not parse_loads)
     except Exception as e:
         _logger.exception('Building district loads translation failed.\n{}'.format(e))
         sys.exit(1)
@@ -1402,7 +1750,8 @@ def building_district_loads_cli(scenario_file, loads_to_folder, log_file):
 
 
 def building_district_loads(
-    scenario_file, loads_to_log=False, log_file=None, loads_to_folder=True
+    scenario_file, loads_to_log=False, log_file=None, loads_to_folder=True,
+    cpu_count=1, use_cache=False
 ):
     """Set the building loads to be used for DES simulation to district chilled/hot water.
 
@@ -1419,9 +1768,16 @@ def building_district_loads(
         log_file: Optional log file to output the paths to the generated
             simulation files if they were successfully created. By default this
             string will be returned from this method.
+        cpu_count: Optional integer to specify the number of processors to be
+            used in extracting the loads of the buildings. (Default: 1).
+        use_cache: Boolean to note whether the parsed building_loads.csv and
+            eplusout.sql files should be stored in a binary cache file next to
+            the scenario run folder such that they are only parsed again when
+            they have changed. (Default: False).
     """
     if loads_to_log:
-        building_loads, warnings = ModelEnergyProperties.des_building_loads(scenario_file)
+        building_loads, warnings = ModelEnergyProperties.des_building_loads(
+            scenario_file, cpu_count=cpu_count, use_cache=use_cache)
         content = {'warnings': warnings, 'building_loads': {}}
         for bld_id, loads in building_loads.items():
             bldg_dict = {
@@ -1431,5 +1787,5 @@ def building_district_loads(
             }
             content['building_loads'][bld_id] = bldg_dict
     else:
-        content = set_building_district_loads(scenario_file)
+        content = set_building_district_loads(scenario_file, cpu_count, use_cache)
     return process_content_to_output(json.dumps(content, indent=4), log_file)
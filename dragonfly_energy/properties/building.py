@@ -2,7 +2,10 @@
 """Building Energy Properties."""
 import os
 import json
+import struct
+import base64
 
+from ladybug.analysisperiod import AnalysisPeriod
 from ladybug.header import Header
 from ladybug.datacollection import HourlyContinuousCollection
 from ladybug.datatype.power import Power
@@ -49,6 +52,7 @@ class BuildingEnergyProperties(object):
         * des_cooling_load
         * des_heating_load
         * des_hot_water_load
+        * des_load_encoding
         * has_des_loads
     """
     _HVAC_REGISTRY = None
@@ -67,8 +71,10 @@ class BuildingEnergyProperties(object):
         '_host', '_construction_set',
         '_ceiling_plenum_construction', '_floor_plenum_construction',
         '_heat_exchanger_ets', '_heat_pump_ets',
-        '_des_cooling_load', '_des_heating_load', '_des_hot_water_load'
+        '_des_cooling_load', '_des_heating_load', '_des_hot_water_load',
+        '_des_load_encoding', '_des_load_bundle'
     )
+    _DES_LOAD_ENCODINGS = {'float32': 'f', 'float64': 'd'}
 
     def __init__(self, host, construction_set=None):
         """Initialize Building energy properties."""
@@ -81,6 +87,8 @@ class BuildingEnergyProperties(object):
         self._des_cooling_load = None  # can be set later
         self._des_heating_load = None  # can be set later
         self._des_hot_water_load = None  # can be set later
+        self._des_load_encoding = None  # can be set later
+        self._des_load_bundle = None  # cache of loads for DES simulation files
 
     @property
     def host(self):
@@ -192,6 +200,9 @@ class BuildingEnergyProperties(object):
         Note that any data collection input here must be an HourlyContinuousCollection,
         it must be annual, and it must have a data type of Power in Watts.
         """
+        if isinstance(self._des_cooling_load, dict):  # load deferred from a dictionary
+            self._des_cooling_load = \
+                self._des_load_from_dict(self._des_cooling_load, 'DES Cooling')
         return self._des_cooling_load
 
     @des_cooling_load.setter
@@ -199,6 +210,7 @@ class BuildingEnergyProperties(object):
         if value is not None:
             value = self._check_data_coll(value, 'DES Cooling')
         self._des_cooling_load = value
+        self._des_load_bundle = None
 
     @property
     def des_heating_load(self):
@@ -207,6 +219,9 @@ class BuildingEnergyProperties(object):
         Note that any data collection input here must be an HourlyContinuousCollection,
         it must be annual, and it must have a data type of Power in Watts.
         """
+        if isinstance(self._des_heating_load, dict):  # load deferred from a dictionary
+            self._des_heating_load = \
+                self._des_load_from_dict(self._des_heating_load, 'DES Heating')
         return self._des_heating_load
 
     @des_heating_load.setter
@@ -214,6 +229,7 @@ class BuildingEnergyProperties(object):
         if value is not None:
             value = self._check_data_coll(value, 'DES Heating')
         self._des_heating_load = value
+        self._des_load_bundle = None
 
     @property
     def des_hot_water_load(self):
@@ -222,6 +238,9 @@ class BuildingEnergyProperties(object):
         Note that any data collection input here must be an HourlyContinuousCollection,
         it must be annual, and it must have a data type of Power in Watts.
         """
+        if isinstance(self._des_hot_water_load, dict):  # load deferred from a dictionary
+            self._des_hot_water_load = \
+                self._des_load_from_dict(self._des_hot_water_load, 'DES Hot Water')
         return self._des_hot_water_load
 
     @des_hot_water_load.setter
@@ -229,6 +248,31 @@ class BuildingEnergyProperties(object):
         if value is not None:
             value = self._check_data_coll(value, 'DES Hot Water')
         self._des_hot_water_load = value
+        self._des_load_bundle = None
+
+    @property
+    def des_load_encoding(self):
+        """Get or set text for how the DES loads are encoded in the dictionary.
+
+        Choose from the following options.
+
+        * None - each load is written as a ladybug data collection dictionary
+        * float32 - base64 of little-endian 32-bit floats, which loses precision
+          beyond about 7 significant digits but is the most compact
+        * float64 - base64 of little-endian 64-bit floats, which is lossless
+
+        Dictionaries of both the encoded and the plain collections can always
+        be loaded with from_dict. (Default: None).
+        """
+        return self._des_load_encoding
+
+    @des_load_encoding.setter
+    def des_load_encoding(self, value):
+        if value is not None:
+            assert value in self._DES_LOAD_ENCODINGS, 'des_load_encoding "{}" is ' \
+                'not recognized. Choose from: {}'.format(
+                    value, ', '.join(sorted(self._DES_LOAD_ENCODINGS)))
+        self._des_load_encoding = value
 
     @property
     def has_des_loads(self):
@@ -240,19 +284,20 @@ class BuildingEnergyProperties(object):
     def peak_des_cooling_load(self):
         """Get the peak cooling load of the Building if des_cooling_load is assigned.
         """
-        return max(self._des_cooling_load) if self._des_cooling_load is not None else 0
+        return max(self.des_cooling_load) if self._des_cooling_load is not None else 0
 
     @property
     def peak_des_heating_load(self):
         """Get the peak heating load of the Building if des_heating_load is assigned.
         """
-        return max(self._des_heating_load) if self._des_heating_load is not None else 0
+        return max(self.des_heating_load) if self._des_heating_load is not None else 0
 
     @property
     def peak_des_hot_water_load(self):
         """Get the peak SHW load of the Building if des_hot_water_load is assigned.
         """
-        return max(self._des_hot_water_load) if self._des_hot_water_load is not None else 0
+        return max(self.des_hot_water_load) \
+            if self._des_hot_water_load is not None else 0
 
     def averaged_program_type(self, identifier=None, timestep_resolution=1):
         """Get a ProgramType that is averaged across all of the children Room2Ds.
@@ -563,15 +608,24 @@ class BuildingEnergyProperties(object):
                 HeatExchangerETS.from_dict(data['heat_exchanger_ets'])
         if 'heat_pump_ets' in data and data['heat_pump_ets'] is not None:
             new_prop.heat_pump_ets = HeatPumpETS.from_dict(data['heat_pump_ets'])
-        if 'des_cooling_load' in data and data['des_cooling_load'] is not None:
-            new_prop.des_cooling_load = \
-                HourlyContinuousCollection.from_dict(data['des_cooling_load'])
-        if 'des_heating_load' in data and data['des_heating_load'] is not None:
-            new_prop.des_heating_load = \
-                HourlyContinuousCollection.from_dict(data['des_heating_load'])
-        if 'des_hot_water_load' in data and data['des_hot_water_load'] is not None:
-            new_prop.des_heating_load = \
-                HourlyContinuousCollection.from_dict(data['des_hot_water_load'])
+        load_dicts = (data.get('des_cooling_load'), data.get('des_heating_load'),
+                      data.get('des_hot_water_load'))
+        for load_dict in load_dicts:
+            if load_dict is not None and 'encoding' in load_dict:
+                new_prop.des_load_encoding = load_dict['encoding']
+        # the collections are only created once the loads are first requested
+        # so only the header of each load is checked now
+        load_names = ('DES Cooling', 'DES Heating', 'DES Hot Water')
+        for load_dict, load_name in zip(load_dicts, load_names):
+            if load_dict is not None:
+                BuildingEnergyProperties._check_data_coll_dict(load_dict, load_name)
+        if load_dicts[0] is not None:
+            new_prop._des_cooling_load = load_dicts[0]
+        if load_dicts[1] is not None:
+            new_prop._des_heating_load = load_dicts[1]
+        if load_dicts[2] is not None:
+            new_prop._des_hot_water_load = load_dicts[2]
+        new_prop._des_load_bundle = None
 
     def apply_properties_from_geojson_dict(self, data):
         """Apply properties from a geoJSON dictionary.
@@ -638,24 +692,30 @@ class BuildingEnergyProperties(object):
         if self._heat_pump_ets is not None:
             base['energy']['heat_pump_ets'] = self._heat_pump_ets.to_dict()
         if self._des_cooling_load is not None:
-            base['energy']['des_cooling_load'] = self._des_cooling_load.to_dict()
+            base['energy']['des_cooling_load'] = self._des_load_to_dict(
+                self._des_cooling_load, self._des_load_encoding)
         if self._des_heating_load is not None:
-            base['energy']['des_heating_load'] = self._des_heating_load.to_dict()
+            base['energy']['des_heating_load'] = self._des_load_to_dict(
+                self._des_heating_load, self._des_load_encoding)
         if self._des_hot_water_load is not None:
-            base['energy']['des_hot_water_load'] = self._des_hot_water_load.to_dict()
+            base['energy']['des_hot_water_load'] = self._des_load_to_dict(
+                self._des_hot_water_load, self._des_load_encoding)
 
         return base
 
-    def to_building_load_csv(self):
-        """Get a CSV file string of building loads for DES simulation."""
-        cool, heat, water, time_col = self._building_loads()
+    def to_building_load_csv(self, file_obj=None):
+        """Get a CSV file string of building loads for DES simulation.
+
+        Args:
+            file_obj: An optional writable file object. If specified, the CSV
+                will be streamed into this file object in chunks and None will
+                be returned instead of a string. (Default: None).
+        """
         # if the simulation timestep was not 1, convert it to 1 for CSV data
         # this enables the ThermalNetwork package to use the data
-        if cool.header.analysis_period.timestep != 1:
-            cool = cool.cull_to_timestep(1)
-            heat = heat.cull_to_timestep(1)
-            water = water.cull_to_timestep(1)
-            time_col = time_col.cull_to_timestep(1)
+        cool, heat, water, time_col = self._building_loads(hourly=True)
+        if file_obj is not None:
+            return self.write_building_load_csv(file_obj, cool, heat, water, time_col)
         return self.building_load_csv(cool, heat, water, time_col)
 
     def to_building_load_json(self):
@@ -663,9 +723,17 @@ class BuildingEnergyProperties(object):
         cool, heat, water, _ = self._building_loads()
         return self.building_load_json(cool, heat, water)
 
-    def to_building_load_mos(self):
-        """Get a MOS file string of this building's loads for DES simulation."""
+    def to_building_load_mos(self, file_obj=None):
+        """Get a MOS file string of this building's loads for DES simulation.
+
+        Args:
+            file_obj: An optional writable file object. If specified, the MOS
+                will be streamed into this file object in chunks and None will
+                be returned instead of a string. (Default: None).
+        """
         cool, heat, water, time_col = self._building_loads()
+        if file_obj is not None:
+            return self.write_building_load_mos(file_obj, cool, heat, water, time_col)
         return self.building_load_mos(cool, heat, water, time_col)
 
     def duplicate(self, new_host=None):
@@ -683,31 +751,44 @@ class BuildingEnergyProperties(object):
         new_prop._des_cooling_load = self._des_cooling_load
         new_prop._des_heating_load = self._des_heating_load
         new_prop._des_hot_water_load = self._des_hot_water_load
+        new_prop._des_load_encoding = self._des_load_encoding
         return new_prop
 
     @staticmethod
     def building_load_csv(cooling, heating, shw, time=None):
-        """Get a CSV file string of building loads for DES simulation."""
-        if time is None:  # make a collection for time in seconds
-            a_per = cooling.header.analysis_period
-            sec_step = int(3600.0 / a_per.timestep)
-            time_vals = list(range(sec_step, sec_step * (len(cooling) + 1), sec_step))
-            time = HourlyContinuousCollection(Header(Time(), 'sec', a_per), time_vals)
-        # create the file header
-        total = cooling + heating
-        header = (
-            'SecondsFromStart',
-            'TotalSensibleLoad',
-            'TotalCoolingSensibleLoad',
-            'TotalHeatingSensibleLoad',
-            'TotalWaterHeating'
-        )
-        file_lines = [','.join(header)]
-        #  write the data into the CSV
-        for s, t, c, h, hw in zip(time, total, cooling, heating, shw):
-            text_vals = [str(v) for v in (s, t, c, h, hw)]
-            file_lines.append(','.join(text_vals))
-        return '\n'.join(file_lines)
+        """Get a CSV file string of building loads for DES simulation.
+
+        Args:
+            cooling: An HourlyContinuousCollection for cooling in negative Watts.
+            heating: An HourlyContinuousCollection for heating in Watts.
+            shw: An HourlyContinuousCollection for service hot water in Watts.
+            time: An optional HourlyContinuousCollection for the timesteps in
+                seconds. If unspecified, the time will be inferred from the other
+                data collection's analysis periods. (Default: None).
+        """
+        return ''.join(BuildingEnergyProperties._building_load_csv_chunks(
+            cooling, heating, shw, time))
+
+    @staticmethod
+    def write_building_load_csv(file_obj, cooling, heating, shw, time=None):
+        """Write a CSV file of building loads for DES simulation to a file object.
+
+        The rows are formatted and written in chunks, which avoids building the
+        whole file in memory. The written text is the same as building_load_csv.
+
+        Args:
+            file_obj: A writable file object, such as the one returned from
+                open(csv_path, 'w').
+            cooling: An HourlyContinuousCollection for cooling in negative Watts.
+            heating: An HourlyContinuousCollection for heating in Watts.
+            shw: An HourlyContinuousCollection for service hot water in Watts.
+            time: An optional HourlyContinuousCollection for the timesteps in
+                seconds. If unspecified, the time will be inferred from the other
+                data collection's analysis periods. (Default: None).
+        """
+        for chunk in BuildingEnergyProperties._building_load_csv_chunks(
+                cooling, heating, shw, time):
+            file_obj.write(chunk)
 
     @staticmethod
     def building_load_json(cooling, heating, shw):
@@ -742,13 +823,52 @@ class BuildingEnergyProperties(object):
                 seconds. If unspecified, the time will be inferred from the other
                 data collection's analysis periods. (Default: None).
         """
-        if time is None:  # make a collection for time in seconds
-            a_per = cooling.header.analysis_period
-            sec_step = int(3600.0 / a_per.timestep)
-            time_vals = list(range(sec_step, sec_step * (len(cooling) + 1), sec_step))
-            time = HourlyContinuousCollection(Header(Time(), 'sec', a_per), time_vals)
-        # create the file header
-        file_lines = [
+        return ''.join(BuildingEnergyProperties._building_load_mos_chunks(
+            cooling, heating, shw, time))
+
+    @staticmethod
+    def write_building_load_mos(file_obj, cooling, heating, shw, time=None):
+        """Write a MOS file of building loads for DES simulation to a file object.
+
+        The rows are formatted and written in chunks, which avoids building the
+        whole file in memory. The written text is the same as building_load_mos.
+
+        Args:
+            file_obj: A writable file object, such as the one returned from
+                open(mos_path, 'w').
+            cooling: An HourlyContinuousCollection for cooling in negative Watts.
+            heating: An HourlyContinuousCollection for heating in Watts.
+            shw: An HourlyContinuousCollection for service hot water in Watts.
+            time: An optional HourlyContinuousCollection for the timesteps in
+                seconds. If unspecified, the time will be inferred from the other
+                data collection's analysis periods. (Default: None).
+        """
+        for chunk in BuildingEnergyProperties._building_load_mos_chunks(
+                cooling, heating, shw, time):
+            file_obj.write(chunk)
+
+    @staticmethod
+    def _building_load_csv_chunks(cooling, heating, shw, time=None):
+        """Yield the text of a building load CSV in chunks of formatted rows."""
+        time_vals = BuildingEnergyProperties._load_time_values(cooling, time)
+        total_vals = [c + h for c, h in zip(cooling.values, heating.values)]
+        header = (
+            'SecondsFromStart',
+            'TotalSensibleLoad',
+            'TotalCoolingSensibleLoad',
+            'TotalHeatingSensibleLoad',
+            'TotalWaterHeating'
+        )
+        yield ','.join(header)
+        columns = (time_vals, total_vals, cooling.values, heating.values, shw.values)
+        for chunk in BuildingEnergyProperties._load_row_chunks(columns, ','):
+            yield chunk
+
+    @staticmethod
+    def _building_load_mos_chunks(cooling, heating, shw, time=None):
+        """Yield the text of a building load MOS in chunks of formatted rows."""
+        time_vals = BuildingEnergyProperties._load_time_values(cooling, time)
+        header_lines = [
             '#1',
             '#Exported loads from Dragonfly',
             '\n',
@@ -756,17 +876,37 @@ class BuildingEnergyProperties(object):
             '#Second column: cooling loads in Watts (as negative numbers).',
             '#Third column: space heating loads in Watts',
             '#Fourth column: water heating loads in Watts',
-            '\n'
+            '\n',
+            '#Peak space cooling load = {} Watts'.format(cooling.min),
+            '#Peak space heating load = {} Watts'.format(heating.max),
+            '#Peak water heating load = {} Watts'.format(shw.max),
+            'double tab1({},4)'.format(len(time_vals))
         ]
-        file_lines.append('#Peak space cooling load = {} Watts'.format(cooling.min))
-        file_lines.append('#Peak space heating load = {} Watts'.format(heating.max))
-        file_lines.append('#Peak water heating load = {} Watts'.format(shw.max))
-        file_lines.append('double tab1({},4)'.format(len(time)))
-        # write the data into the .mos
-        for s, c, h, hw in zip(time, cooling, heating, shw):
-            text_vals = [str(v) for v in (s, c, h, hw)]
-            file_lines.append(';'.join(text_vals))
-        return '\n'.join(file_lines)
+        yield '\n'.join(header_lines)
+        columns = (time_vals, cooling.values, heating.values, shw.values)
+        for chunk in BuildingEnergyProperties._load_row_chunks(columns, ';'):
+            yield chunk
+
+    @staticmethod
+    def _load_time_values(cooling, time=None):
+        """Get a list of the timesteps in seconds for building load files."""
+        if time is not None:
+            return time.values
+        sec_step = int(3600.0 / cooling.header.analysis_period.timestep)
+        return list(range(sec_step, sec_step * (len(cooling) + 1), sec_step))
+
+    @staticmethod
+    def _load_row_chunks(columns, delimiter, chunk_size=4096):
+        """Yield text for the rows of columns of load values in chunks.
+
+        Each row starts with a new line such that the text can directly follow
+        a header. Values are written with str() like the rest of the file.
+        """
+        row_format = '\n' + delimiter.join(['{!s}'] * len(columns))
+        row_count = min(len(col) for col in columns)
+        for i in range(0, row_count, chunk_size):
+            yield ''.join(map(
+                row_format.format, *[col[i:i + chunk_size] for col in columns]))
 
     def _hvac_from_long_name(self, hvac_long_name, vintage='ASHRAE_2013'):
         """Get an HVAC class instance from it's long name (as found in a geoJSON)."""
@@ -793,53 +933,156 @@ class BuildingEnergyProperties(object):
                 hvac_id = '{} {}'.format(self.host.identifier, hvac_reg[hvac_long_name])
                 return hvac_class(hvac_id, vintage, hvac_reg[hvac_long_name])
 
-    def _building_loads(self):
-        """Get data collections for cooling, heating, and hot water."""
+    def _building_loads(self, hourly=False):
+        """Get data collections for cooling, heating, and hot water.
+
+        The collections are computed once and shared by all of the DES load
+        files of this Building until one of the DES loads is replaced or the
+        values of one of the loads are changed.
+
+        Args:
+            hourly: Boolean to note whether the collections should be culled
+                to a timestep of 1 if the loads have a finer timestep.
+        """
+        sources = (self.des_cooling_load, self.des_heating_load,
+                   self.des_hot_water_load)
+        values = tuple(s.values if s is not None else None for s in sources)
+        bundle = self._des_load_bundle
+        if bundle is None or values != bundle[3] or \
+                any(s is not b for s, b in zip(sources, bundle[0])):
+            bundle = [sources, self._compute_building_loads(), None, values]
+            self._des_load_bundle = bundle
+        if not hourly:
+            return bundle[1]
+        if bundle[2] is None:
+            loads = bundle[1]
+            if loads[0].header.analysis_period.timestep != 1:
+                loads = tuple(self._cull_to_hour(load) for load in loads)
+            bundle[2] = loads
+        return bundle[2]
+
+    def _compute_building_loads(self):
+        """Compute data collections for cooling, heating, hot water and time."""
         assert self.has_des_loads, 'Building "{}" has no building loads assigned ' \
             'to it for DES simulation.'.format(self.host.display_name)
         base_col = self._base_load_collection()
         a_per = base_col.header.analysis_period
-        def_vals = [0] * len(base_col)
-        def_col = HourlyContinuousCollection(Header(Power(), 'W', a_per), def_vals)
-        cool = self._des_cooling_load if self._des_cooling_load is not None else def_col
-        heat = self._des_heating_load if self._des_heating_load is not None else def_col
-        water = self._des_hot_water_load \
-            if self._des_hot_water_load is not None else def_col
+        cool, heat, water = self.des_cooling_load, self.des_heating_load, \
+            self.des_hot_water_load
+        if cool is None or heat is None or water is None:
+            def_vals = [0] * len(base_col)
+            def_col = HourlyContinuousCollection(Header(Power(), 'W', a_per), def_vals)
+            cool = cool if cool is not None else def_col
+            heat = heat if heat is not None else def_col
+            water = water if water is not None else def_col
         # negate cooling as DES simulation needs it that way
-        cool = cool.duplicate()
-        neg_cool_vals = []
-        for val in cool.values:
-            v = -val if val != 0 else val
-            neg_cool_vals.append(v)
-        cool.values = neg_cool_vals
+        neg_cool_vals = [-val if val != 0 else val for val in cool.values]
+        cool = HourlyContinuousCollection(cool.header.duplicate(), neg_cool_vals)
         # make a collection for time in seconds
         sec_step = int(3600.0 / a_per.timestep)
         time_vals = list(range(sec_step, sec_step * (len(base_col) + 1), sec_step))
         time_col = HourlyContinuousCollection(Header(Time(), 'sec', a_per), time_vals)
         return cool, heat, water, time_col
 
+    @staticmethod
+    def _cull_to_hour(data):
+        """Get a continuous collection with only the values that fall on the hour.
+
+        This matches data.cull_to_timestep(1) for continuous collections that
+        start at midnight but avoids computing all of the datetimes.
+        """
+        a_per = data.header.analysis_period
+        new_a_per = AnalysisPeriod(
+            a_per.st_month, a_per.st_day, a_per.st_hour, a_per.end_month,
+            a_per.end_day, a_per.end_hour, 1, a_per.is_leap_year)
+        new_header = Header(data.header.data_type, data.header.unit, new_a_per,
+                            dict(data.header.metadata))
+        return HourlyContinuousCollection(new_header, data.values[::a_per.timestep])
+
     def _base_load_collection(self):
         """Get a data collection to serve as the basis for writing DES loads."""
         if self._des_cooling_load is not None:
-            return self._des_cooling_load
-        if self._des_heating_load is not None:
-            return self._des_heating_load
+            return self.des_cooling_load
         if self._des_heating_load is not None:
-            return self._des_hot_water_load
+            return self.des_heating_load
+        if self._des_hot_water_load is not None:
+            return self.des_hot_water_load
+
+    @staticmethod
+    def _des_load_to_dict(data, encoding=None):
+        """Get a dictionary of a DES load with its values optionally encoded.
+
+        Encoded dictionaries have the header of the data collection along with
+        an "encoding" key and an "encoded_values" key, which holds the base64
+        text of the values packed as little-endian floats.
+        """
+        if isinstance(data, dict):  # load that was never requested from a dictionary
+            if data.get('encoding') == encoding:
+                return dict(data)
+            data = BuildingEnergyProperties._des_load_from_dict(data)
+        if encoding is None:
+            return data.to_dict()
+        values = data.values
+        fmt = BuildingEnergyProperties._DES_LOAD_ENCODINGS[encoding]
+        packed = struct.pack('<{}{}'.format(len(values), fmt), *values)
+        return {
+            'header': data.header.to_dict(),
+            'encoding': encoding,
+            'encoded_values': base64.b64encode(packed).decode('ascii'),
+            'type': 'HourlyContinuous'
+        }
+
+    @staticmethod
+    def _des_load_from_dict(data, name=None):
+        """Get a DES load data collection from a plain or encoded dictionary.
+
+        Args:
+            data: A dictionary of a DES load, either with plain or encoded values.
+            name: Optional text for the name of the load. If specified, the data
+                type and units of the collection will also be checked.
+        """
+        if 'encoded_values' not in data:
+            load = HourlyContinuousCollection.from_dict(data)
+        else:
+            fmt = BuildingEnergyProperties._DES_LOAD_ENCODINGS[data['encoding']]
+            packed = base64.b64decode(data['encoded_values'])
+            count = len(packed) // struct.calcsize(fmt)
+            values = struct.unpack('<{}{}'.format(count, fmt), packed)
+            load = HourlyContinuousCollection(Header.from_dict(data['header']), values)
+        if name is not None:
+            load = BuildingEnergyProperties._check_data_coll(load, name)
+        return load
 
     @staticmethod
     def _check_data_coll(value, name):
         """Check the data type and units of a Data Collection."""
         assert isinstance(value, HourlyContinuousCollection), 'Expected ' \
             'HourlyContinuousCollection for {}. Got {}'.format(name, type(value))
-        assert value.header.analysis_period.is_annual, '{} data analysis period ' \
-            'is not annual. {}'.format(name, value.header.analysis_period)
-        assert isinstance(value.header.data_type, Power), '{} must be Power in W. ' \
-            'Got {} in {}'.format(name, value.header.data_type.name, value.header.unit)
+        BuildingEnergyProperties._check_data_coll_header(value.header, name)
         if value.header.unit != 'W':
             value = value.to_unit('W')
         return value
 
+    @staticmethod
+    def _check_data_coll_dict(data, name):
+        """Check the data type and units of a Data Collection dictionary.
+
+        Only the header of the dictionary is loaded such that the values of
+        the collection can still be loaded once they are requested.
+        """
+        assert data.get('type') == 'HourlyContinuous', 'Expected ' \
+            'HourlyContinuousCollection for {}. Got {}'.format(name, data.get('type'))
+        header = Header.from_dict(data['header'])
+        BuildingEnergyProperties._check_data_coll_header(header, name)
+
+    @staticmethod
+    def _check_data_coll_header(header, name):
+        """Check that the header of a Data Collection is annual and in Power."""
+        assert header.analysis_period.is_annual, '{} data analysis period ' \
+            'is not annual. {}'.format(name, header.analysis_period)
+        assert isinstance(header.data_type, Power), '{} must be Power in W. ' \
+            'Got {} in {}'.format(name, header.data_type.name, header.unit)
+
     def ToString(self):
         return self.__repr__()
 
@@ -2,6 +2,9 @@
 """Model Energy Properties."""
 import os
 import json
+import struct
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
 try:
     from itertools import izip as zip  # python 2
 except ImportError:
@@ -64,6 +67,11 @@ class ModelEnergyProperties(object):
         '020014': 'check_all_zones_have_one_hvac',
         '020101': 'check_maximum_elevation'
     }
+    _DISTRICT_OUTPUTS = (
+        'District Cooling Water Rate',
+        'District Heating Water Rate',
+        'Water Heater DistrictHeatingWater Rate'
+    )
 
     def __init__(self, host):
         """Initialize Model energy properties."""
@@ -82,20 +90,7 @@ class ModelEnergyProperties(object):
         ConstructionSets but it does NOT include the Honeybee generic default
         construction set.
         """
-        materials = []
-        for constr in self.constructions:
-            try:
-                materials.extend(constr.materials)
-                if constr.has_frame:
-                    materials.append(constr.frame)
-                if isinstance(constr, WindowConstructionShade):
-                    if constr.is_switchable_glazing:
-                        materials.append(constr.switched_glass_material)
-                    if constr.shade_location == 'Between':
-                        materials.append(constr.window_construction.materials[-2])
-            except AttributeError:
-                pass  # ShadeConstruction
-        return list(set(materials))
+        return list(set(self._resources(schedules=False)['materials']))
 
     @property
     def constructions(self):
@@ -105,11 +100,7 @@ class ModelEnergyProperties(object):
         ConstructionSets but it does NOT include the Honeybee generic default
         construction set.
         """
-        bldg_constrs = []
-        for cnstr_set in self.construction_sets:
-            bldg_constrs.extend(cnstr_set.modified_constructions_unique)
-        all_constrs = bldg_constrs + self.face_constructions + self.shade_constructions
-        return list(set(all_constrs))
+        return list(self._resources(schedules=False)['constructions'])
 
     @property
     def face_constructions(self):
@@ -118,23 +109,7 @@ class ModelEnergyProperties(object):
         These objects only exist under the Building.room_3ds property and in
         the Building's ceiling_plenum_construction and floor_plenum_construction.
         """
-        constructions = []
-        for bldg in self.host.buildings:
-            for face in bldg.room_3d_faces:
-                self._check_and_add_obj_construction(face, constructions)
-                for ap in face.apertures:
-                    self._check_and_add_obj_construction(ap, constructions)
-                for dr in face.doors:
-                    self._check_and_add_obj_construction(dr, constructions)
-            constr = bldg.properties.energy._ceiling_plenum_construction
-            if constr is not None:
-                if not self._instance_in_array(constr, constructions):
-                    constructions.append(constr)
-            constr = bldg.properties.energy._floor_plenum_construction
-            if constr is not None:
-                if not self._instance_in_array(constr, constructions):
-                    constructions.append(constr)
-        return list(set(constructions))
+        return list(set(self._resources(False, False)['face_constructions']))
 
     @property
     def shade_constructions(self):
@@ -143,13 +118,7 @@ class ModelEnergyProperties(object):
         This will also include any Shade objects assigned to the 3D Honeybee Rooms
         of any Model Buildings.
         """
-        constructions = []
-        for shade in self.host.context_shades:
-            self._check_and_add_obj_construction(shade, constructions)
-        for bldg in self.host.buildings:
-            for shd in bldg.room_3d_shades:
-                self._check_and_add_obj_construction(shd, constructions)
-        return list(set(constructions))
+        return list(set(self._resources(False, False)['shade_constructions']))
 
     @property
     def construction_sets(self):
@@ -158,16 +127,8 @@ class ModelEnergyProperties(object):
         Note that this includes ConstructionSets assigned to individual Stories,
         Room2Ds and 3D Honeybee Rooms in the Model's Buildings.
         """
-        construction_sets = []
-        for bldg in self.host.buildings:
-            self._check_and_add_obj_constr_set(bldg, construction_sets)
-            for story in bldg.unique_stories:
-                self._check_and_add_obj_constr_set(story, construction_sets)
-                for room in story.room_2ds:
-                    self._check_and_add_obj_constr_set(room, construction_sets)
-            for room in bldg.room_3ds:
-                self._check_and_add_obj_constr_set(room, construction_sets)
-        return list(set(construction_sets))  # catch equivalent construction sets
+        # catch equivalent construction sets
+        return list(set(self._resources(False, False)['construction_sets']))
 
     @property
     def global_construction_set(self):
@@ -184,12 +145,7 @@ class ModelEnergyProperties(object):
 
         This includes schedules across all ContextShades and Room2Ds.
         """
-        type_limits = []
-        for sched in self.schedules:
-            t_lim = sched.schedule_type_limit
-            if t_lim is not None and not self._instance_in_array(t_lim, type_limits):
-                type_limits.append(t_lim)
-        return list(set(type_limits))
+        return list(set(self._resources()['schedule_type_limits']))
 
     @property
     def schedules(self):
@@ -197,9 +153,7 @@ class ModelEnergyProperties(object):
 
         This includes schedules across all ProgramTypes and ContextShades.
         """
-        all_scheds = self.hvac_schedules + self.program_type_schedules + \
-            self.misc_room_schedules + self.shade_schedules + self.construction_schedules
-        return list(set(all_scheds))
+        return list(self._resources()['schedules'])
 
     @property
     def construction_schedules(self):
@@ -208,43 +162,23 @@ class ModelEnergyProperties(object):
         This includes schedules on al AirBoundaryConstructions, WindowConstructionShade,
         and WindowConstructionDynamic.
         """
-        schedules = []
-        for constr in self.constructions:
-            if isinstance(constr, AirBoundaryConstruction):
-                self._check_and_add_schedule(constr.air_mixing_schedule, schedules)
-            elif isinstance(constr, WindowConstructionShade):
-                if constr.schedule is not None:
-                    self._check_and_add_schedule(constr.schedule, schedules)
-            elif isinstance(constr, WindowConstructionDynamic):
-                self._check_and_add_schedule(constr.schedule, schedules)
-        return list(set(schedules))
+        return list(set(self._resources(schedules=False)['construction_schedules']))
 
     @property
     def shade_schedules(self):
         """Get a list of all unique schedules assigned to ContextShades in the model.
         """
-        schedules = []
-        for shade in self.host._context_shades:
-            self._check_and_add_shade_schedule(shade, schedules)
-        return list(set(schedules))
+        return list(set(self._resources(False, False)['shade_schedules']))
 
     @property
     def program_type_schedules(self):
         """A list of all unique schedules assigned to ProgramTypes in the model."""
-        schedules = []
-        for p_type in self.program_types:
-            for sched in p_type.schedules:
-                self._check_and_add_schedule(sched, schedules)
-        return list(set(schedules))
+        return list(set(self._resources()['program_type_schedules']))
 
     @property
     def hvac_schedules(self):
         """Get a list of all unique HVAC-assigned schedules in the model."""
-        schedules = []
-        for hvac in self.hvacs:
-            for sched in hvac.schedules:
-                self._check_and_add_schedule(sched, schedules)
-        return list(set(schedules))
+        return list(set(self._resources()['hvac_schedules']))
 
     @property
     def misc_room_schedules(self):
@@ -257,65 +191,7 @@ class ModelEnergyProperties(object):
         Note that this does not include schedules from ProgramTypes assigned to the
         rooms. For this, use the program_type_schedules property.
         """
-        scheds = []
-        for bldg in self.host._buildings:
-            for story in bldg:
-                for room in story:
-                    window_vent = room.properties.energy._window_vent_control
-                    fans = room.properties.energy._fans
-                    processes = room.properties.energy._process_loads
-                    if window_vent is not None:
-                        self._check_and_add_schedule(window_vent.schedule, scheds)
-                    if len(fans) != 0:
-                        for fan in fans:
-                            self._check_and_add_schedule(fan.control.schedule, scheds)
-                    if len(processes) != 0:
-                        for process in processes:
-                            self._check_and_add_schedule(process.schedule, scheds)
-            for room in bldg.room_3ds:
-                people = room.properties.energy._people
-                lighting = room.properties.energy._lighting
-                electric_equipment = room.properties.energy._electric_equipment
-                gas_equipment = room.properties.energy._gas_equipment
-                shw = room.properties.energy._service_hot_water
-                infiltration = room.properties.energy._infiltration
-                ventilation = room.properties.energy._ventilation
-                setpoint = room.properties.energy._setpoint
-                window_vent = room.properties.energy._window_vent_control
-                processes = room.properties.energy._process_loads
-                fans = room.properties.energy._fans
-                if people is not None:
-                    self._check_and_add_schedule(people.occupancy_schedule, scheds)
-                    self._check_and_add_schedule(people.activity_schedule, scheds)
-                if lighting is not None:
-                    self._check_and_add_schedule(lighting.schedule, scheds)
-                if electric_equipment is not None:
-                    self._check_and_add_schedule(electric_equipment.schedule, scheds)
-                if gas_equipment is not None:
-                    self._check_and_add_schedule(gas_equipment.schedule, scheds)
-                if shw is not None:
-                    self._check_and_add_schedule(shw.schedule, scheds)
-                if infiltration is not None:
-                    self._check_and_add_schedule(infiltration.schedule, scheds)
-                if ventilation is not None and ventilation.schedule is not None:
-                    self._check_and_add_schedule(ventilation.schedule, scheds)
-                if setpoint is not None:
-                    self._check_and_add_schedule(setpoint.heating_schedule, scheds)
-                    self._check_and_add_schedule(setpoint.cooling_schedule, scheds)
-                    if setpoint.humidifying_schedule is not None:
-                        self._check_and_add_schedule(
-                            setpoint.humidifying_schedule, scheds)
-                        self._check_and_add_schedule(
-                            setpoint.dehumidifying_schedule, scheds)
-                if window_vent is not None:
-                    self._check_and_add_schedule(window_vent.schedule, scheds)
-                if len(processes) != 0:
-                    for process in processes:
-                        self._check_and_add_schedule(process.schedule, scheds)
-                if len(fans) != 0:
-                    for fan in fans:
-                        self._check_and_add_schedule(fan.control.schedule, scheds)
-        return list(set(scheds))
+        return list(set(self._resources(False, False)['misc_room_schedules']))
 
     @property
     def program_types(self):
@@ -323,54 +199,18 @@ class ModelEnergyProperties(object):
 
         This includes ProgramTypes assigned to both Room2Ds and 3D Honeybee Rooms.
         """
-        program_types = []
-        for bldg in self.host._buildings:
-            for story in bldg:
-                for room in story:
-                    if room.properties.energy._program_type is not None:
-                        if not self._instance_in_array(
-                                room.properties.energy._program_type, program_types):
-                            program_types.append(room.properties.energy._program_type)
-            for room in bldg.room_3ds:
-                if room.properties.energy._program_type is not None:
-                    if not self._instance_in_array(
-                            room.properties.energy._program_type, program_types):
-                        program_types.append(room.properties.energy._program_type)
-        return list(set(program_types))  # catch equivalent program types
+        # catch equivalent program types
+        return list(set(self._resources(False, False)['program_types']))
 
     @property
     def hvacs(self):
         """Get a list of all unique HVAC systems in the Model."""
-        hvacs = []
-        for bldg in self.host._buildings:
-            for story in bldg:
-                for room in story:
-                    if room.properties.energy._hvac is not None:
-                        if not self._instance_in_array(
-                                room.properties.energy._hvac, hvacs):
-                            hvacs.append(room.properties.energy._hvac)
-            for room in bldg.room_3ds:
-                if room.properties.energy._hvac is not None:
-                    if not self._instance_in_array(room.properties.energy._hvac, hvacs):
-                        hvacs.append(room.properties.energy._hvac)
-        return hvacs
+        return self._resources(False, False)['hvacs']
 
     @property
     def shws(self):
         """Get a list of all unique Service Hot Water (SHW) systems in the Model."""
-        shws = []
-        for bldg in self.host._buildings:
-            for story in bldg:
-                for room in story:
-                    if room.properties.energy._shw is not None:
-                        if not self._instance_in_array(
-                                room.properties.energy._shw, shws):
-                            shws.append(room.properties.energy._shw)
-            for room in bldg.room_3ds:
-                if room.properties.energy._shw is not None:
-                    if not self._instance_in_array(room.properties.energy._shw, shws):
-                        shws.append(room.properties.energy._shw)
-        return shws
+        return self._resources(False, False)['shws']
 
     def check_for_extension(self, raise_exception=True, detailed=False):
         """Check that the Model is valid for EnergyPlus simulation.
@@ -806,7 +646,7 @@ class ModelEnergyProperties(object):
         for room in self.host.room_2ds:
             room.properties.energy.set_areas_by_unit_system(units)
 
-    def bind_des_loads_to_buildings(self, scenario_csv):
+    def bind_des_loads_to_buildings(self, scenario_csv, cpu_count=1, use_cache=False):
         """Assign the des loads to the Buildings of this model from a scenario_csv.
 
         This is useful in workflows where embedding building loads within the
@@ -816,12 +656,21 @@ class ModelEnergyProperties(object):
 
         Args:
             scenario_csv: The full path to a .csv file for the URBANopt scenario.
+            cpu_count: An integer for the number of processors to be used to
+                extract the loads of the buildings in parallel. (Default: 1).
+            use_cache: Boolean to note whether the parsed building_loads.csv and
+                eplusout.sql files should be stored in a binary cache file next
+                to the scenario run folder. The files are then only parsed again
+                when their size or modification time has changed, which makes
+                repeated load extractions from the same simulations fast. (Default:
+                False).
 
         Returns:
             A list of text strings for warnings about buildings where no district
                 chilled/hot water was found.
         """
-        building_loads, warnings = self.des_building_loads(scenario_csv)
+        building_loads, warnings = self.des_building_loads(
+            scenario_csv, cpu_count=cpu_count, use_cache=use_cache)
         for building in self.host.buildings:
             try:
                 bldg_dict = building_loads[building.identifier]
@@ -833,7 +682,8 @@ class ModelEnergyProperties(object):
         return warnings
 
     @staticmethod
-    def des_building_loads(scenario_csv, exclude_pre_assigned=False):
+    def des_building_loads(scenario_csv, exclude_pre_assigned=False, cpu_count=1,
+                           use_cache=False):
         """Get HourlyContinuousDataCollections of building loads from a scenario_csv.
 
         Args:
@@ -841,6 +691,15 @@ class ModelEnergyProperties(object):
             exclude_pre_assigned: Boolean for whether building loads that originated
                 from pre-assigned loads attached to the dragonfly Building should
                 be excluded from the result. (Default: False).
+            cpu_count: An integer for the number of processors to be used to
+                extract the loads of the buildings in parallel. (Default: 1).
+            use_cache: Boolean to note whether the parsed building_loads.csv and
+                eplusout.sql files should be stored in a binary cache file next
+                to the scenario run folder. The files are then only parsed again
+                when their size or modification time has changed, which makes
+                repeated load extractions from the same simulations fast. If the
+                cache file cannot be written (eg. the folder is read-only), the
+                loads are still returned without caching them. (Default: False).
 
         Returns:
             A tuple with two items.
@@ -853,8 +712,8 @@ class ModelEnergyProperties(object):
             warnings -- A list of text strings for warnings about buildings where
                 no district chilled/hot water was found.
         """
-        try:  # import the SQLite module
-            from ladybug.sql import SQLiteResult
+        try:  # check that the SQLite module can be imported
+            import ladybug.sql  # noqa: F401
         except ImportError as e:
             msg = 'Failed to import Ladybug SQLite module. This is required for ' \
                 'loading energy simulation results.\n{}'.format(e)
@@ -875,79 +734,413 @@ class ModelEnergyProperties(object):
             end_month=run_per.end_date.month, end_day=run_per.end_date.day,
             timestep=sim_par.timestep)
 
-        # for each building in the simulation, replace sensible loads with district loads
+        # find the source files with the loads of each building in the simulation
         scn_name = os.path.basename(scenario_csv).replace('.csv', '')
         scn_dir = os.path.join(directory, 'run', scn_name)
-        building_loads, warnings = {}, []
-        for bldg_name in os.listdir(scn_dir):
-            # gather all of the files that are for results to parse and replace
-            bldg_dir = os.path.join(scn_dir, bldg_name)
-            sql_file = os.path.join(bldg_dir, 'eplusout.sql')
-            if not os.path.isfile(sql_file):
+        bldg_names = os.listdir(scn_dir)
+        bldg_files = [
+            ModelEnergyProperties._des_building_files(
+                os.path.join(scn_dir, bldg_name), exclude_pre_assigned)
+            for bldg_name in bldg_names
+        ]
+
+        # serve the source files from the cache if they have not changed
+        cache_file = os.path.join(directory, 'run', '{}_des_loads.cache'.format(scn_name))
+        cache = ModelEnergyProperties._read_des_load_cache(cache_file) \
+            if use_cache else {}
+        stamps, sources, to_read, hour_count = {}, {}, [], len(a_per)
+        for files in bldg_files:
+            if files is None:
                 continue  # not a directory with building loads
-            modelica_load_dir = None
-            for f_name in os.listdir(bldg_dir):
-                if f_name.endswith('_export_modelica_loads'):
-                    if exclude_pre_assigned and f_name == '100_export_modelica_loads':
-                        continue  # hard-specified loads that do not need to be rewritten
-                    modelica_load_dir = os.path.join(bldg_dir, f_name)
-                    break
-            if not modelica_load_dir:
-                continue
-            bldg_csv = os.path.join(modelica_load_dir, 'building_loads.csv')
-
-            # create base data collections from the CSV data
-            cooling_vals, heating_vals, shw_vals = [], [], []
-            with open(bldg_csv, 'r') as f:
-                next(f)  # skip the first line
-                for line in f:
-                    row = line.strip().split(',')
-                    shw_vals.append(float(row[-1]))
-                    heating_vals.append(float(row[-2]))
-                    cooling_vals.append(float(row[-3]))
-            header = Header(Power(), 'W', a_per)
+            for src in files:
+                src_stat = os.stat(src)
+                stamps[src] = [src_stat.st_size, src_stat.st_mtime]
+                entry = cache.get(os.path.relpath(src, scn_dir))
+                if entry is not None and entry[0] == stamps[src]:
+                    sources[src] = entry[1]
+            bldg_csv, sql_file = files
+            if bldg_csv in sources and (sql_file in sources or
+                                        len(sources[bldg_csv][0]) != hour_count):
+                continue  # nothing to read or the loads have already been processed
+            to_read.append((None if bldg_csv in sources else bldg_csv,
+                            None if sql_file in sources else sql_file))
+
+        # read all of the source files that were not found in the cache
+        if cpu_count is not None and cpu_count > 1 and len(to_read) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            workers = min(cpu_count, len(to_read))
+            chunk = max(1, len(to_read) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    ModelEnergyProperties._read_des_building_files,
+                    [files[0] for files in to_read], [files[1] for files in to_read],
+                    [hour_count] * len(to_read), chunksize=chunk))
+        else:
+            results = [
+                ModelEnergyProperties._read_des_building_files(
+                    bldg_csv, sql_file, hour_count)
+                for bldg_csv, sql_file in to_read
+            ]
+        for files, result in zip(to_read, results):
+            for src, data in zip(files, result):
+                if src is not None and data is not None:
+                    sources[src] = data
+        if use_cache and len(to_read) != 0:
+            entries = {os.path.relpath(src, scn_dir): (stamps[src], data)
+                       for src, data in sources.items()}
+            for key, entry in cache.items():  # keep entries for other source files
+                if key not in entries and os.path.isfile(os.path.join(scn_dir, key)):
+                    entries[key] = entry
             try:
-                cooling = HourlyContinuousCollection(header, cooling_vals)
-                heating = HourlyContinuousCollection(header, heating_vals)
-                shw = HourlyContinuousCollection(header, shw_vals)
-            except AssertionError:  # the loads have already been processed
-                continue
+                ModelEnergyProperties._write_des_load_cache(cache_file, entries)
+            except (IOError, OSError):
+                pass  # the run folder is not writable; simply skip the cache
 
-            # see if there are district heating/cooling values to use instead
-            sql_obj = SQLiteResult(sql_file)
-            cooling_output = 'District Cooling Water Rate'
-            heating_output = 'District Heating Water Rate'
-            shw_output = 'Water Heater DistrictHeatingWater Rate'
-            d_cooling = sql_obj.data_collections_by_output_name(cooling_output)
-            d_heating = sql_obj.data_collections_by_output_name(heating_output)
-            d_shw = sql_obj.data_collections_by_output_name(shw_output)
-
-            # give warnings for all cases where no district loads were found
-            msg_template = 'No District {} Water was found for building "{}".\nZone ' \
-                'sensible {} loads will be used instead but this excludes the loads ' \
-                'of outdoor ventilation air.\nFor best DES simulation results, ' \
-                'assign a building HVAC that uses district {} water.'
-            if len(d_cooling) == 0:
-                warnings.append(msg_template.format('Cooling', bldg_name, 'cooling', 'chilled'))
-            else:
-                cooling = -d_cooling[0] if len(d_cooling) == 1 else -sum(d_cooling)
-            if len(d_heating) == 0:
-                warnings.append(msg_template.format('Heating', bldg_name, 'heating', 'hot'))
-            else:
-                heating = d_heating[0] if len(d_heating) == 1 else sum(d_heating)
-            if len(d_shw) != 0:
-                shw = d_shw[0] if len(d_shw) == 1 else sum(d_shw)
-
-            # put everything into the building load dictionary
-            bldg_dict = {
-                'cooling': cooling,
-                'heating': heating,
-                'shw': shw
-            }
-            building_loads[bldg_name] = bldg_dict
+        # collect the results in the order that the buildings were found
+        building_loads, warnings = {}, []
+        for bldg_name, files in zip(bldg_names, bldg_files):
+            if files is None or files[0] not in sources or files[1] not in sources:
+                continue
+            bldg_dict, bldg_warnings = ModelEnergyProperties._des_building_load(
+                bldg_name, a_per, sources[files[0]], sources[files[1]])
+            warnings.extend(bldg_warnings)
+            if bldg_dict is not None:
+                building_loads[bldg_name] = bldg_dict
 
         return building_loads, warnings
 
+    @staticmethod
+    def _des_building_files(bldg_dir, exclude_pre_assigned=False):
+        """Get the source files with the DES loads of a building in a URBANopt run.
+
+        Args:
+            bldg_dir: The full path to the folder of the building within the
+                run folder of the URBANopt scenario.
+            exclude_pre_assigned: Boolean for whether building loads that originated
+                from pre-assigned loads should be excluded. (Default: False).
+
+        Returns:
+            A tuple with the paths to the building_loads.csv and the eplusout.sql
+            of the building. Will be None if the folder has no loads.
+        """
+        sql_file = os.path.join(bldg_dir, 'eplusout.sql')
+        if not os.path.isfile(sql_file):
+            return None  # not a directory with building loads
+        for f_name in os.listdir(bldg_dir):
+            if f_name.endswith('_export_modelica_loads'):
+                if exclude_pre_assigned and f_name == '100_export_modelica_loads':
+                    continue  # hard-specified loads that do not need to be rewritten
+                bldg_csv = os.path.join(bldg_dir, f_name, 'building_loads.csv')
+                return bldg_csv, sql_file
+        return None
+
+    @staticmethod
+    def _read_des_building_files(bldg_csv, sql_file, hour_count):
+        """Read the building_loads.csv and eplusout.sql of a building.
+
+        Args:
+            bldg_csv: The full path to the building_loads.csv of the building.
+                None if the CSV does not need to be read.
+            sql_file: The full path to the eplusout.sql of the building.
+                None if the SQL does not need to be read.
+            hour_count: The number of values expected in the CSV for the run
+                period of the simulation. If the CSV has a different number of
+                values, the loads have already been processed and the SQL is
+                not read.
+
+        Returns:
+            A tuple with the cooling, heating and shw values of the CSV and a
+            dictionary of district load data collections from the SQL. Either
+            item will be None if the file was not read.
+        """
+        from ladybug.sql import SQLiteResult
+
+        csv_values, d_colls = None, None
+        if bldg_csv is not None:
+            csv_values = ModelEnergyProperties._read_building_loads_csv(bldg_csv)
+            if len(csv_values[0]) != hour_count:
+                return csv_values, d_colls  # the loads have already been processed
+        if sql_file is not None:
+            d_colls = ModelEnergyProperties._sql_data_collections(
+                sql_file, ModelEnergyProperties._DISTRICT_OUTPUTS)
+            if d_colls is None:  # results that need the full SQLiteResult parser
+                sql_obj = SQLiteResult(sql_file)
+                d_colls = {out: sql_obj.data_collections_by_output_name(out)
+                           for out in ModelEnergyProperties._DISTRICT_OUTPUTS}
+        return csv_values, d_colls
+
+    @staticmethod
+    def _des_building_load(bldg_name, a_per, csv_values, d_colls):
+        """Get the DES loads of a single building from its parsed source files.
+
+        Args:
+            bldg_name: The name of the building, used in warnings.
+            a_per: An AnalysisPeriod for the run period of the simulation.
+            csv_values: A tuple with the cooling, heating and shw values of the
+                building_loads.csv of the building.
+            d_colls: A dictionary with the district load data collections of
+                the eplusout.sql of the building.
+
+        Returns:
+            A tuple with a dictionary of the cooling, heating and shw loads
+            (or None if the loads have already been processed) and a list of warnings.
+        """
+        # create base data collections from the CSV data
+        header = Header(Power(), 'W', a_per)
+        try:
+            cooling = HourlyContinuousCollection(header, csv_values[0])
+            heating = HourlyContinuousCollection(header, csv_values[1])
+            shw = HourlyContinuousCollection(header, csv_values[2])
+        except AssertionError:  # the loads have already been processed
+            return None, []
+
+        # see if there are district heating/cooling values to use instead
+        d_cooling, d_heating, d_shw = \
+            (d_colls[out] for out in ModelEnergyProperties._DISTRICT_OUTPUTS)
+
+        # give warnings for all cases where no district loads were found
+        warnings = []
+        msg_template = 'No District {} Water was found for building "{}".\nZone ' \
+            'sensible {} loads will be used instead but this excludes the loads ' \
+            'of outdoor ventilation air.\nFor best DES simulation results, ' \
+            'assign a building HVAC that uses district {} water.'
+        if len(d_cooling) == 0:
+            warnings.append(msg_template.format('Cooling', bldg_name, 'cooling', 'chilled'))
+        else:
+            cooling = -d_cooling[0] if len(d_cooling) == 1 else -sum(d_cooling)
+        if len(d_heating) == 0:
+            warnings.append(msg_template.format('Heating', bldg_name, 'heating', 'hot'))
+        else:
+            heating = d_heating[0] if len(d_heating) == 1 else sum(d_heating)
+        if len(d_shw) != 0:
+            shw = d_shw[0] if len(d_shw) == 1 else sum(d_shw)
+
+        # put everything into the building load dictionary
+        bldg_dict = {
+            'cooling': cooling,
+            'heating': heating,
+            'shw': shw
+        }
+        return bldg_dict, warnings
+
+    @staticmethod
+    def _read_building_loads_csv(bldg_csv):
+        """Get the cooling, heating and shw values from a building_loads.csv file.
+
+        The columns are parsed with NumPy when it is installed. Otherwise, all of
+        the lines are joined and split at once and each column is sliced out of
+        the values, which is still faster than parsing the file line by line.
+
+        Args:
+            bldg_csv: The full path to a building_loads.csv file with a header
+                row and the cooling, heating and shw loads in the last 3 columns.
+
+        Returns:
+            A tuple with three lists for the cooling, heating and shw values.
+        """
+        with open(bldg_csv, 'r') as f:
+            col_count = next(f).count(',') + 1
+            try:
+                import numpy as np
+            except ImportError:  # NumPy is an optional dependency
+                np = None
+            if np is not None:
+                try:
+                    cooling, heating, shw = np.loadtxt(
+                        f, delimiter=',', ndmin=2, unpack=True,
+                        usecols=(col_count - 3, col_count - 2, col_count - 1))
+                    return cooling.tolist(), heating.tolist(), shw.tolist()
+                except ValueError:  # rows with fewer columns than the header
+                    f.seek(0)
+                    next(f)
+            rows = [row for row in f.read().splitlines() if row.strip()]
+        values = ','.join(rows).split(',')
+        if len(values) == col_count * len(rows):
+            return [float(v) for v in values[col_count - 3::col_count]], \
+                [float(v) for v in values[col_count - 2::col_count]], \
+                [float(v) for v in values[col_count - 1::col_count]]
+        cooling_vals, heating_vals, shw_vals = [], [], []
+        for row in rows:  # rows with different numbers of columns
+            row = row.split(',')
+            shw_vals.append(float(row[-1]))
+            heating_vals.append(float(row[-2]))
+            cooling_vals.append(float(row[-3]))
+        return cooling_vals, heating_vals, shw_vals
+
+    @staticmethod
+    def _read_des_load_cache(cache_file):
+        """Read the parsed building load source files from a binary cache file.
+
+        Args:
+            cache_file: The full path to a cache file written by
+                _write_des_load_cache.
+
+        Returns:
+            A dictionary with paths of the source files relative to the scenario
+            run folder as keys and tuples of the file stamp and the parsed data
+            as values. Will be empty if the cache file does not exist or cannot
+            be read.
+        """
+        if not os.path.isfile(cache_file):
+            return {}
+        try:
+            with open(cache_file, 'rb') as f:
+                meta_length = struct.unpack('<Q', f.read(8))[0]
+                meta = json.loads(f.read(meta_length).decode('utf-8'))
+                blob = f.read()
+            if meta['version'] != 1:
+                return {}  # cache written by a different version of this package
+            entries = {}
+            for key, info in meta['files'].items():
+                series, offset = [], info['start'] * 8
+                for length in info['lengths']:
+                    series.append(struct.unpack_from('<{}d'.format(length), blob, offset))
+                    offset += length * 8
+                if info['headers'] is None:  # cooling, heating and shw values of a CSV
+                    data = tuple(series)
+                else:  # district load data collections of a SQL
+                    data, series = {}, iter(series)
+                    for out in sorted(info['headers']):
+                        data[out] = [
+                            HourlyContinuousCollection(Header.from_dict(h), next(series))
+                            for h in info['headers'][out]
+                        ]
+                entries[key] = (info['stamp'], data)
+        except (ValueError, KeyError, struct.error, StopIteration, IOError):
+            # corrupt or outdated cache; parse the files again
+            return {}
+        return entries
+
+    @staticmethod
+    def _write_des_load_cache(cache_file, entries):
+        """Write parsed building load source files to a binary cache file.
+
+        The file starts with the byte length of a JSON of metadata for all of the
+        source files, followed by the JSON, followed by all of the load values
+        as little-endian 64-bit floats.
+
+        Args:
+            cache_file: The full path to the cache file to be written.
+            entries: A dictionary with paths of the source files relative to the
+                scenario run folder as keys and tuples of the file stamp and the
+                parsed data as values. The data is either a tuple with the cooling,
+                heating and shw values of a building_loads.csv or a dictionary with
+                the district load data collections of an eplusout.sql.
+        """
+        files, chunks, start = {}, [], 0
+        for key, (stamp, data) in entries.items():
+            if isinstance(data, dict):  # district load data collections of a SQL
+                if not all(isinstance(c, HourlyContinuousCollection)
+                           for colls in data.values() for c in colls):
+                    continue  # only hourly continuous data can be cached
+                headers = {out: [c.header.to_dict() for c in colls]
+                           for out, colls in data.items()}
+                series = [c.values for out in sorted(data) for c in data[out]]
+            else:  # cooling, heating and shw values of a CSV
+                headers, series = None, data
+            lengths = [len(values) for values in series]
+            files[key] = \
+                {'stamp': stamp, 'headers': headers, 'start': start, 'lengths': lengths}
+            for values in series:
+                chunks.append(struct.pack('<{}d'.format(len(values)), *values))
+            start += sum(lengths)
+        meta = json.dumps({'version': 1, 'files': files}).encode('utf-8')
+        temp_file = '{}.tmp'.format(cache_file)
+        with open(temp_file, 'wb') as f:
+            f.write(struct.pack('<Q', len(meta)))
+            f.write(meta)
+            for chunk in chunks:
+                f.write(chunk)
+        if os.path.isfile(cache_file):
+            os.remove(cache_file)
+        os.rename(temp_file, cache_file)
+
+    @staticmethod
+    def _sql_data_collections(sql_file, output_names):
+        """Get the data collections of several EnergyPlus outputs from one SQL query.
+
+        This is faster than calling SQLiteResult.data_collections_by_output_name
+        for each output since all of the values are fetched in a single query
+        that uses the index of the ReportData table. The run periods and data
+        types of the outputs are still parsed by the SQLiteResult. It only
+        supports outputs in Watts reported at the timestep or hourly frequency
+        over a single run period, which is the case for the district loads
+        of URBANopt.
+
+        Args:
+            sql_file: The full path to an EnergyPlus SQL result file.
+            output_names: A list of text for the names of EnergyPlus outputs.
+
+        Returns:
+            A dictionary with the output names as keys and lists of
+            HourlyContinuousCollections as values, which are empty when the
+            output is not in the file. None will be returned if any of the
+            outputs is not supported, in which case the SQLiteResult parser
+            should be used.
+        """
+        import sqlite3
+        from ladybug.sql import SQLiteResult
+
+        conn = sqlite3.connect(sql_file)
+        try:
+            # get the dictionary rows of the outputs at their first reported frequency
+            c = conn.cursor()
+            c.execute(
+                'SELECT ReportDataDictionaryIndex, IndexGroup, KeyValue, Name, '
+                'ReportingFrequency, Units FROM ReportDataDictionary WHERE Name IN '
+                '({})'.format(', '.join('?' for _ in output_names)), tuple(output_names))
+            header_rows, frequencies = [], {}
+            for row in c.fetchall():
+                if frequencies.setdefault(row[3], row[4]) == row[4]:
+                    header_rows.append(row)
+            data_colls = {name: [] for name in output_names}
+            if len(header_rows) == 0:
+                return data_colls
+            if any(row[5] != 'W' for row in header_rows):
+                return None
+
+            # get all of the values in one scan of the table, sorted by output and time
+            # the range check rejects most rows of the table faster than the IN check
+            indices = tuple(sorted(row[0] for row in header_rows))
+            c.execute(
+                'SELECT ReportDataDictionaryIndex, TimeIndex, Value FROM ReportData '
+                'WHERE ReportDataDictionaryIndex BETWEEN ? AND ? AND '
+                'ReportDataDictionaryIndex IN ({}) ORDER BY ReportDataDictionaryIndex, '
+                'TimeIndex'.format(', '.join('?' for _ in indices)),
+                (indices[0], indices[-1]) + indices)
+            rows = c.fetchall()
+            dict_col, time_col, value_col = zip(*rows) if len(rows) != 0 else ((),) * 3
+            values, time_indices = {}, {}
+            for index in indices:
+                st_i, end_i = bisect_left(dict_col, index), bisect_right(dict_col, index)
+                if st_i != end_i:
+                    values[index] = value_col[st_i:end_i]
+                    time_indices[index] = (time_col[st_i], time_col[end_i - 1])
+        finally:
+            conn.close()  # ensure connection is always closed
+
+        # get the run period of each output with the parser of the SQLiteResult
+        sql_obj = SQLiteResult(sql_file)
+        run_periods = {}
+        for st_time, end_time in set(time_indices.values()):
+            run_period, frequency, multiple_period = \
+                sql_obj._extract_run_period(st_time, end_time)
+            if multiple_period or not isinstance(frequency, int):
+                return None  # not a timeseries over a single run period
+            run_periods[(st_time, end_time)] = run_period
+
+        # build the data collections from the values
+        for index, group, key, name, _, units in header_rows:
+            if index not in values:
+                continue  # no values were reported for the output
+            a_per = run_periods[time_indices[index]]
+            if len(values[index]) != len(a_per):
+                return None
+            data_type, units = SQLiteResult._data_type_from_unit(units, name)
+            header = Header(data_type, units, a_per, {'type': name, group: key})
+            data_colls[name].append(HourlyContinuousCollection(header, values[index]))
+        return data_colls
+
     def apply_properties_from_dict(self, data):
         """Apply the energy properties of a dictionary to the host Model of this object.
 
@@ -1012,11 +1205,14 @@ class ModelEnergyProperties(object):
         """Return Model energy properties as a dictionary."""
         base = {'energy': {'type': 'ModelEnergyProperties'}}
 
+        # gather all of the resources of the model in one pass
+        resources = self._resources()
+
         # add all materials, constructions and construction sets to the dictionary
-        schs = self._add_constr_type_objs_to_dict(base)
+        self._add_constr_type_objs_to_dict(base, resources)
 
         # add all schedule type limits, schedules, and program types to the dictionary
-        self._add_sched_type_objs_to_dict(base, schs)
+        self._add_sched_type_objs_to_dict(base, resources)
 
         return base
 
@@ -1028,11 +1224,10 @@ class ModelEnergyProperties(object):
         """
         # check whether construction sets in this model can create interior conflicts
         can_conflict = True
-        construction_sets = []
+        construction_sets = OrderedDict()
         for room in self.host.room_2ds:
-            c_set = room.properties.energy.construction_set
-            if not self._instance_in_array(c_set, construction_sets):
-                construction_sets.append(c_set)
+            self._add_unique(room.properties.energy.construction_set, construction_sets)
+        construction_sets = list(construction_sets.values())
         if len(construction_sets) == 1 and construction_sets[0].is_interior_symmetric:
             can_conflict = False  # typical case of only one construction set
         elif all(c_set.is_interior_defaulted for c_set in construction_sets):
@@ -1120,11 +1315,148 @@ class ModelEnergyProperties(object):
         _host = new_host or self._host
         return ModelEnergyProperties(_host)
 
-    def _add_constr_type_objs_to_dict(self, base):
+    def _resources(self, constructions=True, schedules=True):
+        """Get all unique energy resources of the Model from one pass through it.
+
+        Each list of resources holds the unique object instances in the order
+        that they were found. The public properties of this object are views
+        over these lists. Uniqueness is tracked with the id() of each instance
+        such that gathering scales linearly with the number of objects.
+
+        Args:
+            constructions: Boolean to note whether the constructions of construction
+                sets should be gathered along with all materials and schedules
+                of the constructions. (Default: True).
+            schedules: Boolean to note whether the schedules of programs and
+                HVACs should be gathered along with all schedules and schedule
+                type limits of the model. If True, the constructions will also
+                be gathered. (Default: True).
+
+        Returns:
+            A dictionary with the names of the resource properties as keys and
+            lists of resources as values.
+        """
+        c_sets, face_constrs = OrderedDict(), OrderedDict()
+        shade_constrs, shade_scheds = OrderedDict(), OrderedDict()
+        p_types, hvacs, shws, misc_scheds = \
+            OrderedDict(), OrderedDict(), OrderedDict(), OrderedDict()
+
+        # gather all of the resources assigned to the objects of the model
+        for shade in self.host._context_shades:
+            self._check_and_add_obj_construction(shade, shade_constrs)
+            self._check_and_add_shade_schedule(shade, shade_scheds)
+        for bldg in self.host._buildings:
+            self._check_and_add_obj_constr_set(bldg, c_sets)
+            for story in bldg:
+                self._check_and_add_obj_constr_set(story, c_sets)
+                for room in story:
+                    room_prop = room.properties.energy
+                    self._check_and_add_room_objs(room_prop, c_sets, p_types, hvacs, shws)
+                    if room_prop._window_vent_control is not None:
+                        self._add_unique(
+                            room_prop._window_vent_control.schedule, misc_scheds)
+                    for fan in room_prop._fans:
+                        self._add_unique(fan.control.schedule, misc_scheds)
+                    for process in room_prop._process_loads:
+                        self._add_unique(process.schedule, misc_scheds)
+            for room in bldg._room_3ds:
+                self._check_and_add_room_objs(
+                    room.properties.energy, c_sets, p_types, hvacs, shws)
+                self._check_and_add_room_3d_schedules(room, misc_scheds)
+                for face in room._faces:
+                    self._check_and_add_obj_construction(face, face_constrs)
+                    for ap in face._apertures:
+                        self._check_and_add_obj_construction(ap, face_constrs)
+                    for dr in face._doors:
+                        self._check_and_add_obj_construction(dr, face_constrs)
+                for shd in self._room_3d_shades(room):
+                    self._check_and_add_obj_construction(shd, shade_constrs)
+            for constr in (bldg.properties.energy._ceiling_plenum_construction,
+                           bldg.properties.energy._floor_plenum_construction):
+                if constr is not None:
+                    self._add_unique(constr, face_constrs)
+        c_sets, face_constrs = list(c_sets.values()), list(face_constrs.values())
+        shade_constrs = list(shade_constrs.values())
+        shade_scheds = list(shade_scheds.values())
+        p_types, hvacs, shws = \
+            list(p_types.values()), list(hvacs.values()), list(shws.values())
+        misc_scheds = list(misc_scheds.values())
+        resources = {
+            'construction_sets': c_sets,
+            'face_constructions': face_constrs,
+            'shade_constructions': shade_constrs,
+            'shade_schedules': shade_scheds,
+            'program_types': p_types,
+            'hvacs': hvacs,
+            'shws': shws,
+            'misc_room_schedules': misc_scheds
+        }
+        if not constructions and not schedules:
+            return resources
+
+        # gather the constructions of construction sets, materials and their schedules
+        bldg_constrs = []
+        for cnstr_set in set(c_sets):
+            bldg_constrs.extend(cnstr_set.modified_constructions_unique)
+        all_constrs = tuple(set(
+            bldg_constrs + list(set(face_constrs)) + list(set(shade_constrs))))
+        materials, constr_scheds = [], OrderedDict()
+        for constr in all_constrs:
+            try:
+                materials.extend(constr.materials)
+                if constr.has_frame:
+                    materials.append(constr.frame)
+                if isinstance(constr, WindowConstructionShade):
+                    if constr.is_switchable_glazing:
+                        materials.append(constr.switched_glass_material)
+                    if constr.shade_location == 'Between':
+                        materials.append(constr.window_construction.materials[-2])
+            except AttributeError:
+                pass  # ShadeConstruction
+            if isinstance(constr, AirBoundaryConstruction):
+                self._add_unique(constr.air_mixing_schedule, constr_scheds)
+            elif isinstance(constr, WindowConstructionShade):
+                if constr.schedule is not None:
+                    self._add_unique(constr.schedule, constr_scheds)
+            elif isinstance(constr, WindowConstructionDynamic):
+                self._add_unique(constr.schedule, constr_scheds)
+        constr_scheds = list(constr_scheds.values())
+        resources['constructions'] = all_constrs
+        resources['materials'] = materials
+        resources['construction_schedules'] = constr_scheds
+        if not schedules:
+            return resources
+
+        # gather the schedules of programs and HVACs and all schedule type limits
+        p_type_scheds, hvac_scheds = OrderedDict(), OrderedDict()
+        for p_type in set(p_types):
+            for sched in p_type.schedules:
+                self._add_unique(sched, p_type_scheds)
+        for hvac in hvacs:
+            for sched in hvac.schedules:
+                self._add_unique(sched, hvac_scheds)
+        p_type_scheds = list(p_type_scheds.values())
+        hvac_scheds = list(hvac_scheds.values())
+        schedules = tuple(set(
+            hvac_scheds + p_type_scheds + misc_scheds + shade_scheds + constr_scheds))
+        type_limits = OrderedDict()
+        for sched in schedules:
+            t_lim = sched.schedule_type_limit
+            if t_lim is not None:
+                self._add_unique(t_lim, type_limits)
+        type_limits = list(type_limits.values())
+        resources['program_type_schedules'] = p_type_scheds
+        resources['hvac_schedules'] = hvac_scheds
+        resources['schedules'] = schedules
+        resources['schedule_type_limits'] = type_limits
+        return resources
+
+    def _add_constr_type_objs_to_dict(self, base, resources):
         """Add materials, constructions and construction sets to a base dictionary.
 
         Args:
             base: A base dictionary for a Dragonfly Model.
+            resources: A dictionary of the resources of the Model from _resources.
         """
         # add the global construction set to the dictionary
         gs = self.global_construction_set.to_dict(abridged=True, none_for_defaults=False)
@@ -1149,145 +1481,149 @@ class ModelEnergyProperties(object):
 
         # add all ConstructionSets to the dictionary
         base['energy']['construction_sets'] = []
-        construction_sets = self.construction_sets
-        for cnstr_set in construction_sets:
+        for cnstr_set in set(resources['construction_sets']):
             base['energy']['construction_sets'].append(cnstr_set.to_dict(abridged=True))
 
         # add all unique Constructions to the dictionary
-        room_constrs = []
-        for cnstr_set in construction_sets:
-            room_constrs.extend(cnstr_set.modified_constructions_unique)
-        mass_constrs = []
-        for bldg in self.host.buildings:
-            for room in bldg.room_3ds:
-                for int_mass in room.properties.energy._internal_masses:
-                    constr = int_mass.construction
-                    if not self._instance_in_array(constr, mass_constrs):
-                        mass_constrs.append(constr)
-        all_constrs = room_constrs + self.face_constructions + self.shade_constructions
-        constructions = tuple(set(all_constrs))
         base['energy']['constructions'] = []
-        for cnst in constructions:
+        for cnst in resources['constructions']:
             try:
                 base['energy']['constructions'].append(cnst.to_dict(abridged=True))
             except TypeError:  # ShadeConstruction
                 base['energy']['constructions'].append(cnst.to_dict())
 
         # add all unique Materials to the dictionary
-        materials = []
-        for cnstr in constructions:
-            try:
-                materials.extend(cnstr.materials)
-                if cnstr.has_frame:
-                    materials.append(cnstr.frame)
-                if isinstance(cnstr, WindowConstructionShade):
-                    if cnstr.is_switchable_glazing:
-                        materials.append(cnstr.switched_glass_material)
-                    if cnstr.shade_location == 'Between':
-                        materials.append(cnstr.window_construction.materials[-2])
-            except AttributeError:
-                pass  # ShadeConstruction
-        base['energy']['materials'] = [mat.to_dict() for mat in set(materials)]
+        base['energy']['materials'] = \
+            [mat.to_dict() for mat in set(resources['materials'])]
 
-        # extract all of the schedules from the constructions
-        schedules = []
-        for constr in constructions:
-            if isinstance(constr, AirBoundaryConstruction):
-                self._check_and_add_schedule(constr.air_mixing_schedule, schedules)
-            elif isinstance(constr, WindowConstructionShade):
-                if constr.schedule is not None:
-                    self._check_and_add_schedule(constr.schedule, schedules)
-            elif isinstance(constr, WindowConstructionDynamic):
-                self._check_and_add_schedule(constr.schedule, schedules)
-        return schedules
-
-    def _add_sched_type_objs_to_dict(self, base, schs):
+    def _add_sched_type_objs_to_dict(self, base, resources):
         """Add schedule type limits, schedules, and program types to a base dictionary.
 
         Args:
             base: A base dictionary for a Dragonfly Model.
-            schs: A list of additional schedules to be serialized to the
-                base dictionary.
+            resources: A dictionary of the resources of the Model from _resources.
         """
         # add all unique hvacs to the dictionary
-        hvacs = self.hvacs
         base['energy']['hvacs'] = []
-        for hvac in hvacs:
+        for hvac in resources['hvacs']:
             base['energy']['hvacs'].append(hvac.to_dict(abridged=True))
 
         # add all unique shws to the dictionary
-        base['energy']['shws'] = [shw.to_dict() for shw in self.shws]
+        base['energy']['shws'] = [shw.to_dict() for shw in resources['shws']]
 
         # add all unique ProgramTypes to the dictionary
-        program_types = self.program_types
         base['energy']['program_types'] = []
-        for p_type in program_types:
+        for p_type in set(resources['program_types']):
             base['energy']['program_types'].append(p_type.to_dict(abridged=True))
 
         # add all unique Schedules to the dictionary
-        p_type_scheds = []
-        for p_type in program_types:
-            for sched in p_type.schedules:
-                self._check_and_add_schedule(sched, p_type_scheds)
-        hvac_scheds = []
-        for hvac in hvacs:
-            for sched in hvac.schedules:
-                self._check_and_add_schedule(sched, hvac_scheds)
-        all_scheds = hvac_scheds + p_type_scheds + self.misc_room_schedules + \
-            self.shade_schedules + schs
-        schedules = tuple(set(all_scheds))
         base['energy']['schedules'] = []
-        for sched in schedules:
+        for sched in resources['schedules']:
             base['energy']['schedules'].append(sched.to_dict(abridged=True))
 
         # add all unique ScheduleTypeLimits to the dictionary
-        type_limits = []
-        for sched in schedules:
-            t_lim = sched.schedule_type_limit
-            if t_lim is not None and not self._instance_in_array(t_lim, type_limits):
-                type_limits.append(t_lim)
         base['energy']['schedule_type_limits'] = \
-            [s_typ.to_dict() for s_typ in set(type_limits)]
+            [s_typ.to_dict() for s_typ in set(resources['schedule_type_limits'])]
 
     def _check_and_add_obj_constr_set(self, obj, construction_sets):
-        """Check if a construction set is assigned to an object and add it to a list."""
+        """Check if a construction set is assigned to an object and add it."""
         c_set = obj.properties.energy._construction_set
         if c_set is not None:
-            if not self._instance_in_array(c_set, construction_sets):
-                construction_sets.append(c_set)
+            self._add_unique(c_set, construction_sets)
 
     def _check_and_add_obj_construction(self, obj, constructions):
-        """Check if a construction is assigned to an object and add it to a list."""
+        """Check if a construction is assigned to an object and add it."""
         constr = obj.properties.energy._construction
         if constr is not None:
-            if not self._instance_in_array(constr, constructions):
-                constructions.append(constr)
+            self._add_unique(constr, constructions)
 
     def _check_and_add_shade_schedule(self, obj, schedules):
-        """Check if a schedule is assigned to a shade and add it to a list."""
+        """Check if a schedule is assigned to a shade and add it."""
         sched = obj.properties.energy._transmittance_schedule
         if sched is not None:
-            if not self._instance_in_array(sched, schedules):
-                schedules.append(sched)
+            self._add_unique(sched, schedules)
+
+    def _check_and_add_room_objs(
+            self, room_prop, construction_sets, program_types, hvacs, shws):
+        """Add the resources assigned to the energy properties of a room.
 
-    def _check_and_add_schedule(self, sched, schedules):
-        """Check if a schedule is in a list and add it if not."""
-        if not self._instance_in_array(sched, schedules):
-            schedules.append(sched)
+        This includes the ConstructionSet, ProgramType, HVAC and SHW of the
+        Room2D or 3D Honeybee Room.
+        """
+        if room_prop._construction_set is not None:
+            self._add_unique(room_prop._construction_set, construction_sets)
+        if room_prop._program_type is not None:
+            self._add_unique(room_prop._program_type, program_types)
+        if room_prop._hvac is not None:
+            self._add_unique(room_prop._hvac, hvacs)
+        if room_prop._shw is not None:
+            self._add_unique(room_prop._shw, shws)
+
+    def _check_and_add_room_3d_schedules(self, room, schedules):
+        """Add the schedules assigned directly to a 3D Honeybee Room."""
+        people = room.properties.energy._people
+        lighting = room.properties.energy._lighting
+        electric_equipment = room.properties.energy._electric_equipment
+        gas_equipment = room.properties.energy._gas_equipment
+        shw = room.properties.energy._service_hot_water
+        infiltration = room.properties.energy._infiltration
+        ventilation = room.properties.energy._ventilation
+        setpoint = room.properties.energy._setpoint
+        window_vent = room.properties.energy._window_vent_control
+        processes = room.properties.energy._process_loads
+        fans = room.properties.energy._fans
+        if people is not None:
+            self._add_unique(people.occupancy_schedule, schedules)
+            self._add_unique(people.activity_schedule, schedules)
+        if lighting is not None:
+            self._add_unique(lighting.schedule, schedules)
+        if electric_equipment is not None:
+            self._add_unique(electric_equipment.schedule, schedules)
+        if gas_equipment is not None:
+            self._add_unique(gas_equipment.schedule, schedules)
+        if shw is not None:
+            self._add_unique(shw.schedule, schedules)
+        if infiltration is not None:
+            self._add_unique(infiltration.schedule, schedules)
+        if ventilation is not None and ventilation.schedule is not None:
+            self._add_unique(ventilation.schedule, schedules)
+        if setpoint is not None:
+            self._add_unique(setpoint.heating_schedule, schedules)
+            self._add_unique(setpoint.cooling_schedule, schedules)
+            if setpoint.humidifying_schedule is not None:
+                self._add_unique(setpoint.humidifying_schedule, schedules)
+                self._add_unique(setpoint.dehumidifying_schedule, schedules)
+        if window_vent is not None:
+            self._add_unique(window_vent.schedule, schedules)
+        for process in processes:
+            self._add_unique(process.schedule, schedules)
+        for fan in fans:
+            self._add_unique(fan.control.schedule, schedules)
 
     @staticmethod
-    def _instance_in_array(object_instance, object_array):
-        """Check if a specific object instance is already in an array.
+    def _room_3d_shades(room):
+        """Get a list of all Shade objects assigned to a 3D Honeybee Room."""
+        shades = list(room.shades)
+        for face in room._faces:
+            shades.extend(face.shades)
+            for ap in face._apertures:
+                shades.extend(ap.shades)
+            for dr in face._doors:
+                shades.extend(dr.shades)
+        return shades
 
-        This can be much faster than  `if object_instance in object_array`
-        when you expect to be testing a lot of the same instance of an object for
-        inclusion in an array since the builtin method uses an == operator to
-        test inclusion.
+    @staticmethod
+    def _add_unique(object_instance, unique_objects):
+        """Add an object instance to an OrderedDict of unique instances.
+
+        The OrderedDict is keyed by the id() of each instance such that checking
+        for inclusion is a constant-time lookup rather than a scan through all
+        previously-found objects. The builtin == operator is avoided since it
+        can be slow for energy objects and distinct instances should be kept.
+        The values of the OrderedDict are the unique instances in the order
+        that they were first found.
         """
-        for val in object_array:
-            if val is object_instance:
-                return True
-        return False
+        unique_objects.setdefault(id(object_instance), object_instance)
 
     def ToString(self):
         return self.__repr__()
@@ -5,8 +5,14 @@ from __future__ import division
 import sys
 import os
 import json
+import time
 import shutil
+import hashlib
 import subprocess
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 from ladybug.futil import preparedir, write_to_file
 from ladybug.dt import Date
@@ -629,7 +635,7 @@ def check_des_compatibility(feature_geojson):
             raise ValueError(msg)
 
 
-def set_building_district_loads(scenario_csv):
+def set_building_district_loads(scenario_csv, cpu_count=1, use_cache=False):
     """Set the building loads to be used for DES simulation to district chilled/hot water.
 
     If no district chilled/hot water loads are found in the SQL result file for
@@ -638,13 +644,20 @@ def set_building_district_loads(scenario_csv):
 
     Args:
         scenario_csv: The full path to a .csv file for the URBANopt scenario.
+        cpu_count: An integer for the number of processors to be used to
+            extract the loads of the buildings in parallel. (Default: 1).
+        use_cache: Boolean to note whether the parsed building_loads.csv and
+            eplusout.sql files should be stored in a binary cache file next to
+            the scenario run folder such that they are only parsed again when
+            they have changed. (Default: False).
 
     Returns:
         A list of text strings for warnings about buildings where no district
         chilled/hot water was found.
     """
     # extract the building loads from the scenario
-    building_loads, warnings = ModelEnergyProperties.des_building_loads(scenario_csv, True)
+    building_loads, warnings = ModelEnergyProperties.des_building_loads(
+        scenario_csv, True, cpu_count, use_cache)
 
     # for each building in the simulation, replace sensible loads with district loads
     directory = os.path.dirname(scenario_csv)
@@ -674,13 +687,12 @@ def set_building_district_loads(scenario_csv):
 
         # write the final loads into the modelica and JSON files
         json_data = BuildingEnergyProperties.building_load_json(cooling, heating, shw)
-        mos_data = BuildingEnergyProperties.building_load_mos(cooling, heating, shw)
         json_path = os.path.join(bldg_dir, 'results.json')
         mos_path = os.path.join(modelica_load_dir, 'modelica.mos')
         with open(json_path, 'w') as fp:
             fp.write(json_data)
         with open(mos_path, 'w') as fp:
-            fp.write(mos_data)
+            BuildingEnergyProperties.write_building_load_mos(fp, cooling, heating, shw)
 
         # if the simulation timestep was not 1, convert it to 1 for CSV data
         # this enables the ThermalNetwork package to use the data
@@ -688,9 +700,8 @@ def set_building_district_loads(scenario_csv):
             cooling = cooling.cull_to_timestep(1)
             heating = heating.cull_to_timestep(1)
             shw = shw.cull_to_timestep(1)
-        csv_data = BuildingEnergyProperties.building_load_csv(cooling, heating, shw)
         with open(bldg_csv, 'w') as fp:
-            fp.write(csv_data)
+            BuildingEnergyProperties.write_building_load_csv(fp, cooling, heating, shw)
 
     return warnings  # return warnings to report about sensible load use
 
@@ -984,6 +995,222 @@ def _recommended_processor_count():
     return 1 if cpu_count is None or cpu_count <= 1 else cpu_count - 1
 
 
+def _load_checkpoint_manifest(manifest_file):
+    """Load the latest record of each model from a JSONL checkpoint manifest.
+
+    Args:
+        manifest_file: Path to a JSONL file with one record per line, which is
+            written by _write_checkpoint_record as each model of a batch finishes.
+
+    Returns:
+        A dictionary with the path of each model as the keys and the latest
+        record of the model as the values.
+    """
+    records = {}
+    if os.path.isfile(manifest_file):
+        with open(manifest_file, 'r') as mf:
+            for line in mf:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # line left incomplete by an interrupted run
+                    continue
+                records[record['model']] = record
+    return records
+
+
+def _completed_models(records):
+    """Get a set of model paths that completed successfully with all of their outputs.
+
+    Args:
+        records: A dictionary of records from _load_checkpoint_manifest.
+    """
+    return set(
+        model for model, record in records.items()
+        if record['status'] == 'success' and len(record['outputs']) != 0
+        and all(os.path.isfile(out) for out in record['outputs'])
+    )
+
+
+def _write_checkpoint_record(
+        manifest, model, success, duration, outputs, message='', timed_out=False,
+        input_hash=None):
+    """Write the record of a finished model into an open JSONL checkpoint manifest.
+
+    Args:
+        manifest: A file object for the JSONL manifest, opened in append mode.
+        model: Text for the path of the model that finished.
+        success: Boolean for whether the model finished successfully.
+        duration: Number for the time in seconds that it took to run the model.
+        outputs: A list of paths to the files that were output for the model.
+        message: Optional text for any error message of a failed model.
+        timed_out: Boolean to note whether the model failed because it was
+            stopped after running for too long. (Default: False).
+        input_hash: Optional text for a hash of the inputs of the model, which
+            can be used to skip the model when its inputs have not changed.
+    """
+    status = 'success' if success else 'timeout' if timed_out else 'failed'
+    record = {
+        'model': model,
+        'status': status,
+        'duration': round(duration, 3),
+        'outputs': outputs
+    }
+    if not success:
+        record['error'] = message.strip()
+    if input_hash is not None:
+        record['input_hash'] = input_hash
+    manifest.write(json.dumps(record) + '\n')
+    manifest.flush()  # make sure the record survives if the process is killed
+
+
+def _file_hash(file_path):
+    """Get a SHA-256 hash of the contents of a file or an empty string for None."""
+    if file_path is None or not os.path.isfile(file_path):
+        return ''
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _write_telemetry_event(telemetry_file, event, properties, mode='a'):
+    """Write an event into a JSONL telemetry file.
+
+    Args:
+        telemetry_file: Path to the JSONL telemetry file. If None, nothing
+            will be written.
+        event: Text for the type of event (start, model, end).
+        properties: A dictionary of properties to be written with the event.
+        mode: Text for the mode in which the file is opened. Use "w" to start
+            a new telemetry file. (Default: "a").
+    """
+    if telemetry_file is None:
+        return
+    record = {'event': event, 'time': round(time.time(), 3)}
+    record.update(properties)
+    with open(telemetry_file, mode) as tf:
+        tf.write(json.dumps(record) + '\n')
+
+
+def _phase_durations(start_time, end_time, markers, last_phase):
+    """Get the duration of each phase of a job from the files that end each phase.
+
+    Phases that have no marker file written during the job are merged into
+    the phase that follows them.
+
+    Args:
+        start_time: Number for the time at which the job started.
+        end_time: Number for the time at which the job ended.
+        markers: A list of tuples with the name of each phase and the path to
+            the file that is written at the end of the phase, in order.
+        last_phase: Text for the name of the phase that ends with the job.
+
+    Returns:
+        A dictionary with the duration in seconds of each phase.
+    """
+    phases, phase_start = {}, start_time
+    for phase, marker in markers:
+        try:
+            marker_time = os.path.getmtime(marker)
+        except OSError:  # file was not written
+            continue
+        if phase_start <= marker_time <= end_time:
+            phases[phase] = round(marker_time - phase_start, 3)
+            phase_start = marker_time
+    phases[last_phase] = round(end_time - phase_start, 3)
+    return phases
+
+
+def _peak_memory():
+    """Get the peak memory in megabytes of this process and its finished children.
+
+    This is the high-water mark of the process so far and so, for a worker
+    process that runs several jobs, it includes the memory of previous jobs.
+    None will be returned on platforms where this cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes or kB
+    return round(peak / scale, 1)
+
+
+def _percentile(values, percent):
+    """Get a percentile of a sorted list of numbers with linear interpolation."""
+    position = (len(values) - 1) * percent / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _summarize_telemetry(telemetry_file, slowest_count=10):
+    """Summarize the per-model events of a JSONL telemetry file.
+
+    Args:
+        telemetry_file: Path to a JSONL telemetry file written by the
+            simulate model or hb-models-to-osm commands.
+        slowest_count: An integer for the number of the slowest models to be
+            listed in the summary. (Default: 10).
+
+    Returns:
+        Text for the summary with the number of models of each status, the
+        percentiles of the duration, queue wait and phases of the models and
+        a list of the slowest models.
+    """
+    models = []
+    with open(telemetry_file, 'r') as tf:
+        for line in tf:
+            try:
+                record = json.loads(line)
+            except ValueError:  # line left incomplete by an interrupted run
+                continue
+            if record.get('event') == 'model':
+                models.append(record)
+    if len(models) == 0:
+        return 'No model events found in: {}'.format(telemetry_file)
+
+    # count the statuses of the models
+    statuses = {}
+    for record in models:
+        statuses[record['status']] = statuses.get(record['status'], 0) + 1
+    lines = ['{} models: {}'.format(len(models), ', '.join(
+        '{} {}'.format(count, status) for status, count in sorted(statuses.items())))]
+
+    # compute the percentiles of each timing
+    timings = [('duration', [r['duration'] for r in models]),
+               ('queue wait', [r.get('queue_wait', 0) for r in models])]
+    if any('batch_wait' in r for r in models):
+        timings.append(('batch wait', [r.get('batch_wait', 0) for r in models]))
+    phase_names = []
+    for record in models:
+        for phase in record.get('phases', {}):
+            if phase not in phase_names:
+                phase_names.append(phase)
+    for phase in phase_names:
+        values = [r['phases'][phase] for r in models if phase in r.get('phases', {})]
+        timings.append(('phase ' + phase, values))
+    lines.append('{:<24}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'seconds', 'p50', 'p90', 'p99', 'max', 'total'))
+    for name, values in timings:
+        values = sorted(values)
+        lines.append('{:<24}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.1f}'.format(
+            name, _percentile(values, 50), _percentile(values, 90),
+            _percentile(values, 99), values[-1], sum(values)))
+    peaks = [r['peak_rss_mb'] for r in models if r.get('peak_rss_mb') is not None]
+    if len(peaks) != 0:
+        lines.append('Peak worker memory: {:.1f} MB'.format(max(peaks)))
+
+    # list the slowest models
+    slowest = sorted(models, key=lambda r: r['duration'], reverse=True)
+    lines.append('Slowest models:')
+    for record in slowest[:slowest_count]:
+        lines.append('  {:>10.2f}  {:<8}  {}'.format(
+            record['duration'], record['status'], record['model']))
+    return '\n'.join(lines)
+
+
 def _run_urbanopt_windows(feature_geojson, scenario_csv):
     """Run a feature and scenario file through URBANopt on a Windows-based os.
 
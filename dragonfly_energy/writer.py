@@ -2,9 +2,13 @@
 """Methods to write files for URBANopt simulation from a Model."""
 import sys
 import os
+import io
 import re
+import math
 import json
+import gzip
 import shutil
+import hashlib
 import xml.etree.ElementTree as ET
 
 from ladybug_geometry.geometry2d import Point2D
@@ -13,12 +17,21 @@ from ladybug.epw import EPW
 from honeybee.config import folders
 from honeybee.units import parse_distance_string
 from honeybee.model import Model as hb_model
+from honeybee.shade import Shade
 from honeybee_energy.writer import model_to_gbxml_element as hb_model_to_gbxml_element
 from honeybee_energy.writer import _et_indent
+from dragonfly.model import Model
+from dragonfly.building import Building
 from dragonfly.windowparameter import DetailedWindows, SimpleWindowArea
 from dragonfly.skylightparameter import DetailedSkylights
 from dragonfly.roof import RoofSpecification
 
+RESOURCE_LIBRARY = 'resource_library.json'
+SHARED_RESOURCE_KEYS = (
+    'global_construction_set', 'construction_sets', 'constructions', 'materials',
+    'hvacs', 'shws', 'program_types', 'schedules', 'schedule_type_limits'
+)
+
 
 def model_to_gbxml_element(model, gbxml_parameters=None, room_order=None):
     """Translate a Dragonfly Model to a gbXML ElementTree.
@@ -195,7 +208,8 @@ def model_to_urbanopt(
     model, location, point=Point2D(0, 0), shade_distance=None, use_multiplier=True,
     exclude_plenums=False, solve_ceiling_adjacencies=False, merge_method='None',
     des_loop=None, electrical_network=None, road_network=None, ground_pv=None,
-    folder=None, tolerance=None
+    folder=None, tolerance=None, cpu_count=1, incremental=False, return_models=True,
+    shared_resources=False, compact=False, compress=False
 ):
     r"""Generate an URBANopt feature geoJSON and honeybee JSONs from a dragonfly Model.
 
@@ -259,6 +273,49 @@ def model_to_urbanopt(
             of the honeybee-core default_simulation_folder.
         tolerance: The minimum distance between points at which they are
             not considered touching. If None, the Model tolerance will be used.
+        cpu_count: An optional integer for the number of processes to be used
+            to translate the Buildings to honeybee Models and write them to
+            HBJSON files. Values greater than 1 only have an effect on operating
+            systems that can fork processes (eg. Linux and Mac) and the written
+            files are identical to those produced by a single process. (Default: 1).
+        incremental: Boolean to note whether the URBANopt folder should be updated
+            incrementally from a previous export instead of being cleared. If True,
+            the hash of each honeybee Model (including its context shade) is
+            compared to the hb_json_manifest.json written by the previous
+            incremental export. The HBJSON, OSM and run folder of each unchanged
+            Building are left in place such that only the files of new or edited
+            Buildings are rewritten. The files of Buildings that are no longer
+            in the model are deleted. Note that changes to the simulation
+            parameters or measures are not tracked by the manifest and so a full
+            export should be used whenever these change. If False or if there
+            is no manifest from a previous incremental export, all existing
+            files in the folder are cleared. (Default: False).
+        return_models: Boolean to note whether the honeybee Models should be
+            returned from this method. If False, each Building will be translated
+            to a honeybee Model, written to an HBJSON and released before the
+            next Building is translated such that only one honeybee Model is
+            held in memory at a time (per process when cpu_count is greater
+            than 1). This is recommended for large districts where the
+            honeybee Models are not needed after the export. (Default: True).
+        shared_resources: Boolean to note whether the energy resources of the
+            honeybee Models (eg. constructions, schedules and program types)
+            should be written once into a resource_library.json within the
+            hb_json folder instead of being copied into each HBJSON. If True,
+            each HBJSON will reference the resources of the library by
+            identifier and so it can only be translated to OSM through the
+            dragonfly-energy hb-models-to-osm command, which loads the library
+            once per process. This is recommended for large districts where
+            the same resources are shared by many Buildings. (Default: False).
+        compact: Boolean to note whether the feature geoJSON and the HBJSONs
+            should be written without any indentation or whitespace between
+            the JSON separators. This makes the files smaller and faster to
+            write for large districts. (Default: False).
+        compress: Boolean to note whether the HBJSONs should be compressed
+            with gzip and written as .hbjson.gz files. These are accepted by the
+            dragonfly-energy hb-models-to-osm command, which is used to translate
+            them to OSM when the URBANopt simulation is run. Note that the
+            feature geoJSON is never compressed since it must be read by
+            URBANopt itself. (Default: False).
 
     Returns:
         A tuple with three values.
@@ -270,7 +327,8 @@ def model_to_urbanopt(
             correspond to the detailed_model_filename keys in the feature_geojson.
 
         hb_models -- An array of honeybee Model objects that were generated in
-            process of writing the URBANopt files.
+            process of writing the URBANopt files. This will be None if
+            return_models is False.
     """
     # make sure the model is in meters and, if it's not, duplicate and scale it
     conversion_factor = None
@@ -307,13 +365,26 @@ def model_to_urbanopt(
     else:
         assert len(folder) < 60, tr_msg.format(folder)
 
+    # load the hashes of the honeybee Models from any previous export
+    manifest_file = os.path.join(folder, 'hb_json_manifest.json')
+    previous_hashes = {}
+    if incremental and os.path.isfile(manifest_file):
+        with open(manifest_file, 'r') as mf:
+            manifest = json.load(mf)
+        if manifest.get('shared_resources', False) == shared_resources and \
+                manifest.get('compress', False) == compress:
+            previous_hashes = manifest['hb_models']
+    feature_geojson = os.path.join(folder, '{}.geojson'.format(model.identifier))
+
     # get rid of all simulation files that exists in the folder already
     dir_to_delete = ('hb_json', 'osm', 'mappers', 'run')
+    if len(previous_hashes) != 0:  # building files are cleaned after translation
+        dir_to_delete = ('mappers',)
     ext_to_delete = ('.bat', '.geojson', '.epw', '.mos', '.log')
     file_to_delete = (
         'Gemfile', 'Gemfile.lock', 'honeybee_scenario.csv', 'runner.conf',
         'simulation_parameter.json', 'system_params.json',
-        'electrical_database.json', 'network.json'
+        'electrical_database.json', 'network.json', 'hb_json_manifest.json'
     )
     if os.path.isdir(folder):
         files = os.listdir(folder)
@@ -326,13 +397,15 @@ def model_to_urbanopt(
                 if f in file_to_delete:
                     os.remove(path)
                 elif f.endswith(ext_to_delete):
+                    if incremental and path == feature_geojson:
+                        continue  # only rewrite the feature geoJSON if it changed
                     os.remove(path)
     else:
         preparedir(folder)  # create the directory if it's not there
 
     # prepare the folder into which honeybee Model JSONs will be written
     hb_model_folder = os.path.join(folder, 'hb_json')  # folder for honeybee JSONs
-    preparedir(hb_model_folder)
+    preparedir(hb_model_folder, remove_content=False)
 
     # create GeoJSON dictionary
     geojson_dict = model.to_geojson_dict(location, point, tolerance=tolerance)
@@ -383,40 +456,98 @@ def model_to_urbanopt(
                 g_pv.scale(1 / conversion_factor)
 
     # write out the GeoJSON file
-    feature_geojson = os.path.join(folder, '{}.geojson'.format(model.identifier))
-    if (sys.version_info < (3, 0)):  # we need to manually encode it as UTF-8
-        with open(feature_geojson, 'wb') as fp:
-            obj_str = json.dumps(geojson_dict, indent=4, ensure_ascii=False)
-            fp.write(obj_str.encode('utf-8'))
-    else:
-        with open(feature_geojson, 'w', encoding='utf-8') as fp:
-            obj_str = json.dump(geojson_dict, fp, indent=4, ensure_ascii=False)
+    obj_str = json.dumps(geojson_dict, ensure_ascii=False, **_json_format(compact))
+    write_geojson = True
+    if incremental and os.path.isfile(feature_geojson):  # check if it's up to date
+        with io.open(feature_geojson, 'r', encoding='utf-8') as fp:
+            write_geojson = fp.read() != obj_str
+    if write_geojson:
+        if (sys.version_info < (3, 0)):  # we need to manually encode it as UTF-8
+            with open(feature_geojson, 'wb') as fp:
+                fp.write(obj_str.encode('utf-8'))
+        else:
+            with open(feature_geojson, 'w', encoding='utf-8') as fp:
+                fp.write(obj_str)
 
     # write out the honeybee Model JSONs from the model
-    hb_model_jsons = []
-    hb_models = model.to_honeybee(
-        'Building', shade_distance, use_multiplier, exclude_plenums,
-        solve_ceiling_adjacencies=solve_ceiling_adjacencies, merge_method=merge_method,
-        tolerance=tolerance
-    )
-    for bldg_model in hb_models:
-        model_dict = bldg_model.to_dict()
-        bld_path = os.path.join(hb_model_folder, '{}.hbjson'.format(bldg_model.identifier))
+    index_shade = shade_distance is not None and shade_distance > 0
+    parallel = cpu_count is not None and cpu_count > 1 and \
+        len(model.buildings) > 1 and _can_fork_processes()
+    if len(model.buildings) == 0 or \
+            (return_models and not index_shade and not parallel):
+        hb_models = model.to_honeybee(
+            'Building', shade_distance, use_multiplier, exclude_plenums,
+            solve_ceiling_adjacencies=solve_ceiling_adjacencies,
+            merge_method=merge_method, tolerance=tolerance
+        )
+        bldg_models = hb_models
+        model_ids = [m.identifier for m in hb_models]
+    else:  # translate each Building with a spatial index of the context shade
+        hb_models = None
+        bldg_models = _BuildingHoneybeeModels(
+            model, shade_distance, use_multiplier, exclude_plenums,
+            solve_ceiling_adjacencies, merge_method, tolerance)
+        if return_models and not parallel:
+            hb_models = bldg_models = \
+                [bldg_models[i] for i in range(len(bldg_models))]
+        model_ids = [bldg.identifier for bldg in model.buildings]
+    hbjson_ext = '.hbjson.gz' if compress else '.hbjson'
+    hb_model_jsons = [
+        os.path.join(hb_model_folder, '{}{}'.format(m_id, hbjson_ext))
+        for m_id in model_ids
+    ]
+    old_hashes = [previous_hashes.get(m_id) for m_id in model_ids]
+    if parallel:  # each worker translates and writes its own Buildings
+        results, hb_models = _write_hbjsons_in_parallel(
+            bldg_models, hb_model_jsons, cpu_count, incremental, old_hashes,
+            shared_resources, compact, return_models)
+    else:
+        results = [
+            _write_hbjson(bldg_models[i], bld_path, incremental, old_hash,
+                          shared_resources, compact)
+            for i, (bld_path, old_hash) in enumerate(zip(hb_model_jsons, old_hashes))
+        ]
+    model_hashes = [result[0] for result in results]
+
+    # write the energy resources shared by all of the Models into a library
+    library_file = os.path.join(hb_model_folder, RESOURCE_LIBRARY)
+    if shared_resources:
+        library = {}
+        for result in results:
+            for key, res_dicts in result[1].items():
+                key_lib = library.setdefault(key, {})
+                for res_dict in res_dicts:
+                    key_lib[_resource_id(res_dict)] = res_dict
+        library = {key: [res_lib[r_id] for r_id in sorted(res_lib)]
+                   for key, res_lib in library.items()}
         if (sys.version_info < (3, 0)):  # we need to manually encode it as UTF-8
-            with open(bld_path, 'wb') as fp:
-                obj_str = json.dumps(model_dict, ensure_ascii=False)
+            with open(library_file, 'wb') as fp:
+                obj_str = json.dumps(
+                    library, ensure_ascii=False, **_json_format(compact, None))
                 fp.write(obj_str.encode('utf-8'))
         else:
-            with open(bld_path, 'w', encoding='utf-8') as fp:
-                obj_str = json.dump(model_dict, fp, ensure_ascii=False)
-        hb_model_jsons.append(bld_path)
+            with open(library_file, 'w', encoding='utf-8') as fp:
+                json.dump(library, fp, ensure_ascii=False, **_json_format(compact, None))
+    elif os.path.isfile(library_file):
+        os.remove(library_file)
+
+    # remove the files of any edited Buildings and record the hashes of the Models
+    if incremental:
+        new_hashes = dict(zip(model_ids, model_hashes))
+        outdated = [b_id for b_id, b_hash in previous_hashes.items()
+                    if new_hashes.get(b_id) != b_hash]
+        _remove_building_files(folder, outdated, new_hashes)
+        manifest = {'hb_models': new_hashes, 'shared_resources': shared_resources,
+                    'compress': compress}
+        with open(manifest_file, 'w') as fp:
+            json.dump(manifest, fp, indent=4)
 
     return feature_geojson, hb_model_jsons, hb_models
 
 
 def model_to_des(
     model, des_loop, epw_file, location=None, point=Point2D(0, 0),
-    folder=None, tolerance=None
+    folder=None, tolerance=None, compact=False
 ):
     r"""Generate an URBANopt feature geoJSON and DES input files from a dragonfly Model.
 
@@ -445,6 +576,9 @@ def model_to_des(
             of the honeybee-core default_simulation_folder.
         tolerance: The minimum distance between points at which they are
             not considered touching. If None, the Model tolerance will be used.
+        compact: Boolean to note whether the feature geoJSON and the system
+            parameter JSON should be written without any indentation or
+            whitespace between the JSON separators. (Default: False).
 
     Returns:
         A tuple with three values.
@@ -542,9 +676,6 @@ def model_to_des(
     # write the Building loads into the scenario result folder
     scn_dir = os.path.join(folder, 'run', 'honeybee_scenario')
     for bldg in model.buildings:
-        csv_data = bldg.properties.energy.to_building_load_csv()
-        json_data = bldg.properties.energy.to_building_load_json()
-        mos_data = bldg.properties.energy.to_building_load_mos()
         bldg_dir = os.path.join(scn_dir, bldg.identifier)
         measure_dir = os.path.join(bldg_dir, '100_export_modelica_loads')
         preparedir(measure_dir)
@@ -552,11 +683,11 @@ def model_to_des(
         json_path = os.path.join(bldg_dir, 'results.json')
         mos_path = os.path.join(measure_dir, 'modelica.mos')
         with open(csv_path, 'w') as fp:
-            fp.write(csv_data)
+            bldg.properties.energy.to_building_load_csv(fp)
         with open(json_path, 'w') as fp:
-            fp.write(json_data)
+            fp.write(bldg.properties.energy.to_building_load_json())
         with open(mos_path, 'w') as fp:
-            fp.write(mos_data)
+            bldg.properties.energy.to_building_load_mos(fp)
 
     # add the DES to the GeoJSON dictionary
     if hasattr(des_loop, 'to_geojson_dict'):
@@ -630,15 +761,372 @@ def model_to_des(
     system_parameters = os.path.join(folder, 'system_params.json')
     if (sys.version_info < (3, 0)):  # we need to manually encode it as UTF-8
         with open(feature_geojson, 'wb') as fp:
-            obj_str = json.dumps(geojson_dict, indent=4, ensure_ascii=False)
+            obj_str = json.dumps(
+                geojson_dict, ensure_ascii=False, **_json_format(compact))
             fp.write(obj_str.encode('utf-8'))
         with open(system_parameters, 'wb') as fp:
-            obj_str = json.dumps(des_dict, indent=2, ensure_ascii=False)
+            obj_str = json.dumps(
+                des_dict, ensure_ascii=False, **_json_format(compact, 2))
             fp.write(obj_str.encode('utf-8'))
     else:
         with open(feature_geojson, 'w', encoding='utf-8') as fp:
-            obj_str = json.dump(geojson_dict, fp, indent=4, ensure_ascii=False)
+            json.dump(geojson_dict, fp, ensure_ascii=False, **_json_format(compact))
         with open(system_parameters, 'w') as fp:
-            json.dump(des_dict, fp, indent=2)
+            json.dump(des_dict, fp, **_json_format(compact, 2))
 
     return feature_geojson, scenario_csv, system_parameters
+
+
+def _write_hbjson(hb_model, hbjson_path, check_hash=False, previous_hash=None,
+                  shared_resources=False, compact=False):
+    """Write a honeybee Model to an HBJSON file path.
+
+    Args:
+        hb_model: A honeybee Model to be written to an HBJSON.
+        hbjson_path: The path to the HBJSON file to be written. If this ends
+            in .gz, the HBJSON will be compressed with gzip.
+        check_hash: Boolean to note whether the hash of the Model should be
+            computed and compared to the previous_hash. (Default: False).
+        previous_hash: Optional text for the hash of the Model that was previously
+            written to the hbjson_path. If this matches the hash of the hb_model
+            and check_hash is True, the existing file will not be rewritten.
+        shared_resources: Boolean to note whether the energy resources should
+            be removed from the HBJSON and returned such that they can be
+            written into a shared resource library. (Default: False).
+        compact: Boolean to note whether the HBJSON should be written without
+            whitespace between the JSON separators. (Default: False).
+
+    Returns:
+        A tuple with two values.
+
+        model_hash -- Text for the hash of the Model if check_hash is True.
+            None otherwise.
+
+        resources -- A dictionary of the energy resource dictionaries that were
+            removed from the HBJSON if shared_resources is True. None otherwise.
+    """
+    model_dict = hb_model.to_dict()
+    model_hash = _hb_model_dict_hash(model_dict) if check_hash else None
+    resources = _split_model_resources(model_dict) if shared_resources else None
+    if check_hash and model_hash == previous_hash and os.path.isfile(hbjson_path):
+        return model_hash, resources  # the existing HBJSON is already up to date
+    separators = (',', ':') if compact else None
+    if hbjson_path.endswith('.gz'):  # use an mtime of 0 to get the same bytes
+        obj_str = json.dumps(model_dict, ensure_ascii=False, separators=separators)
+        with open(hbjson_path, 'wb') as raw_fp:
+            with gzip.GzipFile(fileobj=raw_fp, mode='wb', mtime=0) as fp:
+                fp.write(obj_str.encode('utf-8'))
+    elif (sys.version_info < (3, 0)):  # we need to manually encode it as UTF-8
+        with open(hbjson_path, 'wb') as fp:
+            obj_str = json.dumps(model_dict, ensure_ascii=False, separators=separators)
+            fp.write(obj_str.encode('utf-8'))
+    else:
+        with open(hbjson_path, 'w', encoding='utf-8') as fp:
+            json.dump(model_dict, fp, ensure_ascii=False, separators=separators)
+    return model_hash, resources
+
+
+def _json_format(compact, indent=4):
+    """Get keyword arguments for json.dump to write compact or indented JSON."""
+    if compact:
+        return {'separators': (',', ':')}
+    return {'indent': indent}
+
+
+def _split_model_resources(model_dict):
+    """Remove the shared energy resources from a honeybee Model dictionary.
+
+    Each list of resources in the Model's energy properties is replaced with
+    a list of the resource identifiers and the global_construction_set is
+    replaced with its type since it is the same for all Models. The Model
+    dictionary can be restored to its original state using _merge_model_resources.
+
+    Returns:
+        A dictionary with lists of the resource dictionaries that were removed.
+    """
+    resources = {}
+    try:
+        energy_dict = model_dict['properties']['energy']
+    except KeyError:  # the Model has no energy properties
+        return resources
+    for key in SHARED_RESOURCE_KEYS:
+        res_objs = energy_dict.get(key)
+        if isinstance(res_objs, list):
+            resources[key] = res_objs
+            energy_dict[key] = [res['identifier'] for res in res_objs]
+        elif isinstance(res_objs, dict):
+            resources[key] = [res_objs]
+            energy_dict[key] = _resource_id(res_objs)
+    return resources
+
+
+def _merge_model_resources(model_dict, library):
+    """Add the shared energy resources back into a honeybee Model dictionary.
+
+    Args:
+        model_dict: A honeybee Model dictionary with resources that were
+            removed using _split_model_resources.
+        library: A dictionary with the resource keys of the Model energy
+            properties and values that are dictionaries of resource dictionaries
+            with their identifiers (or types for the global_construction_set)
+            as the keys.
+    """
+    try:
+        energy_dict = model_dict['properties']['energy']
+    except KeyError:  # the Model has no energy properties
+        return model_dict
+    for key in SHARED_RESOURCE_KEYS:
+        res_ids = energy_dict.get(key)
+        if isinstance(res_ids, list):
+            energy_dict[key] = [library[key][r_id] if not isinstance(r_id, dict)
+                                else r_id for r_id in res_ids]
+        elif res_ids is not None and not isinstance(res_ids, dict):
+            energy_dict[key] = library[key][res_ids]
+    return model_dict
+
+
+def _resource_id(resource_dict):
+    """Get the key of a resource dictionary within a shared resource library."""
+    try:
+        return resource_dict['identifier']
+    except KeyError:  # the global construction set, which is the same for all Models
+        return resource_dict['type']
+
+
+def _hb_model_dict_hash(model_dict):
+    """Get a SHA-256 hash of a honeybee Model dictionary.
+
+    The resource objects under the Model properties (eg. constructions and
+    schedules) are collected through sets and so their order can change between
+    Python sessions. They are sorted by identifier before computing the hash
+    such that the result only changes when the Model itself changes.
+    """
+    def _sort_resources(obj):
+        if isinstance(obj, dict):
+            return {key: _sort_resources(val) for key, val in obj.items()}
+        if isinstance(obj, list):
+            obj = [_sort_resources(val) for val in obj]
+            if all(isinstance(val, dict) and 'identifier' in val for val in obj):
+                obj.sort(key=lambda val: val['identifier'])
+        return obj
+
+    hash_dict = dict(model_dict)
+    if 'properties' in hash_dict:
+        hash_dict['properties'] = _sort_resources(hash_dict['properties'])
+    hash_str = json.dumps(hash_dict, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(hash_str.encode('utf-8')).hexdigest()
+
+
+def _remove_building_files(folder, building_ids, current_hashes):
+    """Remove the URBANopt files of Buildings that are outdated in a project folder.
+
+    Args:
+        folder: The URBANopt project folder.
+        building_ids: A list of Building identifiers for which the OSM and all
+            simulation results will be deleted.
+        current_hashes: A dictionary of Building identifiers with HBJSON hashes
+            for the Buildings currently in the model. The HBJSONs of any
+            building_ids that are not in this dictionary will also be deleted.
+    """
+    run_dir = os.path.join(folder, 'run')
+    scenario_dirs = [os.path.join(run_dir, d) for d in os.listdir(run_dir)] \
+        if os.path.isdir(run_dir) else []
+    for bldg_id in building_ids:
+        osm_file = os.path.join(folder, 'osm', '{}.osm'.format(bldg_id))
+        if os.path.isfile(osm_file):
+            os.remove(osm_file)
+        for scn_dir in scenario_dirs:
+            bldg_dir = os.path.join(scn_dir, bldg_id)
+            if os.path.isdir(bldg_dir):
+                nukedir(bldg_dir, True)
+        if bldg_id not in current_hashes:
+            for ext in ('.hbjson', '.hbjson.gz'):
+                hbjson = os.path.join(folder, 'hb_json', '{}{}'.format(bldg_id, ext))
+                if os.path.isfile(hbjson):
+                    os.remove(hbjson)
+
+
+class _BuildingHoneybeeModels(object):
+    """Sequence of honeybee Models that translates each Building upon request.
+
+    The context shades of all Buildings are computed once upon initialization
+    and each item is translated from a single-Building copy of the dragonfly
+    Model such that the result matches the item of Model.to_honeybee('Building')
+    without all of the honeybee Models being held in memory at once.
+
+    When the shade_distance is greater than zero, the bounding rectangles of
+    the Buildings and ContextShades are put into a _BoundRectIndex such that
+    the neighbors of each Building are found without checking every other
+    object in the Model.
+    """
+
+    def __init__(self, model, shade_distance, use_multiplier, exclude_plenums,
+                 solve_ceiling_adjacencies, merge_method, tolerance):
+        self.model = model
+        self.shade_distance = shade_distance
+        self.use_multiplier = use_multiplier
+        self.exclude_plenums = exclude_plenums
+        self.solve_ceiling_adjacencies = solve_ceiling_adjacencies
+        self.merge_method = merge_method
+        self.tolerance = tolerance
+        self.context = Building._honeybee_shades(
+            model.buildings, model.context_shades, shade_distance, False, tolerance)
+        self.bldg_index, self.con_index = None, None
+        if shade_distance is not None and shade_distance > 0:
+            _, bldg_pts, _, con_pts = self.context
+            self.bldg_index = _BoundRectIndex(bldg_pts, shade_distance)
+            self.con_index = _BoundRectIndex(con_pts, shade_distance)
+
+    def __len__(self):
+        return len(self.model.buildings)
+
+    def __getitem__(self, index):
+        bldg_model = Model(
+            self.model.identifier, [self.model.buildings[index]],
+            units=self.model.units, tolerance=self.model.tolerance,
+            angle_tolerance=self.model.angle_tolerance)
+        hb_model = bldg_model.to_honeybee(
+            'Building', 0, self.use_multiplier, self.exclude_plenums,
+            solve_ceiling_adjacencies=self.solve_ceiling_adjacencies,
+            merge_method=self.merge_method, tolerance=self.tolerance)[0]
+        bldg_shades, bldg_pts, con_shades, con_pts = self.context
+        if self.bldg_index is None:
+            Building._add_context_to_honeybee(
+                hb_model, bldg_shades, bldg_pts, con_shades, con_pts,
+                self.shade_distance, len(self), index)
+        else:  # use the spatial index to add only the shade within the distance
+            bound_pts, dist = bldg_pts[index], self.shade_distance
+            near_bldgs = self.bldg_index.query(bound_pts, dist)
+            near_bldgs = [j for j in near_bldgs if j > index] + \
+                [k for k in near_bldgs if k < index]
+            for j in near_bldgs:
+                for shd in bldg_shades[j]:
+                    hb_model.add_shade(shd)
+            for c in self.con_index.query(bound_pts, dist):
+                for shd in con_shades[c]:
+                    if isinstance(shd, Shade):
+                        hb_model.add_shade(shd)
+                    else:
+                        hb_model.add_shade_mesh(shd)
+        return hb_model
+
+
+class _BoundRectIndex(object):
+    """Uniform grid of bounding rectangles to find those within a distance of another.
+
+    Each rectangle is registered in every grid cell that it overlaps such that
+    a query only checks the rectangles in the cells around the queried one.
+    Rectangles that span too many cells (eg. large terrain context) are kept
+    in a separate list that is checked for every query.
+
+    Args:
+        bound_pts: A list of Point2D tuples (min, center, max) for the bounding
+            rectangles, which are formatted the same as those used by the
+            dragonfly Building._bound_rect_in_dist method.
+        distance: The distance that will be used to query the index, which
+            is used to set the size of the grid cells.
+    """
+    MAX_CELLS = 64  # maximum number of cells to be spanned by a rectangle
+
+    def __init__(self, bound_pts, distance):
+        self.bound_pts = bound_pts
+        dims = [max(p[2].x - p[0].x, p[2].y - p[0].y) for p in bound_pts]
+        avg_dim = sum(dims) / len(dims) if len(dims) != 0 else 0
+        self.cell_size = max(distance, avg_dim)
+        self.grid, self.large = {}, []
+        for i, b_pts in enumerate(bound_pts):
+            x_range, y_range = self._cell_ranges(b_pts, 0)
+            if len(x_range) * len(y_range) > self.MAX_CELLS:
+                self.large.append(i)
+                continue
+            for cell in ((x, y) for x in x_range for y in y_range):
+                try:
+                    self.grid[cell].append(i)
+                except KeyError:
+                    self.grid[cell] = [i]
+
+    def query(self, bound_pts, distance):
+        """Get a sorted list of rectangle indices within a distance of bound_pts."""
+        near = set(self.large)
+        x_range, y_range = self._cell_ranges(bound_pts, distance)
+        for cell in ((x, y) for x in x_range for y in y_range):
+            near.update(self.grid.get(cell, ()))
+        return sorted(
+            i for i in near
+            if Building._bound_rect_in_dist(bound_pts, self.bound_pts[i], distance)
+        )
+
+    def _cell_ranges(self, bound_pts, distance):
+        """Get the ranges of grid cell coordinates overlapped by a rectangle."""
+        pad = distance + self.cell_size * 1e-6  # avoid floating point tolerance
+        min_pt, max_pt = bound_pts[0], bound_pts[2]
+        x_min = int(math.floor((min_pt.x - pad) / self.cell_size))
+        x_max = int(math.floor((max_pt.x + pad) / self.cell_size))
+        y_min = int(math.floor((min_pt.y - pad) / self.cell_size))
+        y_max = int(math.floor((max_pt.y + pad) / self.cell_size))
+        return range(x_min, x_max + 1), range(y_min, y_max + 1)
+
+
+def _can_fork_processes():
+    """Check whether the current Python can start processes by forking."""
+    try:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor  # noqa: F401
+        return 'fork' in multiprocessing.get_all_start_methods()
+    except (ImportError, AttributeError):  # Python 2 or IronPython
+        return False
+
+
+def _write_hbjsons_in_parallel(
+        hb_models, hbjson_paths, cpu_count, check_hash=False, previous_hashes=None,
+        shared_resources=False, compact=False, return_models=False):
+    """Write a list of honeybee Models to HBJSON files using a pool of processes.
+
+    Honeybee objects cannot be pickled so the Models are inherited by the
+    worker processes when they are forked from this one and only the index
+    of each Model is sent to the workers. The hb_models can also be a
+    _BuildingHoneybeeModels in which case each worker translates the Buildings
+    that it writes.
+
+    Returns:
+        A tuple with two values.
+
+        results -- A list with the result of _write_hbjson for each Model.
+
+        models -- A list of the honeybee Models if return_models is True, which
+            are translated by this process while the workers write the HBJSONs.
+            None if return_models is False.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    mp_context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(
+            max_workers=cpu_count, mp_context=mp_context,
+            initializer=_set_worker_hb_models, initargs=(hb_models,)) as executor:
+        indices = range(len(hb_models))
+        check_hashes = [check_hash] * len(hb_models)
+        previous_hashes = previous_hashes or [None] * len(hb_models)
+        shared = [shared_resources] * len(hb_models)
+        compacts = [compact] * len(hb_models)
+        results = executor.map(
+            _write_worker_hbjson, indices, hbjson_paths, check_hashes,
+            previous_hashes, shared, compacts)
+        models = [hb_models[i] for i in indices] if return_models else None
+        return list(results), models
+
+
+_WORKER_HB_MODELS = None  # honeybee Models inherited by forked worker processes
+
+
+def _set_worker_hb_models(hb_models):
+    """Set the honeybee Models to be serialized by a forked worker process."""
+    global _WORKER_HB_MODELS
+    _WORKER_HB_MODELS = hb_models
+
+
+def _write_worker_hbjson(
+        model_index, hbjson_path, check_hash, previous_hash, shared_resources, compact):
+    """Write one of the honeybee Models of a forked worker process to an HBJSON."""
+    hb_model = _WORKER_HB_MODELS[model_index]
+    return _write_hbjson(
+        hb_model, hbjson_path, check_hash, previous_hash, shared_resources, compact)
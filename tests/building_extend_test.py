@@ -1,4 +1,5 @@
 # coding=utf-8
+from dragonfly.model import Model
 from dragonfly.building import Building
 from dragonfly.story import Story
 from dragonfly.room2d import Room2D
@@ -26,10 +27,17 @@ import honeybee_energy.lib.scheduletypelimits as schedule_types
 from honeybee_energy.lib.schedules import always_on
 
 from ladybug.dt import Time
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.header import Header
+from ladybug.datatype.power import Power
+from ladybug.datatype.temperature import Temperature
+from ladybug.datacollection import HourlyContinuousCollection
 
 from ladybug_geometry.geometry3d.pointvector import Point3D
 from ladybug_geometry.geometry3d.face import Face3D
 
+import os
+import json
 import pytest
 
 
@@ -404,3 +412,177 @@ def test_apply_properties_from_geojson_dict():
     # print(building.properties.energy.construction_set)
     # print(building.unique_room_2ds[0].properties.energy.program_type)
     # print(building.unique_room_2ds[0].properties.energy.hvac)
+
+
+def test_building_load_files():
+    """Test the streaming of building load files for DES simulation."""
+    pts = (Point3D(0, 0, 3), Point3D(0, 10, 3), Point3D(10, 10, 3), Point3D(10, 0, 3))
+    story = Story('OfficeFloor', [Room2D('Office1', Face3D(pts), 3)])
+    building = Building('OfficeBuilding', [story])
+    a_per = AnalysisPeriod(timestep=4)
+    header = Header(Power(), 'W', a_per)
+    cooling = HourlyContinuousCollection(
+        header, [(i % 96) * 12.5 for i in range(len(a_per))])
+    heating = HourlyContinuousCollection(
+        header, [(i % 48) / 3.0 for i in range(len(a_per))])
+    building.properties.energy.des_cooling_load = cooling
+    building.properties.energy.des_heating_load = heating
+
+    csv_data = building.properties.energy.to_building_load_csv()
+    mos_data = building.properties.energy.to_building_load_mos()
+    csv_lines = csv_data.split('\n')
+    assert len(csv_lines) == 8761
+    assert csv_lines[0] == 'SecondsFromStart,TotalSensibleLoad,' \
+        'TotalCoolingSensibleLoad,TotalHeatingSensibleLoad,TotalWaterHeating'
+    assert csv_lines[2] == '4500,-48.666666666666664,-50.0,1.3333333333333333,0'
+    mos_lines = mos_data.split('\n')
+    assert mos_lines[-35041] == 'double tab1(35040,4)'
+    assert mos_lines[-35039] == '1800;-12.5;{};0'.format(str(1 / 3.0))
+
+    csv_path, mos_path = './tests/building_loads.csv', './tests/modelica.mos'
+    with open(csv_path, 'w') as fp:
+        assert building.properties.energy.to_building_load_csv(fp) is None
+    with open(mos_path, 'w') as fp:
+        assert building.properties.energy.to_building_load_mos(fp) is None
+    with open(csv_path, 'r') as fp:
+        assert fp.read() == csv_data
+    with open(mos_path, 'r') as fp:
+        assert fp.read() == mos_data
+    os.remove(csv_path)
+    os.remove(mos_path)
+
+
+def test_building_loads_bundle():
+    """Test that DES loads are computed once and recomputed when they change."""
+    pts = (Point3D(0, 0, 3), Point3D(0, 10, 3), Point3D(10, 10, 3), Point3D(10, 0, 3))
+    story = Story('OfficeFloor', [Room2D('Office1', Face3D(pts), 3)])
+    building = Building('OfficeBuilding', [story])
+    a_per = AnalysisPeriod(timestep=4)
+    header = Header(Power(), 'W', a_per)
+    cooling = HourlyContinuousCollection(
+        header, [(i % 96) * 12.5 for i in range(len(a_per))])
+    building.properties.energy.des_cooling_load = cooling
+
+    loads = building.properties.energy._building_loads()
+    assert building.properties.energy._building_loads() is loads
+    assert loads[0].values[:3] == (0, -12.5, -25.0)
+    assert loads[1].values == loads[2].values == (0,) * len(a_per)
+    hourly_loads = building.properties.energy._building_loads(hourly=True)
+    assert building.properties.energy._building_loads(hourly=True) is hourly_loads
+    for load, hourly_load in zip(loads, hourly_loads):
+        base_hourly = load.cull_to_timestep(1)
+        assert hourly_load.header.analysis_period == \
+            base_hourly.header.analysis_period
+        assert hourly_load.values == base_hourly.values
+
+    heating = HourlyContinuousCollection(header, [1000] * len(a_per))
+    building.properties.energy.des_heating_load = heating
+    new_loads = building.properties.energy._building_loads()
+    assert new_loads is not loads
+    assert new_loads[1].values[:3] == (1000, 1000, 1000)
+    new_bldg = building.duplicate()
+    assert new_bldg.properties.energy._building_loads() is not new_loads
+    assert new_bldg.properties.energy._building_loads()[1].values == \
+        new_loads[1].values
+
+    cooling.values = [5.0] * len(a_per)  # change the values of an assigned load
+    csv_rows = building.properties.energy.to_building_load_csv().split('\n')
+    assert csv_rows[1] == '900,995.0,-5.0,1000,0'
+    cooling[0] = 7.0  # change a single value of an assigned load
+    assert building.properties.energy._building_loads()[0].values[:2] == (-7.0, -5.0)
+
+
+def test_des_load_encoding():
+    """Test the serialization of DES loads with binary-encoded values."""
+    pts = (Point3D(0, 0, 3), Point3D(0, 10, 3), Point3D(10, 10, 3), Point3D(10, 0, 3))
+    story = Story('OfficeFloor', [Room2D('Office1', Face3D(pts), 3)])
+    building = Building('OfficeBuilding', [story])
+    a_per = AnalysisPeriod()
+    header = Header(Power(), 'W', a_per)
+    cooling = HourlyContinuousCollection(header, [i / 3.0 for i in range(8760)])
+    hot_water = HourlyContinuousCollection(header, [(i % 24) * 10.0 for i in range(8760)])
+    building.properties.energy.des_cooling_load = cooling
+    building.properties.energy.des_hot_water_load = hot_water
+    model = Model('NewDevelopment', [building])
+    base_dict = model.to_dict()
+    base_energy = base_dict['buildings'][0]['properties']['energy']
+    assert 'encoding' not in base_energy['des_cooling_load']
+
+    with pytest.raises(AssertionError):
+        building.properties.energy.des_load_encoding = 'float16'
+    building.properties.energy.des_load_encoding = 'float64'
+    model_dict = model.to_dict()
+    bldg_energy = model_dict['buildings'][0]['properties']['energy']
+    assert bldg_energy['des_cooling_load']['encoding'] == 'float64'
+    assert 'values' not in bldg_energy['des_cooling_load']
+    assert len(json.dumps(model_dict)) < len(json.dumps(base_dict))
+    new_energy = Model.from_dict(model_dict).buildings[0].properties.energy
+    assert new_energy.des_load_encoding == 'float64'
+    assert new_energy.des_cooling_load.values == cooling.values
+    assert new_energy.des_cooling_load.header == cooling.header
+    assert new_energy.des_heating_load is None
+    assert new_energy.des_hot_water_load.values == hot_water.values
+    new_bldg = Building.from_dict(building.to_dict())
+    assert new_bldg.properties.energy.des_cooling_load.values == cooling.values
+
+    building.properties.energy.des_load_encoding = 'float32'
+    new_energy = Model.from_dict(model.to_dict()).buildings[0].properties.energy
+    assert new_energy.des_load_encoding == 'float32'
+    assert new_energy.des_cooling_load.values != cooling.values
+    assert new_energy.des_cooling_load.values == \
+        pytest.approx(cooling.values, rel=1e-6)
+    assert new_energy.des_hot_water_load.values == hot_water.values
+
+    legacy_energy = Model.from_dict(base_dict).buildings[0].properties.energy
+    assert legacy_energy.des_load_encoding is None
+    assert legacy_energy.des_cooling_load.values == cooling.values
+
+
+def test_des_load_lazy_from_dict():
+    """Test that DES loads from a dictionary are only loaded when requested."""
+    pts = (Point3D(0, 0, 3), Point3D(0, 10, 3), Point3D(10, 10, 3), Point3D(10, 0, 3))
+    story = Story('OfficeFloor', [Room2D('Office1', Face3D(pts), 3)])
+    building = Building('OfficeBuilding', [story])
+    header = Header(Power(), 'W', AnalysisPeriod())
+    cooling = HourlyContinuousCollection(header, [i / 3.0 for i in range(8760)])
+    building.properties.energy.des_cooling_load = cooling
+    model_dict = Model('NewDevelopment', [building]).to_dict()
+
+    new_energy = Model.from_dict(model_dict).buildings[0].properties.energy
+    assert isinstance(new_energy._des_cooling_load, dict)
+    assert new_energy.has_des_loads
+    assert new_energy.to_dict()['energy']['des_cooling_load'] == \
+        model_dict['buildings'][0]['properties']['energy']['des_cooling_load']
+    assert isinstance(new_energy._des_cooling_load, dict)
+    dup_energy = new_energy.duplicate()
+
+    assert new_energy.peak_des_cooling_load == cooling.max
+    assert isinstance(new_energy.des_cooling_load, HourlyContinuousCollection)
+    assert new_energy.des_cooling_load.values == cooling.values
+    assert isinstance(dup_energy._des_cooling_load, dict)
+    dup_energy.des_load_encoding = 'float64'
+    enc_dict = dup_energy.to_dict()['energy']['des_cooling_load']
+    assert enc_dict['encoding'] == 'float64'
+    assert BuildingEnergyProperties._des_load_from_dict(enc_dict).values == \
+        cooling.values
+    assert dup_energy.to_building_load_json() == new_energy.to_building_load_json()
+
+    # loads that are not annual Power collections are still rejected upon loading
+    bldg_dict = model_dict['buildings'][0]['properties']['energy']
+    half_year = AnalysisPeriod(end_month=6, end_day=30)
+    bad_loads = (
+        HourlyContinuousCollection(
+            Header(Power(), 'W', half_year), [1] * len(half_year)),
+        HourlyContinuousCollection(
+            Header(Temperature(), 'C', AnalysisPeriod()), [1] * 8760)
+    )
+    for bad_load, msg in zip(bad_loads, ('not annual', 'must be Power')):
+        bldg_dict['des_cooling_load'] = bad_load.to_dict()
+        with pytest.raises(Exception, match=msg):
+            Model.from_dict(model_dict)
+    kw_load = HourlyContinuousCollection(
+        Header(Power(), 'kW', AnalysisPeriod()), [1] * 8760)
+    bldg_dict['des_cooling_load'] = kw_load.to_dict()
+    kw_energy = Model.from_dict(model_dict).buildings[0].properties.energy
+    assert isinstance(kw_energy._des_cooling_load, dict)
+    assert kw_energy.des_cooling_load.values == (1000,) * 8760
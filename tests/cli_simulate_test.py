@@ -1,9 +1,25 @@
 """Test cli simulate module."""
 from click.testing import CliRunner
+import pytest
 import os
+import sys
+import json
+import time
+import subprocess
+import importlib
+import multiprocessing
 from ladybug.futil import nukedir
 
-from dragonfly_energy.cli.simulate import model_cli
+from ladybug_geometry.geometry3d import Point3D, Face3D
+from dragonfly.model import Model
+from dragonfly.building import Building
+from dragonfly.story import Story
+from dragonfly.room2d import Room2D
+from dragonfly_energy.run import _load_checkpoint_manifest
+from dragonfly_energy.cli.simulate import model_cli, model, _simulation_cost, \
+    _projected_makespan, _batch_jobs, _simulation_inputs_hash, _simulation_cache_key, \
+    _cache_results, _restore_cached_results, _evict_cached_results, \
+    _simulation_memory, _next_batch, _run_with_timeout, _resolve_simulation_parameter
 
 
 def test_simulate_model():
@@ -19,3 +35,282 @@ def test_simulate_model():
     output_sql = os.path.join(output_folder, 'OfficeBuilding', 'run', 'eplusout.sql')
     assert os.path.isfile(output_sql)
     nukedir(output_folder)
+
+
+def test_simulate_model_in_process():
+    """Test the simulation of several models within persistent worker processes."""
+    input_df_model = './tests/json/model_complete_simple.dfjson'
+    input_epw = './tests/epw/chicago.epw'
+    output_folder = './tests/simulation_in_process'
+    telemetry = os.path.join(output_folder, 'telemetry.jsonl')
+    model(input_df_model, input_epw, obj_per_model='Story', cpu_count=2,
+          folder=output_folder, in_process=True, telemetry=telemetry)
+
+    manifest_file = os.path.join(output_folder, 'simulation_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    assert len(records) == 3
+    for hbjson_file, record in records.items():
+        if record['status'] == 'success':
+            output_sql = os.path.join(
+                os.path.dirname(hbjson_file), 'run', 'eplusout.sql')
+            assert os.path.isfile(output_sql)
+    with open(telemetry) as tf:
+        events = [json.loads(line) for line in tf]
+    model_events = [e for e in events if e['event'] == 'model']
+    assert len(model_events) == 3
+    assert all(e['worker_pid'] != os.getpid() for e in model_events)
+    assert events[-1]['event'] == 'end'
+    nukedir(output_folder, True)
+
+
+def _crashing_simulate_hbjson(hbjson_path, *args):
+    """Stand in for _simulate_hbjson, which kills the in-process worker of a model."""
+    in_process = args[-2]
+    if in_process and 'Ground_OfficeFloor' in hbjson_path:
+        os._exit(1)  # mimic an OpenStudio crash or OOM kill of the worker
+    return True, hbjson_path, '', 'simulated'
+
+
+def test_simulate_model_worker_crash(monkeypatch):
+    """Test that a crashed worker process only fails the models of its batch."""
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip('The patched simulation only reaches forked worker processes.')
+    simulate_module = importlib.import_module('dragonfly_energy.cli.simulate')
+    monkeypatch.setattr(
+        simulate_module, '_simulate_hbjson', _crashing_simulate_hbjson)
+    input_df_model = './tests/json/model_complete_simple.dfjson'
+    input_epw = './tests/epw/chicago.epw'
+    output_folder = './tests/simulation_crash'
+    telemetry = os.path.join(output_folder, 'telemetry.jsonl')
+    model(input_df_model, input_epw, obj_per_model='Story', cpu_count=1,
+          folder=output_folder, in_process=True, telemetry=telemetry)
+
+    manifest_file = os.path.join(output_folder, 'simulation_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    assert len(records) == 3
+    for hbjson_file, record in records.items():
+        if 'Ground_OfficeFloor' in hbjson_file:
+            assert record['status'] == 'failed'
+            assert 'stopped unexpectedly' in record['error']
+        else:
+            assert record['status'] == 'success'
+    with open(telemetry) as tf:
+        events = [json.loads(line) for line in tf]
+    assert len([e for e in events if e['event'] == 'model']) == 3
+    assert events[-1]['event'] == 'end'
+    nukedir(output_folder, True)
+
+
+def _crashing_batch_simulate_hbjson(hbjson_path, *args):
+    """Stand in for _simulate_hbjson, which kills the worker on the second model."""
+    in_process = args[-2]
+    if in_process and 'Story_01' in hbjson_path:
+        time.sleep(0.2)  # let the worker send the result of the first model
+        os._exit(1)
+    return True, hbjson_path, '', 'simulated'
+
+
+def test_simulate_model_batch_results(monkeypatch):
+    """Test that each model of a batch is reported as soon as it is simulated."""
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip('The patched simulation only reaches forked worker processes.')
+    simulate_module = importlib.import_module('dragonfly_energy.cli.simulate')
+    monkeypatch.setattr(
+        simulate_module, '_simulate_hbjson', _crashing_batch_simulate_hbjson)
+    buildings = []
+    for i in range(12):
+        pts = (Point3D(i * 20, 0, 0), Point3D(i * 20 + 10, 0, 0),
+               Point3D(i * 20 + 10, 10, 0), Point3D(i * 20, 10, 0))
+        room = Room2D('Room_{:02d}'.format(i), Face3D(pts), 3)
+        story = Story('Story_{:02d}'.format(i), [room])
+        buildings.append(Building('Building_{:02d}'.format(i), [story]))
+    output_folder = './tests/simulation_batch'
+    os.makedirs(output_folder)
+    input_df_model = Model('Batch_District', buildings).to_dfjson(
+        'batch_district', output_folder)
+    input_epw = './tests/epw/chicago.epw'
+    model(input_df_model, input_epw, obj_per_model='Story', cpu_count=1,
+          folder=output_folder, in_process=True)
+
+    # the model simulated before the crash in the same batch is not lost
+    manifest_file = os.path.join(output_folder, 'simulation_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    assert len(records) == 12
+    for hbjson_file, record in records.items():
+        if 'Story_01' in hbjson_file:
+            assert record['status'] == 'failed'
+        else:
+            assert record['status'] == 'success'
+    nukedir(output_folder, True)
+
+
+def test_resolve_simulation_parameter():
+    """Test the resolution of the simulation parameters shared by all models."""
+    input_epw = './tests/epw/chicago.epw'
+    sim_par = _resolve_simulation_parameter(None, input_epw)
+    assert sim_par.timestep == 1
+    assert len(sim_par.sizing_parameter.design_days) > 0
+
+    sim_par.timestep = 4
+    sim_par.sizing_parameter.design_days = sim_par.sizing_parameter.design_days[:1]
+    sim_par_json = './tests/json/resolved_sim_par.json'
+    with open(sim_par_json, 'w') as fp:
+        json.dump(sim_par.to_dict(), fp)
+    new_sim_par = _resolve_simulation_parameter(sim_par_json, input_epw)
+    assert new_sim_par.timestep == 4
+    assert len(new_sim_par.sizing_parameter.design_days) == 1
+    os.remove(sim_par_json)
+
+
+def test_simulation_schedule():
+    """Test the estimation of simulation costs and the projected makespan."""
+    model_json = './tests/json/buffalo_test_district.dfjson'
+    with open(model_json) as json_file:
+        data = json.load(json_file)
+    model = Model.from_dict(data)
+    hb_models = model.to_honeybee('Building', 0)
+
+    costs = [_simulation_cost(hb_model) for hb_model in hb_models]
+    assert all(cost > 0 for cost in costs)
+    assert _simulation_cost(hb_models[0], 6) > costs[0]
+    assert _projected_makespan(costs, 1) == sum(costs)
+    assert _projected_makespan(costs, 100) == max(costs)
+    assert max(costs) <= _projected_makespan(costs, 4) < sum(costs)
+    assert _projected_makespan([4, 3, 3, 2, 2, 2], 2) == 8
+
+
+def test_batch_jobs():
+    """Test the grouping of small models into batches."""
+    model_json = './tests/json/buffalo_test_district.dfjson'
+    with open(model_json) as json_file:
+        data = json.load(json_file)
+    model = Model.from_dict(data)
+    hb_models = model.to_honeybee('Story', 0)
+    costs = [_simulation_cost(hb_model) for hb_model in hb_models]
+
+    batches = _batch_jobs(costs, 2)
+    assert len(batches) < len(costs)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(costs)))
+    batch_costs = [sum(costs[i] for i in batch) for batch in batches]
+    assert batch_costs == sorted(batch_costs, reverse=True)
+    assert len(_batch_jobs(costs, len(costs))) == len(costs)
+    assert _batch_jobs([10, 1, 1, 1, 1], 1, 2) == [[0], [1, 2, 3, 4]]
+
+
+def test_memory_budget():
+    """Test the estimation of simulation memory and the batches that fit a budget."""
+    model_json = './tests/json/buffalo_test_district.dfjson'
+    with open(model_json) as json_file:
+        data = json.load(json_file)
+    model = Model.from_dict(data)
+    hb_models = model.to_honeybee('Building', 0)
+    memory = [_simulation_memory(hb_model) for hb_model in hb_models]
+    assert all(mem > 0 for mem in memory)
+
+    batch_memory = [1000, 800, 500, 300]
+    assert _next_batch([0, 1, 2, 3], batch_memory, 0, float('inf')) == 0
+    assert _next_batch([1, 2, 3], batch_memory, 1000, 1600) == 2
+    assert _next_batch([1, 3], batch_memory, 1500, 1600) is None
+
+
+def test_run_with_timeout():
+    """Test that a command is stopped along with its child processes on a timeout."""
+    code = 'print("done")'
+    returncode, stdout, _ = _run_with_timeout([sys.executable, '-c', code], 10)
+    assert returncode == 0
+    assert stdout.strip() == 'done'
+
+    code = 'import subprocess, sys, time; ' \
+        'subprocess.call([sys.executable, "-c", "import time; time.sleep(30)"])'
+    start_time = time.time()
+    try:
+        _run_with_timeout([sys.executable, '-c', code], 1)
+    except subprocess.TimeoutExpired:
+        pass
+    else:
+        assert False, 'Command did not time out.'
+    assert time.time() - start_time < 10
+
+
+def test_simulation_cache():
+    """Test the caching of simulation results."""
+    model_json = './tests/json/buffalo_test_district.dfjson'
+    with open(model_json) as json_file:
+        data = json.load(json_file)
+    model = Model.from_dict(data)
+    hb_models = model.to_honeybee('Building', 0)[:2]
+
+    # write the HBJSONs and some fake simulation results
+    folder = './tests/simulation_cache'
+    cache_folder = os.path.join(folder, 'cache')
+    os.makedirs(cache_folder)
+    hbjson_files, run_folders = [], []
+    for hb_model in hb_models:
+        directory = os.path.join(folder, hb_model.identifier)
+        run_folder = os.path.join(directory, 'run')
+        os.makedirs(run_folder)
+        hbjson_files.append(hb_model.to_hbjson(folder=directory))
+        with open(os.path.join(run_folder, 'eplusout.sql'), 'w') as f:
+            f.write(hb_model.identifier * 1000)
+        report_folder = os.path.join(directory, 'reports')
+        os.makedirs(report_folder)
+        with open(os.path.join(report_folder, 'view_data_report.html'), 'w') as f:
+            f.write(hb_model.identifier)
+        run_folders.append(run_folder)
+
+    # check that the key changes with the inputs
+    epw_file = './tests/epw/chicago.epw'
+    inputs_hash = _simulation_inputs_hash(epw_file, None, None, None, None, None)
+    assert inputs_hash != _simulation_inputs_hash(
+        epw_file, None, None, None, 'si', None)
+    keys = [_simulation_cache_key(f, inputs_hash) for f in hbjson_files]
+    assert keys[0] != keys[1]
+
+    # check that the results are cached and restored
+    assert not _restore_cached_results(cache_folder, keys[0], run_folders[0])
+    for key, run_folder in zip(keys, run_folders):
+        _cache_results(cache_folder, key, run_folder)
+        time.sleep(0.01)
+    new_run_folder = os.path.join(folder, 'new_model', 'run')
+    assert _restore_cached_results(cache_folder, keys[0], new_run_folder)
+    with open(os.path.join(new_run_folder, 'eplusout.sql')) as f:
+        assert f.read() == hb_models[0].identifier * 1000
+    new_report = os.path.join(folder, 'new_model', 'reports', 'view_data_report.html')
+    with open(new_report) as f:
+        assert f.read() == hb_models[0].identifier
+
+    # check that the least recently used results are evicted
+    _evict_cached_results(cache_folder, 0.015)
+    assert os.path.isdir(os.path.join(cache_folder, keys[0]))
+    assert not os.path.isdir(os.path.join(cache_folder, keys[1]))
+    nukedir(folder, True)
+
+
+def _fake_simulate_model_hb(model_file, epw_file, sim_par_json, folder=None, **kwargs):
+    """Stand in for the honeybee-energy simulate_model, which writes fake results."""
+    run_folder = os.path.join(folder, 'run')
+    os.makedirs(run_folder)
+    with open(os.path.join(run_folder, 'eplusout.sql'), 'w') as f:
+        f.write('results')
+
+
+def test_simulate_model_cache_hit(monkeypatch):
+    """Test that a model restored from the cache completes the telemetry of the run."""
+    simulate_module = importlib.import_module('dragonfly_energy.cli.simulate')
+    monkeypatch.setattr(simulate_module, 'simulate_model_hb', _fake_simulate_model_hb)
+    input_df_model = './tests/json/model_complete_simple.dfjson'
+    input_epw = './tests/epw/chicago.epw'
+    output_folder = './tests/simulation_cache_hit'
+    cache_folder = os.path.join(output_folder, 'cache')
+    telemetry = os.path.join(output_folder, 'telemetry.jsonl')
+    model(input_df_model, input_epw, folder=output_folder,
+          cache_folder=cache_folder, telemetry=telemetry)
+    assert len(os.listdir(cache_folder)) == 1
+
+    model(input_df_model, input_epw, folder=output_folder,
+          cache_folder=cache_folder, telemetry=telemetry)
+    with open(telemetry) as tf:
+        events = [json.loads(line) for line in tf]
+    assert [e['event'] for e in events] == ['start', 'model', 'end']
+    assert events[1]['status'] == 'cached'
+    nukedir(output_folder, True)
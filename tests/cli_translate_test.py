@@ -1,9 +1,19 @@
 """Test cli translate module."""
 from click.testing import CliRunner
 from dragonfly_energy.cli.translate import model_to_osm_cli, model_to_idf_cli, \
-    model_to_gbxml_cli, model_to_trace_gbxml_cli, model_to_sdd_cli
-
+    model_to_gbxml_cli, model_to_trace_gbxml_cli, model_to_sdd_cli, hb_models_to_osm, \
+    building_district_loads, building_district_loads_cli, _unique_model_files, \
+    _translation_inputs_hash, _osm_path
+from dragonfly_energy.properties.model import ModelEnergyProperties
+from dragonfly_energy.run import _load_checkpoint_manifest, _write_checkpoint_record, \
+    _file_hash, _recommended_processor_count
+from ladybug.futil import nukedir
+
+import pytest
 import os
+import hashlib
+import importlib
+import multiprocessing
 
 
 def test_model_to_osm():
@@ -82,3 +92,117 @@ def test_model_to_sdd():
 
     assert os.path.isfile(output_sdd)
     os.remove(output_sdd)
+
+
+def test_hb_models_to_osm_skip_unchanged(capsys):
+    """Test that HBJSONs with an up-to-date OSM are not translated again."""
+    model_folder = './tests/hb_json_skip'
+    osm_folder = os.path.join(model_folder, 'osm')
+    os.makedirs(osm_folder)
+    hbjson_files = [os.path.join(model_folder, f)
+                    for f in ('bldg_a.hbjson', 'bldg_b.hbjson', 'bldg_a.json')]
+    for hbjson_file in hbjson_files:
+        with open(hbjson_file, 'w') as f:
+            f.write('{}')
+        os.utime(hbjson_file, (1000, 1000))
+    assert _unique_model_files(hbjson_files + hbjson_files[:1], osm_folder) == \
+        hbjson_files[:2]
+
+    # OSMs that are newer than the HBJSONs are skipped
+    osm_files = [os.path.join(osm_folder, f) for f in ('bldg_a.osm', 'bldg_b.osm')]
+    for osm_file in osm_files:
+        with open(osm_file, 'w') as f:
+            f.write('OS:Version')
+    hb_models_to_osm(model_folder, output_folder=osm_folder)
+    manifest_file = os.path.join(osm_folder, 'osm_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    assert sorted(records) == hbjson_files[:2]
+    assert all(r['status'] == 'success' for r in records.values())
+    assert all('input_hash' in r for r in records.values())
+
+    # OSMs that are older than the HBJSONs are skipped if the hash is unchanged
+    for hbjson_file in hbjson_files[:2]:
+        os.utime(hbjson_file, None)
+    for osm_file in osm_files:
+        os.utime(osm_file, (1000, 1000))
+    shared_hash = hashlib.sha256().hexdigest()  # no sim-par, EPW or library
+    with open(manifest_file, 'w') as manifest:
+        for hbjson_file, osm_file in zip(hbjson_files[:2], osm_files):
+            _write_checkpoint_record(
+                manifest, hbjson_file, True, 1, [osm_file],
+                input_hash=_translation_inputs_hash(hbjson_file, shared_hash))
+    hb_models_to_osm(model_folder, output_folder=osm_folder)
+    records = _load_checkpoint_manifest(manifest_file)
+    assert all(r['duration'] == 0 for r in records.values())
+    assert all('input_hash' in r for r in records.values())
+
+    # OSMs that are newer than the inputs are translated if the hash has changed
+    sim_par_json = os.path.join(osm_folder, 'sim_par.json')
+    with open(sim_par_json, 'w') as f:
+        f.write('{}')
+    os.utime(sim_par_json, (1000, 1000))
+    for osm_file in osm_files:
+        os.utime(osm_file, None)
+    capsys.readouterr()
+    hb_models_to_osm(model_folder, sim_par_json, output_folder=osm_folder)
+    assert 'Translating 2 HBJSON files' in capsys.readouterr().out
+    shared_hash = hashlib.sha256(_file_hash(sim_par_json).encode('utf-8')).hexdigest()
+    records = _load_checkpoint_manifest(manifest_file)
+    assert all(r['input_hash'] == _translation_inputs_hash(f, shared_hash)
+               for f, r in records.items())
+    nukedir(model_folder, True)
+
+
+def _crashing_hbjson_to_osm(
+    hbjson_path, sim_par_json, epw_file, output_folder, in_process=False, phases=None
+):
+    """Stand in for _hbjson_to_osm, which kills the in-process worker of an HBJSON."""
+    phases['prepare'] = 0
+    if in_process and 'bldg_a' in hbjson_path:
+        os._exit(1)  # mimic an OpenStudio crash or OOM kill of the worker
+    return True, hbjson_path, _osm_path(hbjson_path, output_folder), ''
+
+
+def test_hb_models_to_osm_worker_crash(monkeypatch):
+    """Test that HBJSONs lost with a crashed worker are translated in subprocesses."""
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip('The patched translation only reaches forked worker processes.')
+    translate_module = importlib.import_module('dragonfly_energy.cli.translate')
+    monkeypatch.setattr(translate_module, '_hbjson_to_osm', _crashing_hbjson_to_osm)
+    model_folder = './tests/hb_json_crash'
+    os.makedirs(model_folder)
+    hbjson_files = [os.path.join(model_folder, f)
+                    for f in ('bldg_a.hbjson', 'bldg_b.hbjson')]
+    for hbjson_file in hbjson_files:
+        with open(hbjson_file, 'w') as f:
+            f.write('{}')
+
+    hb_models_to_osm(model_folder, cpu_count=1, in_process=True)
+    manifest_file = os.path.join(model_folder, 'osm_manifest.jsonl')
+    records = _load_checkpoint_manifest(manifest_file)
+    assert sorted(records) == hbjson_files
+    assert all(r['status'] == 'success' for r in records.values())
+    nukedir(model_folder, True)
+
+
+def test_building_district_loads_cpu_count(monkeypatch):
+    """Test that only the CLI extracts district loads in parallel by default."""
+    cpu_counts = []
+
+    def _des_building_loads(scenario_csv, exclude_pre_assigned=False, cpu_count=1,
+                            use_cache=False):
+        cpu_counts.append(cpu_count)
+        return {}, []
+    monkeypatch.setattr(ModelEnergyProperties, 'des_building_loads',
+                        staticmethod(_des_building_loads))
+    scenario_csv = './tests/json/buffalo_test_district.dfjson'  # any existing file
+
+    building_district_loads(scenario_csv, loads_to_log=True)
+    assert cpu_counts == [1]
+    runner = CliRunner()
+    result = runner.invoke(building_district_loads_cli, [scenario_csv, '-l'])
+    assert result.exit_code == 0
+    assert cpu_counts[1] == _recommended_processor_count()
+    result = runner.invoke(building_district_loads_cli, [scenario_csv, '-l', '-c', '3'])
+    assert result.exit_code == 0
+    assert cpu_counts[2] == 3
@@ -1,13 +1,21 @@
 # coding=utf-8
 import pytest
+import sys
 import os
+import random
+import time
 import json
+import gzip
+import sqlite3
 
 from ladybug_geometry.geometry3d import Vector3D, Point3D, Plane, Face3D
 from ladybug.location import Location
+from ladybug.analysisperiod import AnalysisPeriod
 from ladybug.futil import nukedir
 
 import honeybee.model as hb_model
+from honeybee.room import Room
+from honeybee_energy.simulation.parameter import SimulationParameter
 from honeybee_energy.lib.programtypes import office_program, plenum_program
 import honeybee_energy.lib.scheduletypelimits as schedule_types
 from honeybee_energy.lib.materials import roof_membrane, wood, insulation
@@ -31,6 +39,8 @@ from dragonfly.windowparameter import SimpleWindowRatio
 from dragonfly_energy.properties.model import ModelEnergyProperties
 from dragonfly_energy.opendss.network import ElectricalNetwork
 from dragonfly_energy.des.loop import GHEThermalLoop
+from dragonfly_energy.writer import RESOURCE_LIBRARY, _merge_model_resources, \
+    _resource_id, _BuildingHoneybeeModels, _can_fork_processes
 
 
 def test_energy_properties():
@@ -346,6 +356,116 @@ def test_to_from_dict_plenum_construction():
     assert new_building.properties.energy.floor_plenum_construction == floor_constr
 
 
+def test_resources_room_3ds():
+    """Test that Model energy resources include those of Building room_3ds."""
+    pts_1 = (Point3D(0, 0, 3), Point3D(0, 10, 3), Point3D(10, 10, 3), Point3D(10, 0, 3))
+    room2d_1 = Room2D('Office1', Face3D(pts_1), 3)
+    room2d_1.properties.energy.program_type = office_program
+    room2d_1.properties.energy.add_default_ideal_air()
+    story = Story('OfficeFloor', [room2d_1])
+    story.set_outdoor_window_parameters(SimpleWindowRatio(0.4))
+    building = Building('OfficeBuilding', [story])
+
+    room_3d = Room.from_box('Attic3D', 10, 10, 3, origin=Point3D(0, 0, 6))
+    attic_program = plenum_program.duplicate()
+    attic_program.identifier = 'Attic 3D Space'
+    schedule = ScheduleRuleset.from_constant_value(
+        'Always Dim 3D', 1, schedule_types.fractional)
+    attic_program.lighting = Lighting('Attic 3D Lighting', 3, schedule)
+    room_3d.properties.energy.program_type = attic_program
+    room_3d.properties.energy.add_default_ideal_air()
+    polyiso = EnergyMaterial('PolyIso 3D', 0.2, 0.03, 43, 1210, 'MediumRough')
+    roof_constr = OpaqueConstruction('Attic 3D Roof', [roof_membrane, polyiso, wood])
+    room_3d[-1].properties.energy.construction = roof_constr
+    building.add_room_3ds([room_3d])
+
+    model = Model('NewDevelopment', [building])
+    energy_prop = model.properties.energy
+    assert attic_program in energy_prop.program_types
+    assert len(energy_prop.hvacs) == 2
+    assert roof_constr in energy_prop.constructions
+    assert polyiso in energy_prop.materials
+    assert schedule in energy_prop.schedules
+
+    model_dict = model.to_dict()
+    energy_dict = model_dict['properties']['energy']
+    assert 'Attic 3D Roof' in [c['identifier'] for c in energy_dict['constructions']]
+    assert 'Always Dim 3D' in [s['identifier'] for s in energy_dict['schedules']]
+
+
+def test_resources_diversified_program_types():
+    """Test the gathering of resources from many diversified ProgramTypes."""
+    rooms = []
+    for i in range(40):
+        pts = (Point3D(i * 10, 0, 3), Point3D(i * 10, 10, 3),
+               Point3D(i * 10 + 10, 10, 3), Point3D(i * 10 + 10, 0, 3))
+        room = Room2D('Office{}'.format(i), Face3D(pts), 3)
+        room.properties.energy.program_type = office_program
+        room.properties.energy.add_default_ideal_air()
+        rooms.append(room)
+    story = Story('OfficeFloor', rooms)
+    building = Building('OfficeBuilding', [story])
+    random.seed(0)
+    building.properties.energy.diversify()
+    model = Model('NewDevelopment', [building])
+
+    resources = model.properties.energy._resources()
+    room_programs = [r.properties.energy.program_type for r in rooms]
+    room_hvacs = [r.properties.energy.hvac for r in rooms]
+    assert len(resources['program_types']) == 40
+    assert all(a is b for a, b in zip(resources['program_types'], room_programs))
+    assert all(a is b for a, b in zip(resources['hvacs'], room_hvacs))
+    assert len(model.properties.energy.program_types) == 40
+    for sched in model.properties.energy.program_type_schedules:
+        assert sched in model.properties.energy.schedules
+    assert len(model.properties.energy.schedule_type_limits) == \
+        len(set(model.properties.energy.schedule_type_limits))
+
+
+@pytest.mark.skipif(
+    not os.environ.get('DRAGONFLY_BENCHMARK'),
+    reason='Benchmark only runs when the DRAGONFLY_BENCHMARK variable is set.')
+def test_resources_scaling_benchmark():
+    """Benchmark the gathering of resources from models of increasing size.
+
+    Each Room2D gets its own diversified ProgramType and IdealAirSystem such
+    that the number of unique resources grows with the number of rooms. Run
+    with `DRAGONFLY_BENCHMARK=1 python -m pytest -s -k benchmark` to print
+    the timings.
+    """
+    timings = []
+    for room_count in (500, 2000, 8000):
+        buildings = []
+        for b_i in range(room_count // 10):
+            rooms = []
+            for r_i in range(10):
+                x, y = r_i * 10, b_i * 20
+                pts = (Point3D(x, y, 0), Point3D(x + 10, y, 0),
+                       Point3D(x + 10, y + 10, 0), Point3D(x, y + 10, 0))
+                room = Room2D('Room_{}_{}'.format(b_i, r_i), Face3D(pts), 3)
+                room.properties.energy.program_type = office_program
+                room.properties.energy.add_default_ideal_air()
+                rooms.append(room)
+            building = Building('Building_{}'.format(b_i), [Story('Floor', rooms)])
+            building.properties.energy.diversify()
+            buildings.append(building)
+        model = Model('Benchmark_District', buildings)
+
+        start_time = time.time()
+        resources = model.properties.energy._resources(False, False)
+        walk_time = time.time() - start_time
+        assert len(resources['program_types']) == room_count
+        assert len(resources['hvacs']) == room_count
+        timings.append((room_count, walk_time))
+        print('{:>6} rooms: {:.3f} seconds ({:.1f} microseconds per room)'.format(
+            room_count, walk_time, walk_time / room_count * 1e6))
+
+    # the time per room stays roughly constant when the gathering is linear
+    small_per_room = timings[0][1] / timings[0][0]
+    large_per_room = timings[-1][1] / timings[-1][0]
+    assert large_per_room < small_per_room * 4
+
+
 def test_to_honeybee():
     """Test the Model to_honeybee method."""
     pts_1 = (Point3D(0, 0, 3), Point3D(10, 0, 3), Point3D(10, 10, 3), Point3D(0, 10, 3))
@@ -595,3 +715,459 @@ def test_to_urbanopt_des_loop():
 
     # clean up the files
     nukedir(sim_folder, True)
+
+
+_BUFFALO_DISTRICT = None
+
+
+def _buffalo_district():
+    """Get a copy of the Buffalo test district, which is only loaded once."""
+    global _BUFFALO_DISTRICT
+    if _BUFFALO_DISTRICT is None:
+        model_json = './tests/json/buffalo_test_district.dfjson'
+        with open(model_json) as json_file:
+            _BUFFALO_DISTRICT = Model.from_dict(json.load(json_file))
+    return _BUFFALO_DISTRICT.duplicate()
+
+
+def test_to_urbanopt_cpu_count(monkeypatch):
+    """Test that the Model.to.urbanopt method writes the same HBJSONs in parallel."""
+    model = _buffalo_district()
+
+    # create the urbanopt folder with a single process and multiple processes
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_serial'
+    _, serial_jsons, serial_models = \
+        model.to.urbanopt(model, location, folder=sim_folder)
+    par_folder = './tests/urbanopt_model_buffalo_parallel'
+    _, par_jsons, par_models = \
+        model.to.urbanopt(model, location, folder=par_folder, cpu_count=2)
+
+    # check that the HBJSON files and the returned Models are identical
+    assert len(serial_jsons) == len(par_jsons)
+    for serial_json, par_json in zip(serial_jsons, par_jsons):
+        assert os.path.basename(serial_json) == os.path.basename(par_json)
+        with open(serial_json, 'rb') as s_f, open(par_json, 'rb') as p_f:
+            assert s_f.read() == p_f.read()
+    assert [m.to_dict() for m in par_models] == [m.to_dict() for m in serial_models]
+
+    # check that the Buildings are translated by the worker processes
+    if _can_fork_processes():
+        log_file = os.path.join(par_folder, 'translated.log')
+        base_getitem = _BuildingHoneybeeModels.__getitem__
+
+        def _getitem(self, index):
+            with open(log_file, 'a') as f:
+                f.write('{} {}\n'.format(os.getpid(), index))
+            return base_getitem(self, index)
+        monkeypatch.setattr(_BuildingHoneybeeModels, '__getitem__', _getitem)
+        for return_models in (True, False):
+            if os.path.isfile(log_file):
+                os.remove(log_file)
+            _, _, new_models = model.to.urbanopt(
+                model, location, folder=par_folder, cpu_count=2,
+                return_models=return_models)
+            with open(log_file) as f:
+                translated = [line.split() for line in f]
+            worker_ids = sorted(int(i) for pid, i in translated
+                                if int(pid) != os.getpid())
+            assert worker_ids == list(range(len(model.buildings)))
+            if return_models:
+                assert [m.to_dict() for m in new_models] == \
+                    [m.to_dict() for m in serial_models]
+            else:
+                assert new_models is None
+                assert len(translated) == len(model.buildings)
+
+    # clean up the files
+    nukedir(sim_folder, True)
+    nukedir(par_folder, True)
+
+
+def test_to_urbanopt_return_models():
+    """Test the Model.to.urbanopt method without returning the honeybee Models."""
+    model = _buffalo_district()
+
+    # create the urbanopt folder with and without returning the Models
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_models'
+    _, model_jsons, hb_models = model.to.urbanopt(
+        model, location, shade_distance=50, folder=sim_folder)
+    assert len(hb_models) == len(model.buildings)
+    stream_folder = './tests/urbanopt_model_buffalo_stream'
+    _, stream_jsons, stream_models = model.to.urbanopt(
+        model, location, shade_distance=50, folder=stream_folder,
+        return_models=False)
+    assert stream_models is None
+
+    # check that the HBJSON files are the same
+    assert len(model_jsons) == len(stream_jsons)
+    for model_json, stream_json in zip(model_jsons, stream_jsons):
+        assert os.path.basename(model_json) == os.path.basename(stream_json)
+        with open(model_json, 'rb') as m_f, open(stream_json, 'rb') as s_f:
+            assert m_f.read() == s_f.read()
+
+    # clean up the files
+    nukedir(sim_folder, True)
+    nukedir(stream_folder, True)
+
+
+def test_to_urbanopt_shade_distance():
+    """Test that the Model.to.urbanopt method finds the same shade within a distance."""
+    model = _buffalo_district()
+
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_shade'
+    for shade_dist in (5, 30, 100):
+        base_models = model.to_honeybee('Building', shade_dist)
+        _, _, hb_models = model.to.urbanopt(
+            model, location, shade_distance=shade_dist, folder=sim_folder)
+        assert len(base_models) == len(hb_models)
+        for base_model, new_model in zip(base_models, hb_models):
+            assert base_model.identifier == new_model.identifier
+            assert [shd.identifier for shd in base_model.shades] == \
+                [shd.identifier for shd in new_model.shades]
+
+    # clean up the files
+    nukedir(sim_folder, True)
+
+
+def test_to_urbanopt_shade_distance_hbjson():
+    """Test that HBJSONs written with a shade_distance match Model.to_honeybee."""
+    model = _buffalo_district()
+
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_shade_hbjson'
+    base_models = model.to_honeybee(
+        'Building', 30, False, True, solve_ceiling_adjacencies=True,
+        merge_method='Zones', tolerance=model.tolerance)
+    base_dicts = [json.loads(json.dumps(m.to_dict())) for m in base_models]
+    for cpu_count in (1, 2):
+        _, hb_model_jsons, hb_models = model.to.urbanopt(
+            model, location, shade_distance=30, use_multiplier=False,
+            exclude_plenums=True, solve_ceiling_adjacencies=True,
+            merge_method='Zones', folder=sim_folder, cpu_count=cpu_count,
+            return_models=False)
+        assert hb_models is None
+        assert len(hb_model_jsons) == len(base_dicts)
+        for base_dict, hb_json in zip(base_dicts, hb_model_jsons):
+            with open(hb_json) as json_file:
+                assert json.load(json_file) == base_dict
+
+    # clean up the files
+    nukedir(sim_folder, True)
+
+
+def test_to_urbanopt_shared_resources():
+    """Test the Model.to.urbanopt method with a shared resource library."""
+    model = _buffalo_district()
+
+    # create the urbanopt folder with and without the shared resources
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_full'
+    _, model_jsons, _ = model.to.urbanopt(model, location, folder=sim_folder)
+    shared_folder = './tests/urbanopt_model_buffalo_shared'
+    _, shared_jsons, _ = model.to.urbanopt(
+        model, location, folder=shared_folder, shared_resources=True)
+    library_file = os.path.join(shared_folder, 'hb_json', RESOURCE_LIBRARY)
+    assert os.path.isfile(library_file)
+
+    # check that the full HBJSONs can be restored from the library
+    with open(library_file) as json_file:
+        library = json.load(json_file)
+    library = {key: {_resource_id(res): res for res in res_dicts}
+               for key, res_dicts in library.items()}
+    for model_json, shared_json in zip(model_jsons, shared_jsons):
+        assert os.path.getsize(shared_json) < os.path.getsize(model_json)
+        with open(model_json) as m_f, open(shared_json) as s_f:
+            model_dict, shared_dict = json.load(m_f), json.load(s_f)
+        assert all(isinstance(c, str) for c in
+                   shared_dict['properties']['energy']['constructions'])
+        assert _merge_model_resources(shared_dict, library) == model_dict
+
+    # check that the library is removed if the resources are no longer shared
+    model.to.urbanopt(model, location, folder=shared_folder)
+    assert not os.path.isfile(library_file)
+
+    # clean up the files
+    nukedir(sim_folder, True)
+    nukedir(shared_folder, True)
+
+
+def test_to_urbanopt_compress():
+    """Test the Model.to.urbanopt method with compact and compressed files."""
+    model = _buffalo_district()
+
+    # create the urbanopt folder with and without compact compressed files
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_full'
+    geojson, model_jsons, _ = model.to.urbanopt(model, location, folder=sim_folder)
+    gz_folder = './tests/urbanopt_model_buffalo_gz'
+    gz_geojson, gz_jsons, _ = model.to.urbanopt(
+        model, location, folder=gz_folder, compact=True, compress=True)
+
+    # check that the files are smaller and have the same content
+    assert os.path.getsize(gz_geojson) < os.path.getsize(geojson)
+    with open(geojson) as m_f, open(gz_geojson) as c_f:
+        assert '\n' not in c_f.read().strip()
+        c_f.seek(0)
+        assert len(json.load(m_f)['features']) == len(json.load(c_f)['features'])
+    for model_json, gz_json in zip(model_jsons, gz_jsons):
+        assert gz_json.endswith('.hbjson.gz')
+        assert os.path.getsize(gz_json) < os.path.getsize(model_json)
+        with open(model_json) as m_f, gzip.open(gz_json, 'rt') as c_f:
+            assert json.load(m_f) == json.load(c_f)
+
+    # clean up the files
+    nukedir(sim_folder, True)
+    nukedir(gz_folder, True)
+
+
+def test_to_urbanopt_incremental():
+    """Test the Model.to.urbanopt method with incremental exporting."""
+    model = _buffalo_district()
+
+    # create the urbanopt folder and add fake OSMs and results for each building
+    location = Location('Buffalo', 'NY', 'USA', 42.813153, -78.852466)
+    sim_folder = './tests/urbanopt_model_buffalo_incremental'
+    _, hb_model_jsons, _ = \
+        model.to.urbanopt(model, location, folder=sim_folder, incremental=True)
+    assert os.path.isfile(os.path.join(sim_folder, 'hb_json_manifest.json'))
+    bldg_ids = [bldg.identifier for bldg in model.buildings]
+    for bldg_id in bldg_ids:
+        os.makedirs(os.path.join(sim_folder, 'osm'), exist_ok=True)
+        with open(os.path.join(sim_folder, 'osm', '{}.osm'.format(bldg_id)), 'w') as f:
+            f.write('OS:Version')
+        os.makedirs(os.path.join(sim_folder, 'run', 'honeybee_scenario', bldg_id))
+    mtimes = [os.path.getmtime(m_json) for m_json in hb_model_jsons]
+
+    # edit one building and re-export the model incrementally
+    model.buildings[0].properties.energy.set_all_room_2d_program_type(office_program)
+    _, new_model_jsons, _ = \
+        model.to.urbanopt(model, location, folder=sim_folder, incremental=True)
+    assert new_model_jsons == hb_model_jsons
+    for bldg_id, m_json, m_time in zip(bldg_ids, new_model_jsons, mtimes):
+        osm = os.path.join(sim_folder, 'osm', '{}.osm'.format(bldg_id))
+        run_dir = os.path.join(sim_folder, 'run', 'honeybee_scenario', bldg_id)
+        assert os.path.isfile(m_json)
+        if bldg_id == bldg_ids[0]:  # the edited building
+            assert not os.path.isfile(osm)
+            assert not os.path.isdir(run_dir)
+        else:  # all other buildings should be untouched
+            assert os.path.isfile(osm)
+            assert os.path.isdir(run_dir)
+            assert os.path.getmtime(m_json) == m_time
+
+    # check that a full export clears all of the files
+    model.to.urbanopt(model, location, folder=sim_folder)
+    assert not os.path.isdir(os.path.join(sim_folder, 'osm'))
+
+    # clean up the files
+    nukedir(sim_folder, True)
+
+
+def test_des_building_loads():
+    """Test the extraction of building loads from an URBANopt scenario in parallel."""
+    folder = './tests/des_scenario'
+    scenario_csv = os.path.join(folder, 'baseline_scenario.csv')
+    scn_dir = os.path.join(folder, 'run', 'baseline_scenario')
+    os.makedirs(scn_dir)
+    sim_par = SimulationParameter()
+    sim_par.timestep = 1
+    with open(os.path.join(folder, 'simulation_parameter.json'), 'w') as f:
+        json.dump(sim_par.to_dict(), f)
+    for b_i in range(4):  # buildings with loads and no district outputs in the SQL
+        bldg_dir = os.path.join(scn_dir, 'Bldg_{}'.format(b_i))
+        load_dir = '100_export_modelica_loads' if b_i == 3 \
+            else '015_export_modelica_loads'
+        os.makedirs(os.path.join(bldg_dir, load_dir))
+        with open(os.path.join(bldg_dir, load_dir, 'building_loads.csv'), 'w') as f:
+            f.write('SecondsFromStart,Cooling,Heating,WaterHeating\n')
+            for i in range(8760):
+                f.write('{},{},{},{}\n'.format((i + 1) * 3600, -i * b_i, b_i, 1.5))
+        conn = sqlite3.connect(os.path.join(bldg_dir, 'eplusout.sql'))
+        conn.execute('CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex '
+                     'INTEGER, IndexGroup TEXT, KeyValue TEXT, Name TEXT, '
+                     'ReportingFrequency TEXT, Units TEXT)')
+        conn.close()
+    os.makedirs(os.path.join(scn_dir, 'not_a_building'))
+
+    building_loads, warnings = ModelEnergyProperties.des_building_loads(scenario_csv)
+    assert sorted(building_loads) == ['Bldg_0', 'Bldg_1', 'Bldg_2', 'Bldg_3']
+    assert building_loads['Bldg_2']['cooling'].values[:3] == (0, -2, -4)
+    assert building_loads['Bldg_2']['heating'].values[:3] == (2, 2, 2)
+    assert building_loads['Bldg_2']['shw'].values[:3] == (1.5, 1.5, 1.5)
+    assert len(warnings) == 8
+
+    par_loads, par_warnings = ModelEnergyProperties.des_building_loads(
+        scenario_csv, cpu_count=2)
+    assert par_warnings == warnings
+    assert list(par_loads) == list(building_loads)
+    for bldg_name, bldg_dict in building_loads.items():
+        for load_type, load in bldg_dict.items():
+            assert par_loads[bldg_name][load_type].values == load.values
+            assert par_loads[bldg_name][load_type].header == load.header
+
+    excl_loads, _ = ModelEnergyProperties.des_building_loads(scenario_csv, True, 2)
+    assert sorted(excl_loads) == ['Bldg_0', 'Bldg_1', 'Bldg_2']
+    nukedir(folder, True)
+
+
+def test_des_building_loads_cache(monkeypatch):
+    """Test that unchanged building load files are served from the cache."""
+    folder = './tests/des_scenario_cache'
+    scenario_csv = os.path.join(folder, 'baseline_scenario.csv')
+    scn_dir = os.path.join(folder, 'run', 'baseline_scenario')
+    cache_file = os.path.join(folder, 'run', 'baseline_scenario_des_loads.cache')
+    os.makedirs(scn_dir)
+    sim_par = SimulationParameter()
+    sim_par.timestep = 1
+    with open(os.path.join(folder, 'simulation_parameter.json'), 'w') as f:
+        json.dump(sim_par.to_dict(), f)
+    for bldg_name in ('Bldg_1', 'Bldg_2'):
+        load_dir = os.path.join(scn_dir, bldg_name, '015_export_modelica_loads')
+        os.makedirs(load_dir)
+        with open(os.path.join(load_dir, 'building_loads.csv'), 'w') as f:
+            f.write('SecondsFromStart,Cooling,Heating,WaterHeating\n')
+            for i in range(8760):
+                f.write('{},{},{},{}\n'.format((i + 1) * 3600, -(i % 24), i % 7, 1.5))
+        conn = sqlite3.connect(os.path.join(scn_dir, bldg_name, 'eplusout.sql'))
+        conn.execute('CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex '
+                     'INTEGER, IndexGroup TEXT, KeyValue TEXT, Name TEXT, '
+                     'ReportingFrequency TEXT, Units TEXT)')
+        conn.close()
+
+    ModelEnergyProperties.des_building_loads(scenario_csv)
+    assert not os.path.isfile(cache_file)  # the cache is only used when requested
+    building_loads, warnings = \
+        ModelEnergyProperties.des_building_loads(scenario_csv, use_cache=True)
+    assert os.path.isfile(cache_file)
+    cache = ModelEnergyProperties._read_des_load_cache(cache_file)
+    assert len(cache) == 4
+    assert os.path.join('Bldg_1', 'eplusout.sql') in cache
+
+    read_files = []
+    base_read = ModelEnergyProperties._read_des_building_files
+
+    def _read_des_building_files(bldg_csv, sql_file, hour_count):
+        read_files.extend(f for f in (bldg_csv, sql_file) if f is not None)
+        return base_read(bldg_csv, sql_file, hour_count)
+    monkeypatch.setattr(ModelEnergyProperties, '_read_des_building_files',
+                        staticmethod(_read_des_building_files))
+
+    cached_loads, cached_warnings = \
+        ModelEnergyProperties.des_building_loads(scenario_csv, use_cache=True)
+    assert read_files == []
+    assert cached_warnings == warnings
+    assert list(cached_loads) == list(building_loads)
+    for bldg_name, bldg_dict in building_loads.items():
+        for load_type, load in bldg_dict.items():
+            assert cached_loads[bldg_name][load_type].values == load.values
+            assert cached_loads[bldg_name][load_type].header == load.header
+
+    bldg_csv = os.path.join(
+        scn_dir, 'Bldg_2', '015_export_modelica_loads', 'building_loads.csv')
+    with open(bldg_csv, 'w') as f:
+        f.write('SecondsFromStart,Cooling,Heating,WaterHeating\n')
+        for i in range(8760):
+            f.write('{},{},{},{}\n'.format((i + 1) * 3600, -2, 3, 10))
+    new_loads, _ = ModelEnergyProperties.des_building_loads(scenario_csv, use_cache=True)
+    assert read_files == [bldg_csv]
+    assert new_loads['Bldg_2']['cooling'].values[:3] == (-2, -2, -2)
+    assert new_loads['Bldg_2']['shw'].values[:3] == (10, 10, 10)
+    assert new_loads['Bldg_1']['heating'].values == \
+        building_loads['Bldg_1']['heating'].values
+
+    ModelEnergyProperties.des_building_loads(scenario_csv)
+    assert len(read_files) == 5
+
+    with open(cache_file, 'wb') as f:  # a corrupt cache is ignored
+        f.write(b'\x10\x00\x00\x00\x00\x00\x00\x00{"version": 1}')
+    assert ModelEnergyProperties._read_des_load_cache(cache_file) == {}
+    nukedir(folder, True)
+
+
+def test_sql_data_collections():
+    """Test that the SQL reader of district loads matches the ladybug SQLiteResult."""
+    from ladybug.sql import SQLiteResult
+    folder = './tests/des_sql'
+    os.makedirs(folder)
+    sql_file = os.path.join(folder, 'eplusout.sql')
+    conn = sqlite3.connect(sql_file)
+    c = conn.cursor()
+    c.execute('CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex '
+              'INTEGER PRIMARY KEY, IsMeter INTEGER, Type TEXT, IndexGroup TEXT, '
+              'TimestepType TEXT, KeyValue TEXT, Name TEXT, '
+              'ReportingFrequency TEXT, ScheduleName TEXT, Units TEXT)')
+    c.execute('CREATE TABLE ReportData (ReportDataIndex INTEGER PRIMARY KEY, '
+              'TimeIndex INTEGER, ReportDataDictionaryIndex INTEGER, Value REAL)')
+    c.execute('CREATE TABLE Time (TimeIndex INTEGER PRIMARY KEY, Year INTEGER, '
+              'Month INTEGER, Day INTEGER, Hour INTEGER, Minute INTEGER, '
+              'Dst INTEGER, Interval INTEGER, IntervalType INTEGER, '
+              'SimulationDays INTEGER, DayType TEXT, '
+              'EnvironmentPeriodIndex INTEGER, WarmupFlag INTEGER)')
+    c.executemany(
+        'INSERT INTO Time VALUES (?, 2017, ?, ?, ?, 0, 0, 60, 1, 1, ?, 3, 0)',
+        [(i + 1, dt.month, dt.day, dt.hour + 1, 'Monday')
+         for i, dt in enumerate(AnalysisPeriod().datetimes)])
+    district_outputs = [('District Cooling Water Rate', 'PLANT'),
+                        ('District Heating Water Rate', 'PLANT 1'),
+                        ('District Heating Water Rate', 'PLANT 2')]
+    for o_i, (output, key) in enumerate(district_outputs):
+        c.execute('INSERT INTO ReportDataDictionary VALUES '
+                  '(?, 0, "Avg", "HVAC", "HVAC System", ?, ?, "Hourly", "", "W")',
+                  (o_i + 1, key, output))
+        c.executemany(
+            'INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, '
+            'Value) VALUES (?, ?, ?)',
+            [(i + 1, o_i + 1, (i % 12) * (o_i + 1)) for i in range(8760)])
+    conn.commit()
+    conn.close()
+
+    outputs = ('District Cooling Water Rate', 'District Heating Water Rate',
+               'Water Heater DistrictHeatingWater Rate')
+    data_colls = ModelEnergyProperties._sql_data_collections(sql_file, outputs)
+    sql_obj = SQLiteResult(sql_file)
+    assert [len(data_colls[output]) for output in outputs] == [1, 2, 0]
+    for output in outputs:
+        base_colls = sql_obj.data_collections_by_output_name(output)
+        assert len(data_colls[output]) == len(base_colls)
+        for data, base_data in zip(data_colls[output], base_colls):
+            assert data.header == base_data.header
+            assert data.header.metadata == base_data.header.metadata
+            assert data.values == base_data.values
+    nukedir(folder, True)
+
+
+def test_read_building_loads_csv(monkeypatch):
+    """Test the parsing of building_loads.csv files with and without NumPy."""
+    folder = './tests/building_loads_csv'
+    os.makedirs(folder)
+    bldg_csv = os.path.join(folder, 'building_loads.csv')
+    with open(bldg_csv, 'w') as f:
+        f.write('SecondsFromStart,Cooling,Heating,WaterHeating\n')
+        for i in range(8760):
+            f.write('{},{},{},{}\n'.format((i + 1) * 3600, -2 * i, 2 * i, 1.5))
+    spaced_csv = os.path.join(folder, 'spaced_loads.csv')
+    with open(spaced_csv, 'w') as f:
+        f.write('Time, Cooling, Heating, Shw\n0, 1, -1, 2.5\n3600, -3, 4, 5.5\n\n')
+    ragged_csv = os.path.join(folder, 'ragged_loads.csv')
+    with open(ragged_csv, 'w', newline='') as f:
+        f.write('Time,Cooling,Heating,Shw\r\n0,1,-1,2.5\r\n-3,4,5.5\r\n\r\n')
+
+    cooling, heating, shw = ModelEnergyProperties._read_building_loads_csv(bldg_csv)
+    assert len(cooling) == len(heating) == len(shw) == 8760
+    assert cooling[:3] == [0, -2, -4]
+    assert heating[:3] == [0, 2, 4]
+    assert shw[:3] == [1.5, 1.5, 1.5]
+    spaced = ModelEnergyProperties._read_building_loads_csv(spaced_csv)
+    assert spaced == ([1, -3], [-1, 4], [2.5, 5.5])
+    ragged = ModelEnergyProperties._read_building_loads_csv(ragged_csv)
+    assert ragged == ([1, -3], [-1, 4], [2.5, 5.5])
+
+    monkeypatch.setitem(sys.modules, 'numpy', None)  # parse without NumPy
+    assert ModelEnergyProperties._read_building_loads_csv(bldg_csv) == \
+        (cooling, heating, shw)
+    assert ModelEnergyProperties._read_building_loads_csv(spaced_csv) == spaced
+    assert ModelEnergyProperties._read_building_loads_csv(ragged_csv) == ragged
+    nukedir(folder, True)
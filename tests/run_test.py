@@ -16,7 +16,9 @@ from honeybee_energy.simulation.parameter import SimulationParameter
 from honeybee_energy.measure import Measure
 from honeybee_energy.lib.programtypes import office_program
 
-from dragonfly_energy.run import base_honeybee_osw
+from dragonfly_energy.run import base_honeybee_osw, _load_checkpoint_manifest, \
+    _completed_models, _write_checkpoint_record, _write_telemetry_event, \
+    _phase_durations, _summarize_telemetry
 
 
 def test_base_honeybee_osw():
@@ -99,3 +101,61 @@ def test_base_honeybee_osw():
 
     # clean up the files
     nukedir(sim_folder, True)
+
+
+def test_checkpoint_manifest():
+    """Test the writing and reading of a JSONL checkpoint manifest."""
+    folder = './tests/checkpoint'
+    os.makedirs(folder)
+    out_file = os.path.join(folder, 'model_1.osm')
+    with open(out_file, 'w') as f:
+        f.write('OS:Version')
+    manifest_file = os.path.join(folder, 'manifest.jsonl')
+    with open(manifest_file, 'a') as manifest:
+        _write_checkpoint_record(manifest, 'model_1', False, 1.5, [], 'Failed\n')
+        _write_checkpoint_record(manifest, 'model_1', True, 2.0, [out_file])
+        _write_checkpoint_record(manifest, 'model_2', True, 2.0, [out_file + 'x'])
+        _write_checkpoint_record(manifest, 'model_3', False, 0.5, [], 'Failed')
+        _write_checkpoint_record(manifest, 'model_5', False, 9.0, [], 'Timed out', True)
+        manifest.write('{"model": "model_4", "sta')  # interrupted while writing
+
+    records = _load_checkpoint_manifest(manifest_file)
+    assert sorted(records) == ['model_1', 'model_2', 'model_3', 'model_5']
+    assert records['model_1']['duration'] == 2.0
+    assert records['model_3']['error'] == 'Failed'
+    assert records['model_5']['status'] == 'timeout'
+    assert _completed_models(records) == set(['model_1'])
+    assert _load_checkpoint_manifest(os.path.join(folder, 'none.jsonl')) == {}
+    nukedir(folder, True)
+
+
+def test_telemetry():
+    """Test the writing and summarizing of a JSONL telemetry file."""
+    folder = './tests/telemetry'
+    os.makedirs(folder)
+    marker = os.path.join(folder, 'in.osm')
+    with open(marker, 'w') as f:
+        f.write('OS:Version')
+    os.utime(marker, (103, 103))
+    phases = _phase_durations(
+        100, 110, [('translate', marker), ('idf', marker + 'x')], 'report')
+    assert phases == {'translate': 3, 'report': 7}
+    phases = _phase_durations(200, 210, [('translate', marker)], 'report')
+    assert phases == {'report': 10}
+
+    telemetry_file = os.path.join(folder, 'telemetry.jsonl')
+    _write_telemetry_event(telemetry_file, 'start', {'models': 10}, 'w')
+    for i in range(10):
+        _write_telemetry_event(telemetry_file, 'model', {
+            'model': 'model_{}'.format(i), 'status': 'failed' if i == 0 else 'success',
+            'duration': i + 1, 'queue_wait': 0, 'phases': {'energyplus': i}})
+    _write_telemetry_event(None, 'end', {'duration': 60})
+    with open(telemetry_file) as tf:
+        assert len(tf.readlines()) == 11
+
+    summary = _summarize_telemetry(telemetry_file, 2)
+    assert '10 models: 1 failed, 9 success' in summary
+    assert 'phase energyplus' in summary
+    assert summary.endswith('model_8')
+    assert 'model_7' not in summary
+    nukedir(folder, True)